@@ -0,0 +1,112 @@
+"""add product search document
+
+Revision ID: 5b8e2a9c4d17
+Revises: c3d1f0b27e94
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b8e2a9c4d17"
+down_revision: Union[str, Sequence[str], None] = "c3d1f0b27e94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of app/services/catalog_tokens.py as of this revision, so the
+# migration keeps producing the same document whatever the app code becomes.
+_WORD_SPLIT_RE = re.compile(r"[^\w]+|_", re.UNICODE)
+
+
+def _normalize(value: Any) -> str:
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFD", str(value)).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def _fold(value: Any) -> str:
+    text = unicodedata.normalize("NFD", str(value)).casefold()
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(w for w in _WORD_SPLIT_RE.split(text) if w)
+
+
+def _compute_search_text(attributes: Any, sku: Any, title_el: Any, title_en: Any) -> str:
+    attrs: Dict[str, Any] = attributes if isinstance(attributes, dict) else {}
+    parts: List[Any] = [title_el, title_en, sku, _normalize(sku), attrs.get("brand_label") or attrs.get("brand")]
+    raw_tags = attrs.get("tags")
+    if isinstance(raw_tags, list):
+        parts.extend(t for t in raw_tags if isinstance(t, str))
+    folded = [_fold(p) for p in parts if p]
+    return " ".join(dict.fromkeys(f for f in folded if f))
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.add_column(
+        "products",
+        sa.Column("search_text", sa.Text(), nullable=False, server_default=sa.text("''")),
+    )
+
+    # Backfill with the accent folding the app applied on write.
+    bind = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, sku, title_el, title_en, attributes FROM products "
+        "WHERE id > :last_id ORDER BY id LIMIT :batch"
+    )
+    update_row = sa.text("UPDATE products SET search_text = :search_text WHERE id = :id")
+    last_id = 0
+    while True:
+        rows = bind.execute(select_batch, {"last_id": last_id, "batch": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(
+            update_row,
+            [
+                {
+                    "id": row.id,
+                    "search_text": _compute_search_text(row.attributes, row.sku, row.title_el, row.title_en),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.add_column(
+        "products",
+        sa.Column(
+            "search_vector",
+            TSVECTOR(),
+            sa.Computed("to_tsvector('simple', search_text)", persisted=True),
+        ),
+    )
+    op.create_index(
+        "ix_products_search_vector",
+        "products",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_products_search_text_trgm",
+        "products",
+        ["search_text"],
+        postgresql_using="gin",
+        postgresql_ops={"search_text": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_search_text_trgm", table_name="products")
+    op.drop_index("ix_products_search_vector", table_name="products")
+    op.drop_column("products", "search_vector")
+    op.drop_column("products", "search_text")
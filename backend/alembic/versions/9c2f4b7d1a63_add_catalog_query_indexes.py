@@ -0,0 +1,74 @@
+"""add catalog query indexes
+
+Revision ID: 9c2f4b7d1a63
+Revises: 5b8e2a9c4d17
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c2f4b7d1a63"
+down_revision: Union[str, Sequence[str], None] = "5b8e2a9c4d17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Predicates must stay textually equivalent to the router filters so the
+# planner can prove the partial indexes apply (see scripts/explain_catalog_queries.py).
+STOREFRONT_PREDICATE = "visible IS TRUE AND status IN ('published', 'in_stock', 'preorder')"
+SHOP_PREDICATE = "visible IS TRUE AND status <> 'archived'"
+RECYCLE_BIN_PREDICATE = "deleted_at IS NOT NULL OR status = 'archived'"
+
+
+def upgrade() -> None:
+    # /api/shop-products and /api/products listings: ORDER BY created_at DESC, id DESC
+    # within their visibility filter. With status IN (...) the old (visible, status,
+    # created_at, id) index could not return rows in order; these partial ones can.
+    op.create_index(
+        "ix_products_storefront_keyset",
+        "products",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text(STOREFRONT_PREDICATE),
+    )
+    op.create_index(
+        "ix_products_shop_keyset",
+        "products",
+        [sa.text("created_at DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text(SHOP_PREDICATE),
+    )
+    op.drop_index("ix_products_listing_keyset", table_name="products")
+
+    # Admin recycle bin: ORDER BY deleted_at DESC, updated_at DESC over archived rows only.
+    op.create_index(
+        "ix_products_recycle_bin",
+        "products",
+        [sa.text("deleted_at DESC"), sa.text("updated_at DESC")],
+        postgresql_where=sa.text(RECYCLE_BIN_PREDICATE),
+    )
+
+    # Contact lens admin list/lookups filter on attributes->>'product_type' and sort by updated_at.
+    op.create_index(
+        "ix_products_product_type_updated",
+        "products",
+        [sa.text("(attributes ->> 'product_type')"), sa.text("updated_at DESC")],
+    )
+
+    # Catalog stamp (max(updated_at)) and other recency reads.
+    op.create_index("ix_products_updated_at", "products", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_updated_at", table_name="products")
+    op.drop_index("ix_products_product_type_updated", table_name="products")
+    op.drop_index("ix_products_recycle_bin", table_name="products")
+    op.create_index(
+        "ix_products_listing_keyset",
+        "products",
+        ["visible", "status", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+    op.drop_index("ix_products_shop_keyset", table_name="products")
+    op.drop_index("ix_products_storefront_keyset", table_name="products")
@@ -0,0 +1,34 @@
+"""products.created_at / updated_at NOT NULL
+
+Revision ID: a6c2e8f4b197
+Revises: f3a9c6e1d8b5
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a6c2e8f4b197"
+down_revision: Union[str, Sequence[str], None] = "f3a9c6e1d8b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases created from the models (init_db) allowed NULLs here, and a
+    # row comparison against NULL is never true, so such rows fell out of the
+    # (created_at, id) listing keysets and the recycle bin's
+    # (COALESCE(deleted_at, updated_at), id) keyset.
+    op.execute("UPDATE products SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+    op.execute("UPDATE products SET updated_at = created_at WHERE updated_at IS NULL")
+    op.alter_column("products", "created_at", nullable=False, server_default=sa.text("now()"))
+    op.alter_column("products", "updated_at", nullable=False, server_default=sa.text("now()"))
+
+
+def downgrade() -> None:
+    op.alter_column("products", "updated_at", nullable=True)
+    op.alter_column("products", "created_at", nullable=True)
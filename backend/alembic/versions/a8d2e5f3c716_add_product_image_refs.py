@@ -0,0 +1,106 @@
+"""add product image refs
+
+Revision ID: a8d2e5f3c716
+Revises: f1c8d5a3e7b4
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Any, Set, Sequence, Union
+from urllib.parse import urlparse
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a8d2e5f3c716"
+down_revision: Union[str, Sequence[str], None] = "f1c8d5a3e7b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of app/services/image_refs.py as of this revision, so the
+# migration keeps extracting the same paths whatever the app code becomes.
+IMAGE_PUBLIC_PREFIXES = ("/uploads/images", "/product_images")
+
+
+def _normalize_public_path(path: str) -> str:
+    raw = (path or "").replace("\\", "/").strip()
+    if not raw:
+        return ""
+    if not raw.startswith("/"):
+        raw = "/" + raw
+    parts = [p for p in raw.split("/") if p and p not in {".", ".."}]
+    return "/" + "/".join(parts)
+
+
+def _image_paths(raw_value: Any) -> Set[str]:
+    refs: Set[str] = set()
+    if not isinstance(raw_value, str):
+        return refs
+    normalized = _normalize_public_path(urlparse(raw_value.strip()).path)
+    if not normalized:
+        return refs
+    for prefix in IMAGE_PUBLIC_PREFIXES:
+        idx = normalized.find(prefix + "/")
+        if idx >= 0:
+            refs.add(_normalize_public_path(normalized[idx:]))
+    return refs
+
+
+def _product_image_paths(images: Any, attributes: Any) -> Set[str]:
+    refs: Set[str] = set()
+    for image in images or []:
+        refs |= _image_paths(image)
+    variants = attributes.get("variants", []) if isinstance(attributes, dict) else []
+    for variant in variants if isinstance(variants, list) else []:
+        if not isinstance(variant, dict):
+            continue
+        for key in ("image", "imageUrl"):
+            refs |= _image_paths(variant.get(key))
+        var_images = variant.get("images")
+        if isinstance(var_images, list):
+            for value in var_images:
+                refs |= _image_paths(value)
+    return refs
+
+
+def upgrade() -> None:
+    # Which uploaded files each product links to; maintained by the app on write.
+    op.create_table(
+        "product_image_refs",
+        sa.Column(
+            "product_id",
+            sa.BigInteger(),
+            sa.ForeignKey("products.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("public_path", sa.Text(), primary_key=True),
+    )
+    op.create_index("ix_product_image_refs_public_path", "product_image_refs", ["public_path"])
+
+    # Backfill with the path extraction the app applied on write.
+    bind = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, images, attributes FROM products WHERE id > :last_id ORDER BY id LIMIT :batch"
+    )
+    insert_ref = sa.text("INSERT INTO product_image_refs (product_id, public_path) VALUES (:product_id, :public_path)")
+    last_id = 0
+    while True:
+        rows = bind.execute(select_batch, {"last_id": last_id, "batch": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        refs = [
+            {"product_id": row.id, "public_path": path}
+            for row in rows
+            for path in sorted(_product_image_paths(row.images, row.attributes))
+        ]
+        if refs:
+            bind.execute(insert_ref, refs)
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_image_refs_public_path", table_name="product_image_refs")
+    op.drop_table("product_image_refs")
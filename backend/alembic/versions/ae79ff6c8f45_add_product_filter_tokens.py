@@ -0,0 +1,157 @@
+"""add product filter tokens
+
+Revision ID: ae79ff6c8f45
+Revises: 1e3f5a2d2be8
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ae79ff6c8f45"
+down_revision: Union[str, Sequence[str], None] = "1e3f5a2d2be8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of app/services/catalog_tokens.py as of this revision, so the
+# migration keeps producing the same tokens whatever the app code becomes.
+STOCK_ALIASES = ["stock", "stok", "στοκ", "στοκσ"]
+_WORD_SPLIT_RE = re.compile(r"[^\w]+|_", re.UNICODE)
+
+
+def _normalize(value: Any) -> str:
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFD", str(value)).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def _is_stock_value(value: Any) -> bool:
+    normalized = _normalize(value)
+    return bool(normalized) and any(_normalize(alias) in normalized for alias in STOCK_ALIASES)
+
+
+def _value_tokens(value: Any) -> List[str]:
+    whole = _normalize(value)
+    if not whole:
+        return []
+    words = [w for w in (_normalize(p) for p in _WORD_SPLIT_RE.split(str(value))) if w]
+    tokens = [whole, *words]
+    tokens.extend(a + b for a, b in zip(words, words[1:]))
+    return tokens
+
+
+def _compute_catalog_tokens(attributes: Any, slug: Any, title_el: Any, title_en: Any) -> Dict[str, Any]:
+    attrs: Dict[str, Any] = attributes if isinstance(attributes, dict) else {}
+    raw_categories = [
+        attrs[key] for key in ("category_label", "category", "category_value") if isinstance(attrs.get(key), str)
+    ]
+    cat_value = next((c for c in raw_categories if c), None)
+    if cat_value is None and attrs.get("product_type") == "contact_lens":
+        cat_value = "contact_lenses"
+    raw_tags = attrs.get("tags") or []
+    tags = [t for t in raw_tags if isinstance(t, str)] if isinstance(raw_tags, list) else []
+    product_type = attrs.get("product_type") if isinstance(attrs.get("product_type"), str) else None
+
+    candidates: List[str] = [cat_value] if cat_value else []
+    candidates.extend(raw_categories)
+    candidates.extend(tags)
+    candidates.extend([product_type, slug, title_el, title_en])
+    candidates = list(dict.fromkeys(c for c in candidates if c))
+
+    is_stock = attrs.get("stock") is True
+    for stock_key in ("is_stock", "isStock", "stock_category"):
+        val = attrs.get(stock_key)
+        if val is True or (isinstance(val, str) and _is_stock_value(val)):
+            is_stock = True
+    if not is_stock:
+        is_stock = any(_is_stock_value(c) for c in candidates)
+
+    category_tokens: List[str] = []
+    for val in candidates:
+        category_tokens.extend(_value_tokens(val))
+    if is_stock:
+        category_tokens.append("stock")
+
+    audience_values: List[Any] = []
+    if attrs.get("audience"):
+        audience_values.append(attrs["audience"])
+    raw_audiences = attrs.get("audiences")
+    if isinstance(raw_audiences, list):
+        audience_values.extend(v for v in raw_audiences if v is not None)
+
+    return {
+        "category_tokens": list(dict.fromkeys(category_tokens)),
+        "audience_tokens": list(dict.fromkeys(t for t in (_normalize(a) for a in audience_values) if t)),
+        "is_stock": is_stock,
+    }
+
+
+def upgrade() -> None:
+    op.add_column(
+        "products",
+        sa.Column("category_tokens", ARRAY(sa.Text()), nullable=False, server_default=sa.text("'{}'::text[]")),
+    )
+    op.add_column(
+        "products",
+        sa.Column("audience_tokens", ARRAY(sa.Text()), nullable=False, server_default=sa.text("'{}'::text[]")),
+    )
+    op.add_column(
+        "products",
+        sa.Column("is_stock", sa.Boolean(), nullable=False, server_default=sa.text("FALSE")),
+    )
+
+    # Backfill existing rows with the normalization the app used on write.
+    bind = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, slug, title_el, title_en, attributes FROM products "
+        "WHERE id > :last_id ORDER BY id LIMIT :batch"
+    )
+    update_row = sa.text(
+        "UPDATE products SET category_tokens = :category_tokens, "
+        "audience_tokens = :audience_tokens, is_stock = :is_stock WHERE id = :id"
+    ).bindparams(
+        sa.bindparam("category_tokens", type_=ARRAY(sa.Text())),
+        sa.bindparam("audience_tokens", type_=ARRAY(sa.Text())),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(select_batch, {"last_id": last_id, "batch": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            values = _compute_catalog_tokens(row.attributes, row.slug, row.title_el, row.title_en)
+            params.append({"id": row.id, **values})
+        bind.execute(update_row, params)
+        last_id = rows[-1].id
+
+    op.create_index(
+        "ix_products_category_tokens",
+        "products",
+        ["category_tokens"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_products_audience_tokens",
+        "products",
+        ["audience_tokens"],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_audience_tokens", table_name="products")
+    op.drop_index("ix_products_category_tokens", table_name="products")
+    op.drop_column("products", "is_stock")
+    op.drop_column("products", "audience_tokens")
+    op.drop_column("products", "category_tokens")
@@ -0,0 +1,43 @@
+"""recycle bin keyset index
+
+Revision ID: b5e9c3a7d248
+Revises: a8d2e5f3c716
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b5e9c3a7d248"
+down_revision: Union[str, Sequence[str], None] = "a8d2e5f3c716"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must stay textually equivalent to admin_products.RECYCLE_BIN_FILTER.
+RECYCLE_BIN_PREDICATE = "deleted_at IS NOT NULL OR status = 'archived'"
+
+
+def upgrade() -> None:
+    # Keyset pages ORDER BY COALESCE(deleted_at, updated_at) DESC, id DESC; the
+    # old (deleted_at, updated_at) order had NULLs and no unique tiebreaker.
+    op.drop_index("ix_products_recycle_bin", table_name="products")
+    op.create_index(
+        "ix_products_recycle_bin",
+        "products",
+        [sa.text("COALESCE(deleted_at, updated_at) DESC"), sa.text("id DESC")],
+        postgresql_where=sa.text(RECYCLE_BIN_PREDICATE),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_recycle_bin", table_name="products")
+    op.create_index(
+        "ix_products_recycle_bin",
+        "products",
+        [sa.text("deleted_at DESC"), sa.text("updated_at DESC")],
+        postgresql_where=sa.text(RECYCLE_BIN_PREDICATE),
+    )
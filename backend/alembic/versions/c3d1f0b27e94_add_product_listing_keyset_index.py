@@ -0,0 +1,32 @@
+"""add product listing keyset index
+
+Revision ID: c3d1f0b27e94
+Revises: ae79ff6c8f45
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d1f0b27e94"
+down_revision: Union[str, Sequence[str], None] = "ae79ff6c8f45"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Matches ORDER BY created_at DESC, id DESC used by the storefront listings
+    # so a (created_at, id) keyset seek is a plain index range scan.
+    op.create_index(
+        "ix_products_listing_keyset",
+        "products",
+        ["visible", "status", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_listing_keyset", table_name="products")
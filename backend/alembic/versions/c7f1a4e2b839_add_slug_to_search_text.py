@@ -0,0 +1,90 @@
+"""add slug to product search text
+
+Revision ID: c7f1a4e2b839
+Revises: b5e9c3a7d248
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7f1a4e2b839"
+down_revision: Union[str, Sequence[str], None] = "b5e9c3a7d248"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of app/services/catalog_tokens.py as of this revision, so the
+# migration keeps producing the same document whatever the app code becomes.
+_WORD_SPLIT_RE = re.compile(r"[^\w]+|_", re.UNICODE)
+
+
+def _normalize(value: Any) -> str:
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFD", str(value)).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def _fold(value: Any) -> str:
+    text = unicodedata.normalize("NFD", str(value)).casefold()
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(w for w in _WORD_SPLIT_RE.split(text) if w)
+
+
+def _compute_search_text(attributes: Any, sku: Any, title_el: Any, title_en: Any, slug: Any) -> str:
+    attrs: Dict[str, Any] = attributes if isinstance(attributes, dict) else {}
+    parts: List[Any] = [title_el, title_en, sku, _normalize(sku), attrs.get("brand_label") or attrs.get("brand")]
+    parts.append(slug)
+    raw_tags = attrs.get("tags")
+    if isinstance(raw_tags, list):
+        parts.extend(t for t in raw_tags if isinstance(t, str))
+    folded = [_fold(p) for p in parts if p]
+    return " ".join(dict.fromkeys(f for f in folded if f))
+
+
+def _backfill(include_slug: bool) -> None:
+    bind = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, sku, slug, title_el, title_en, attributes FROM products "
+        "WHERE id > :last_id ORDER BY id LIMIT :batch"
+    )
+    update_row = sa.text("UPDATE products SET search_text = :search_text WHERE id = :id")
+    last_id = 0
+    while True:
+        rows = bind.execute(select_batch, {"last_id": last_id, "batch": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        bind.execute(
+            update_row,
+            [
+                {
+                    "id": row.id,
+                    "search_text": _compute_search_text(
+                        row.attributes,
+                        row.sku,
+                        row.title_el,
+                        row.title_en,
+                        row.slug if include_slug else None,
+                    ),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    # search_vector is generated from search_text and follows automatically.
+    _backfill(include_slug=True)
+
+
+def downgrade() -> None:
+    _backfill(include_slug=False)
@@ -0,0 +1,99 @@
+"""category tokens for aliases of up to four words
+
+Revision ID: d4a7b2c9e3f1
+Revises: c7f1a4e2b839
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a7b2c9e3f1"
+down_revision: Union[str, Sequence[str], None] = "c7f1a4e2b839"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Frozen copy of app/services/catalog_tokens.py as of this revision, so the
+# migration keeps producing the same tokens whatever the app code becomes.
+_WORD_SPLIT_RE = re.compile(r"[^\w]+|_", re.UNICODE)
+
+
+def _normalize(value: Any) -> str:
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFD", str(value)).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def _value_tokens(value: Any, max_words: int) -> List[str]:
+    whole = _normalize(value)
+    if not whole:
+        return []
+    words = [w for w in (_normalize(p) for p in _WORD_SPLIT_RE.split(str(value))) if w]
+    tokens = [whole]
+    for size in range(1, max_words + 1):
+        tokens.extend("".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return tokens
+
+
+def _candidates(attributes: Any, slug: Any, title_el: Any, title_en: Any) -> List[str]:
+    attrs: Dict[str, Any] = attributes if isinstance(attributes, dict) else {}
+    raw_categories = [
+        attrs[key] for key in ("category_label", "category", "category_value") if isinstance(attrs.get(key), str)
+    ]
+    cat_value = next((c for c in raw_categories if c), None)
+    if cat_value is None and attrs.get("product_type") == "contact_lens":
+        cat_value = "contact_lenses"
+    raw_tags = attrs.get("tags") or []
+    tags = [t for t in raw_tags if isinstance(t, str)] if isinstance(raw_tags, list) else []
+    product_type = attrs.get("product_type") if isinstance(attrs.get("product_type"), str) else None
+
+    candidates: List[str] = [cat_value] if cat_value else []
+    candidates.extend(raw_categories)
+    candidates.extend(tags)
+    candidates.extend([product_type, slug, title_el, title_en])
+    return list(dict.fromkeys(c for c in candidates if c))
+
+
+def _backfill(max_words: int) -> None:
+    # Only category_tokens depends on the n-gram size; is_stock is unchanged.
+    bind = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, slug, title_el, title_en, attributes, is_stock FROM products "
+        "WHERE id > :last_id ORDER BY id LIMIT :batch"
+    )
+    update_row = sa.text("UPDATE products SET category_tokens = :category_tokens WHERE id = :id").bindparams(
+        sa.bindparam("category_tokens", type_=ARRAY(sa.Text())),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(select_batch, {"last_id": last_id, "batch": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            break
+        params = []
+        for row in rows:
+            tokens: List[str] = []
+            for value in _candidates(row.attributes, row.slug, row.title_el, row.title_en):
+                tokens.extend(_value_tokens(value, max_words))
+            if row.is_stock:
+                tokens.append("stock")
+            params.append({"id": row.id, "category_tokens": list(dict.fromkeys(tokens))})
+        bind.execute(update_row, params)
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    _backfill(max_words=4)
+
+
+def downgrade() -> None:
+    _backfill(max_words=2)
@@ -0,0 +1,44 @@
+"""add product tombstones
+
+Revision ID: d4a7c1e9b352
+Revises: 9c2f4b7d1a63
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a7c1e9b352"
+down_revision: Union[str, Sequence[str], None] = "9c2f4b7d1a63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Hard deletes for the /shop-products/changes delta feed; soft deletes and
+    # archives are picked up from products.updated_at.
+    op.create_table(
+        "product_tombstones",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("product_id", sa.BigInteger(), nullable=False),
+        sa.Column("sku", sa.Text(), nullable=False),
+        sa.Column("slug", sa.Text(), nullable=True),
+        sa.Column("deleted_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+    op.create_index("ix_product_tombstones_deleted_at", "product_tombstones", ["deleted_at", "id"])
+
+    # The feed pages with (updated_at, id) > (:ts, :id); a single-column index
+    # cannot bound that row comparison, the composite one can.
+    op.drop_index("ix_products_updated_at", table_name="products")
+    op.create_index("ix_products_updated_at", "products", ["updated_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_products_updated_at", table_name="products")
+    op.create_index("ix_products_updated_at", "products", ["updated_at"])
+    op.drop_index("ix_product_tombstones_deleted_at", table_name="product_tombstones")
+    op.drop_table("product_tombstones")
@@ -0,0 +1,66 @@
+"""add product neighbours
+
+Revision ID: e6b3f8a2c519
+Revises: d4a7c1e9b352
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e6b3f8a2c519"
+down_revision: Union[str, Sequence[str], None] = "d4a7c1e9b352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Top-K related products per product for /shop-products/{slug}/related,
+    # filled by scripts/build_related_products.py.
+    op.create_table(
+        "product_neighbours",
+        sa.Column(
+            "product_id",
+            sa.BigInteger(),
+            sa.ForeignKey("products.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column(
+            "similar_ids",
+            postgresql.ARRAY(sa.BigInteger()),
+            server_default=sa.text("'{}'::bigint[]"),
+            nullable=False,
+        ),
+        sa.Column(
+            "brand_ids",
+            postgresql.ARRAY(sa.BigInteger()),
+            server_default=sa.text("'{}'::bigint[]"),
+            nullable=False,
+        ),
+        sa.Column("built_at", sa.TIMESTAMP(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_product_neighbours_similar_ids",
+        "product_neighbours",
+        ["similar_ids"],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_product_neighbours_brand_ids",
+        "product_neighbours",
+        ["brand_ids"],
+        postgresql_using="gin",
+    )
+    op.create_index("ix_product_neighbours_built_at", "product_neighbours", ["built_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_product_neighbours_built_at", table_name="product_neighbours")
+    op.drop_index("ix_product_neighbours_brand_ids", table_name="product_neighbours")
+    op.drop_index("ix_product_neighbours_similar_ids", table_name="product_neighbours")
+    op.drop_table("product_neighbours")
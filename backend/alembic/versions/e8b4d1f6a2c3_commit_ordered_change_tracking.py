@@ -0,0 +1,63 @@
+"""commit-ordered change tracking (change_xid)
+
+Revision ID: e8b4d1f6a2c3
+Revises: d4a7b2c9e3f1
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b4d1f6a2c3"
+down_revision: Union[str, Sequence[str], None] = "d4a7b2c9e3f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same function as app/services/change_tracking.py, frozen here.
+STAMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION stamp_change_xid() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    # Existing rows get 0: every consumer has to start over anyway, since
+    # the old timestamp watermarks are not comparable with transaction ids.
+    op.add_column("products", sa.Column("change_xid", sa.BigInteger(), nullable=False, server_default=sa.text("0")))
+    op.add_column(
+        "product_tombstones",
+        sa.Column("change_xid", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+    )
+    op.execute(STAMP_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER products_change_xid BEFORE INSERT OR UPDATE ON products "
+        "FOR EACH ROW EXECUTE FUNCTION stamp_change_xid()"
+    )
+    op.execute(
+        "CREATE TRIGGER product_tombstones_change_xid BEFORE INSERT ON product_tombstones "
+        "FOR EACH ROW EXECUTE FUNCTION stamp_change_xid()"
+    )
+    op.create_index("ix_products_change_xid", "products", ["change_xid", "id"])
+    op.create_index("ix_product_tombstones_change_xid", "product_tombstones", ["change_xid", "id"])
+    # Tombstones were only read by deleted_at for the feeds.
+    op.drop_index("ix_product_tombstones_deleted_at", table_name="product_tombstones")
+
+
+def downgrade() -> None:
+    op.create_index("ix_product_tombstones_deleted_at", "product_tombstones", ["deleted_at", "id"])
+    op.drop_index("ix_product_tombstones_change_xid", table_name="product_tombstones")
+    op.drop_index("ix_products_change_xid", table_name="products")
+    op.execute("DROP TRIGGER IF EXISTS product_tombstones_change_xid ON product_tombstones")
+    op.execute("DROP TRIGGER IF EXISTS products_change_xid ON products")
+    op.execute("DROP FUNCTION IF EXISTS stamp_change_xid()")
+    op.drop_column("product_tombstones", "change_xid")
+    op.drop_column("products", "change_xid")
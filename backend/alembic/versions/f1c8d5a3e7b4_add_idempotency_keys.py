@@ -0,0 +1,48 @@
+"""add idempotency keys
+
+Revision ID: f1c8d5a3e7b4
+Revises: e6b3f8a2c519
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c8d5a3e7b4"
+down_revision: Union[str, Sequence[str], None] = "e6b3f8a2c519"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("admin_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("idempotency_key", sa.String(length=255), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("response", postgresql.JSONB(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    # Replays are a single lookup on this index; concurrent first requests
+    # serialize on it (the second INSERT waits for the first to commit).
+    op.create_index(
+        "uq_idempotency_keys_admin_key_hash",
+        "idempotency_keys",
+        ["admin_id", "idempotency_key", "request_hash"],
+        unique=True,
+    )
+    op.create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_idempotency_keys_expires_at", table_name="idempotency_keys")
+    op.drop_index("uq_idempotency_keys_admin_key_hash", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
@@ -0,0 +1,33 @@
+"""add build watermarks
+
+Revision ID: f3a9c6e1d8b5
+Revises: e8b4d1f6a2c3
+Create Date: 2026-10-17 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a9c6e1d8b5"
+down_revision: Union[str, Sequence[str], None] = "e8b4d1f6a2c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Without a row the related-products builder does one full build.
+    op.create_table(
+        "build_watermarks",
+        sa.Column("name", sa.Text(), primary_key=True),
+        sa.Column("horizon", sa.BigInteger(), nullable=False),
+        sa.Column("as_of", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("now()"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("build_watermarks")
@@ -9,6 +9,15 @@ class Settings(BaseSettings):
     app_env: str = "dev"
     product_image_dir: str = "/var/www/eshop_frontend/media/uploads/images"
     legacy_product_image_dir: str | None = "/var/www/eshop_frontend/product_images"
+    catalog_cache_max_entries: int = 2048
+    catalog_cache_ttl_seconds: float = 60.0
+    catalog_cache_stale_seconds: float = 300.0
+    catalog_availability_ttl_seconds: float = 5.0
+    catalog_fast_json: bool = False
+    public_site_url: str = "https://www.lookoptica.gr"
+    merchant_feed_path: str = "/var/www/eshop_frontend/media/feeds/merchant.tsv.gz"
+    sitemap_dir: str = "/var/www/eshop_frontend/media/sitemaps"
+    idempotency_ttl_hours: float = 24.0
     smtp_host: str | None = None
     smtp_port: int | None = None
     smtp_user: str | None = None
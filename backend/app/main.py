@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.routers import admin_products, shop_products, admin_auth, customer_auth
 from app.routers import public_products
@@ -7,12 +8,16 @@ from app.routers import contact
 from app.routers import admin_contact_lenses
 from app.routers import admin_uploads
 from app.routers import admin_media
+from app.routers import admin_cache
+from app.routers import feeds
+from app.routers import sitemaps
 from app.routers import checkout
 from app.routers import final_checkout
 from app.routers import customer_checkout
 from app.routers import orders
 from app.middleware.rate_limit import RateLimiterMiddleware
 from app.middleware.csrf import CSRFMiddleware   # <-- NEW
+from app.services.optimistic_lock import stale_data_handler
 from app.routers.payments_viva import router as viva_router
 
 
@@ -50,6 +55,8 @@ logger = logging.getLogger(__name__)
 
 
 app = FastAPI(title="Look Optica API")
+# A product changed between read and write (version mismatch) -> 409.
+app.add_exception_handler(StaleDataError, stale_data_handler)
 
 # ------------------ CORS (must be first custom middleware) ------------------
 FRONTEND_ORIGINS = [
@@ -64,6 +71,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Estimated"],
 )
 
 
@@ -99,12 +107,15 @@ app.include_router(shop_products.router, prefix="/api")
 app.include_router(contact.router, prefix="/api")
 app.include_router(admin_uploads.router, prefix="/api")
 app.include_router(admin_media.router, prefix="/api")
+app.include_router(admin_cache.router, prefix="/api")
+app.include_router(feeds.router, prefix="/api")
 app.include_router(checkout.router, prefix="/api")
 app.include_router(final_checkout.router, prefix="/api")
 app.include_router(customer_checkout.router, prefix="/api")
 app.include_router(customer_auth.router, prefix="/api")
 app.include_router(orders.router, prefix="/api")
 app.include_router(viva_router, prefix="/api")
+app.include_router(sitemaps.router)
 
 @app.get("/healthz")
 async def healthz():
@@ -1,9 +1,14 @@
 from .product import Product
+from .product_tombstone import ProductTombstone
+from .product_neighbour import ProductNeighbour
+from .product_image_ref import ProductImageRef
+from .build_watermark import BuildWatermark
 from .brand import Brand
 from .category import Category
 from .user import User, Role, UserRole
 from .admin_session import AdminSession
 from .admin_audit_log import AdminAuditLog
+from .idempotency_key import IdempotencyKey
 from .customer import Customer
 from .customer_session import CustomerSession
 from .customer_address import CustomerAddress
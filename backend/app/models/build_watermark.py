@@ -0,0 +1,20 @@
+# app/models/build_watermark.py
+from sqlalchemy import BigInteger, Column, Text
+from sqlalchemy.sql import func
+from sqlalchemy.types import TIMESTAMP
+
+from app.db import Base
+
+
+class BuildWatermark(Base):
+    """
+    How far an incremental builder has consumed product changes: the
+    commit-ordered horizon it last read up to (app/services/change_tracking.py).
+    Stored explicitly so it advances even when a run writes nothing.
+    """
+    __tablename__ = "build_watermarks"
+
+    name = Column(Text, primary_key=True)
+    horizon = Column(BigInteger, nullable=False)
+    as_of = Column(TIMESTAMP(timezone=True), nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,30 @@
+# app/models/idempotency_key.py
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.db import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Stored responses for admin writes sent with an Idempotency-Key header
+    (see app/services/idempotency.py). Rows expire and are swept by
+    scripts/sweep_idempotency_keys.py.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    admin_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    idempotency_key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)   # sha256 of path + payload
+
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSONB, nullable=True)             # set in the same transaction as the write
+
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("uq_idempotency_keys_admin_key_hash", admin_id, idempotency_key, request_hash, unique=True),
+        Index("ix_idempotency_keys_expires_at", expires_at),
+    )
@@ -1,8 +1,13 @@
-from sqlalchemy import BigInteger, Column, Text, Integer, Boolean, Numeric, ForeignKey
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import BigInteger, Column, Computed, FetchedValue, Text, Integer, Boolean, Numeric, ForeignKey, Index, DDL, event, inspect, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR
 from sqlalchemy.sql import func
 from sqlalchemy.types import TIMESTAMP
 from app.db import Base
+from app.models.product_tombstone import ProductTombstone
+from app.services.catalog_tokens import refresh_catalog_tokens
+from app.services.change_tracking import change_xid_ddl
+# Module import: app.services.image_refs itself imports app.models.
+from app.services import image_refs
 
 
 class Product(Base):
@@ -25,5 +30,90 @@ class Product(Base):
     visible = Column(Boolean, nullable=False, default=True)
     version = Column(Integer, nullable=False, default=1)
     deleted_at = Column(TIMESTAMP(timezone=True))
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
-    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
+    # NOT NULL: both back keyset paginations, where a NULL row would be skipped.
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+    # Writing transaction's id, set by trigger; commit-ordered change cursor (app/services/change_tracking.py)
+    change_xid = Column(BigInteger, nullable=False, server_default=text("0"), server_onupdate=FetchedValue())
+    # Normalized PLP filter tokens, maintained on every write (see app/services/catalog_tokens.py)
+    category_tokens = Column(ARRAY(Text), nullable=False, default=list, server_default=text("'{}'::text[]"))
+    audience_tokens = Column(ARRAY(Text), nullable=False, default=list, server_default=text("'{}'::text[]"))
+    is_stock = Column(Boolean, nullable=False, default=False, server_default=text("FALSE"))
+    # Accent-folded search document (titles, sku, brand, tags) and its tsvector
+    search_text = Column(Text, nullable=False, default="", server_default=text("''"))
+    search_vector = Column(TSVECTOR, Computed("to_tsvector('simple', search_text)", persisted=True))
+
+    __table_args__ = (
+        Index("ix_products_category_tokens", category_tokens, postgresql_using="gin"),
+        Index("ix_products_audience_tokens", audience_tokens, postgresql_using="gin"),
+        # Partial keyset indexes for the storefront (/api/shop-products) and
+        # /api/products listings; predicates mirror the router filters.
+        Index(
+            "ix_products_storefront_keyset",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("visible IS TRUE AND status IN ('published', 'in_stock', 'preorder')"),
+        ),
+        Index(
+            "ix_products_shop_keyset",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=text("visible IS TRUE AND status <> 'archived'"),
+        ),
+        # Admin recycle bin keyset: (removed at, id), newest first.
+        Index(
+            "ix_products_recycle_bin",
+            text("COALESCE(deleted_at, updated_at) DESC"),
+            id.desc(),
+            postgresql_where=text("deleted_at IS NOT NULL OR status = 'archived'"),
+        ),
+        Index("ix_products_product_type_updated", text("(attributes ->> 'product_type')"), updated_at.desc()),
+        # Serves max(updated_at) for the catalog stamp.
+        Index("ix_products_updated_at", updated_at, id),
+        # (change_xid, id) keyset for the changes feed and the incremental builders.
+        Index("ix_products_change_xid", change_xid, id),
+        Index("ix_products_search_vector", search_vector, postgresql_using="gin"),
+        Index(
+            "ix_products_search_text_trgm",
+            search_text,
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
+    # ORM updates/deletes are compare-and-swap on version (see app/services/optimistic_lock.py).
+    __mapper_args__ = {"version_id_col": version}
+
+
+# The trigram index needs pg_trgm when tables are created outside Alembic (init_db).
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+for ddl in change_xid_ddl("products"):
+    event.listen(Product.__table__, "after_create", ddl)
+
+
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _sync_derived_columns(mapper, connection, target):
+    refresh_catalog_tokens(target)
+
+
+@event.listens_for(Product, "after_delete")
+def _record_tombstone(mapper, connection, target):
+    # Hard deletes leave no row for the changes feed to find, so keep a marker.
+    connection.execute(
+        ProductTombstone.__table__.insert().values(product_id=target.id, sku=target.sku, slug=target.slug)
+    )
+
+
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_update")
+def _sync_image_refs(mapper, connection, target):
+    # Keep product_image_refs in step; hard deletes cascade through the FK.
+    state = inspect(target)
+    if not (state.attrs.images.history.has_changes() or state.attrs.attributes.history.has_changes()):
+        return
+    image_refs.replace_image_refs(connection, {target.id: image_refs.product_image_paths(target.images, target.attributes)})
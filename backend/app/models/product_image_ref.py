@@ -0,0 +1,21 @@
+# app/models/product_image_ref.py
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Text
+
+from app.db import Base
+
+
+class ProductImageRef(Base):
+    """
+    One row per (product, uploaded image file) the product links to, kept in
+    step with every product write (app/services/image_refs.py). Hard deletes
+    cascade; archived products keep their rows, so their files stay "linked".
+    """
+    __tablename__ = "product_image_refs"
+
+    product_id = Column(BigInteger, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    public_path = Column(Text, primary_key=True)
+
+    __table_args__ = (
+        # "Is this file linked?" / "who else uses it?" from the media manager and deletes.
+        Index("ix_product_image_refs_public_path", public_path),
+    )
@@ -0,0 +1,26 @@
+# app/models/product_neighbour.py
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import TIMESTAMP
+
+from app.db import Base
+
+
+class ProductNeighbour(Base):
+    """
+    Precomputed related products (app/services/related_products.py): one row
+    per live product holding its ranked top-K neighbour ids.
+    """
+    __tablename__ = "product_neighbours"
+
+    product_id = Column(BigInteger, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    similar_ids = Column(ARRAY(BigInteger), nullable=False, server_default=text("'{}'::bigint[]"))
+    brand_ids = Column(ARRAY(BigInteger), nullable=False, server_default=text("'{}'::bigint[]"))
+    built_at = Column(TIMESTAMP(timezone=True), nullable=False)
+
+    __table_args__ = (
+        # Incremental rebuilds look up the lists that mention a changed product.
+        Index("ix_product_neighbours_similar_ids", similar_ids, postgresql_using="gin"),
+        Index("ix_product_neighbours_brand_ids", brand_ids, postgresql_using="gin"),
+        Index("ix_product_neighbours_built_at", built_at),
+    )
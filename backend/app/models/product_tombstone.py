@@ -0,0 +1,32 @@
+# app/models/product_tombstone.py
+from sqlalchemy import BigInteger, Column, Index, Text, event, text
+from sqlalchemy.sql import func
+from sqlalchemy.types import TIMESTAMP
+
+from app.db import Base
+from app.services.change_tracking import change_xid_ddl
+
+
+class ProductTombstone(Base):
+    """
+    Marker left behind when a product row is permanently deleted, so the
+    /shop-products/changes feed can tell sync consumers to drop it.
+    Archived/soft-deleted products keep their row and show up via change_xid.
+    """
+    __tablename__ = "product_tombstones"
+
+    id = Column(BigInteger, primary_key=True)
+    product_id = Column(BigInteger, nullable=False)
+    sku = Column(Text, nullable=False)
+    slug = Column(Text)
+    deleted_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    # Deleting transaction's id, set by trigger (app/services/change_tracking.py)
+    change_xid = Column(BigInteger, nullable=False, server_default=text("0"))
+
+    __table_args__ = (
+        Index("ix_product_tombstones_change_xid", change_xid, id),
+    )
+
+
+for ddl in change_xid_ddl("product_tombstones", events="INSERT"):
+    event.listen(ProductTombstone.__table__, "after_create", ddl)
@@ -0,0 +1,19 @@
+# app/routers/admin_cache.py
+from fastapi import APIRouter, Depends
+
+from app.deps.admin_auth import get_current_admin_user
+from app.models.user import User
+from app.services.catalog_cache import catalog_cache_stats
+
+router = APIRouter(prefix="/admin/cache", tags=["admin-cache"])
+
+
+@router.get("/stats")
+def get_cache_stats(
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Hit/miss counters and sizes of this worker's catalog read caches.
+    """
+    _ = current_admin
+    return catalog_cache_stats()
@@ -10,6 +10,7 @@ from app.deps.admin_auth import get_current_admin_user, get_db
 from app.models.product import Product as ProductModel
 from app.models.user import User
 from app.services.audit import log_admin_action
+from app.services.optimistic_lock import check_expected_version
 
 router = APIRouter(
     prefix="/admin/contact-lenses",
@@ -92,6 +93,10 @@ class ContactLensVariantUpdate(BaseModel):
 
 class ContactLensVariantsUpdatePayload(BaseModel):
     variants: List[ContactLensVariantUpdate]
+    expected_version: Optional[int] = Field(
+        default=None,
+        description="Product version the client edited; 409 if it has changed since",
+    )
 
 
 class ContactLensVariantCreate(BaseModel):
@@ -111,6 +116,10 @@ class ContactLensVariantCreate(BaseModel):
         ge=0,
         description="Stock quantity for this specific variant",
     )
+    expected_version: Optional[int] = Field(
+        default=None,
+        description="Product version the client edited; 409 if it has changed since",
+    )
 
 
 class ContactLensVariantKey(BaseModel):
@@ -119,6 +128,10 @@ class ContactLensVariantKey(BaseModel):
     axis: Optional[int] = None
     addition: Optional[float] = None
     addition_label: Optional[str] = None
+    expected_version: Optional[int] = Field(
+        default=None,
+        description="Product version the client edited; 409 if it has changed since",
+    )
 
 # ---------- Payload ----------
 
@@ -173,6 +186,11 @@ class ContactLensPayload(BaseModel):
         description="HL / HML / DN_RANGE for multifocal",
     )
 
+    expected_version: Optional[int] = Field(
+        default=None,
+        description="Product version the client edited; 409 if it has changed since",
+    )
+
     @model_validator(mode="after")
     def validate_by_type(self) -> "ContactLensPayload":
         # All types need sphere min/max
@@ -365,6 +383,7 @@ def serialize_contact_lens(product: ProductModel) -> dict:
         "image": (product.images or [None])[0],
         "attributes": attrs,
         "variants_count": len(variants),
+        "version": product.version,
     }
 
 
@@ -384,7 +403,9 @@ def create_contact_lens(
     product = db.query(ProductModel).filter(ProductModel.sku == payload.sku).first()
     created = False
 
-    if not product:
+    if product:
+        check_expected_version(product.version, payload.expected_version)
+    else:
         created = True
         product = ProductModel(
             sku=payload.sku,
@@ -443,7 +464,6 @@ def create_contact_lens(
     product.attributes = attrs
     product.images = [payload.image] if payload.image else []
     product.stock = product.stock or 0
-    product.version = (product.version or 0) + 1
 
     db.add(product)
     db.commit()
@@ -532,6 +552,7 @@ def update_contact_lens(
         product = db.query(ProductModel).filter(ProductModel.sku == sku).first()
     if not product:
         raise HTTPException(status_code=404, detail="Contact lens not found")
+    check_expected_version(product.version, payload.expected_version)
 
     if payload.sku != sku:
         raise HTTPException(
@@ -601,7 +622,6 @@ def update_contact_lens(
 
     product.attributes = attrs
     product.images = [payload.image] if payload.image else []
-    product.version = (product.version or 0) + 1
 
     db.add(product)
     db.commit()
@@ -736,6 +756,7 @@ def create_contact_lens_variant(
         product = db.query(ProductModel).filter(ProductModel.sku == sku).first()
     if not product:
         raise HTTPException(status_code=404, detail="Contact lens not found")
+    check_expected_version(product.version, payload.expected_version)
 
     attrs: Dict[str, Any] = dict(product.attributes or {})
     if attrs.get("product_type") != "contact_lens":
@@ -826,7 +847,6 @@ def create_contact_lens_variant(
         product.visible = False
 
     product.attributes = attrs
-    product.version = (product.version or 0) + 1
 
     db.add(product)
     db.commit()
@@ -884,6 +904,7 @@ def update_contact_lens_variants(
 
     if not product:
         raise HTTPException(status_code=404, detail="Contact lens not found")
+    check_expected_version(product.version, payload.expected_version)
 
     attrs: Dict[str, Any] = dict(product.attributes or {})
     if attrs.get("product_type") != "contact_lens":
@@ -929,7 +950,6 @@ def update_contact_lens_variants(
         product.visible = False
 
     product.attributes = attrs
-    product.version = (product.version or 0) + 1
 
     db.add(product)
     db.commit()
@@ -962,6 +982,7 @@ def update_contact_lens_variants(
 def delete_contact_lens(
     sku: str,
     request: Request,
+    expected_version: Optional[int] = Query(default=None),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user),
 ):
@@ -977,6 +998,7 @@ def delete_contact_lens(
 
     if not product:
         raise HTTPException(status_code=404, detail="Contact lens not found")
+    check_expected_version(product.version, expected_version)
 
     db.delete(product)
     db.commit()
@@ -1015,6 +1037,7 @@ def delete_contact_lens_variant(
         product = db.query(ProductModel).filter(ProductModel.sku == sku).first()
     if not product:
         raise HTTPException(status_code=404, detail="Contact lens not found")
+    check_expected_version(product.version, key.expected_version)
 
     attrs: Dict[str, Any] = dict(product.attributes or {})
     variants: List[Dict[str, Any]] = attrs.get("variants", [])
@@ -1052,7 +1075,6 @@ def delete_contact_lens_variant(
         product.visible = False
 
     product.attributes = attrs
-    product.version = (product.version or 0) + 1
 
     db.add(product)
     db.commit()
@@ -1066,7 +1088,7 @@ def delete_contact_lens_variant(
         resource_id=product.id,
         metadata={
             "sku": product.sku,
-            "variant_deleted": key.model_dump(),
+            "variant_deleted": key.model_dump(exclude={"expected_version"}),
             "variants_remaining": len(remaining),
         },
         request=request,
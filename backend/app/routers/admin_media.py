@@ -1,6 +1,6 @@
 import mimetypes
 from pathlib import Path
-from urllib.parse import unquote, urlparse
+from urllib.parse import unquote
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import FileResponse
@@ -9,9 +9,9 @@ from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.deps.admin_auth import get_current_admin_user, get_db
-from app.models.product import Product as ProductModel
 from app.models.user import User
 from app.services.audit import log_admin_action
+from app.services.image_refs import linked_image_paths, normalize_public_path
 
 router = APIRouter(prefix="/admin/media", tags=["admin-media"])
 
@@ -24,16 +24,6 @@ class DeleteMediaFilePayload(BaseModel):
     force: bool = False
 
 
-def _normalize_public_path(path: str) -> str:
-    raw = (path or "").replace("\\", "/").strip()
-    if not raw:
-        return ""
-    if not raw.startswith("/"):
-        raw = "/" + raw
-    parts = [p for p in raw.split("/") if p and p not in {".", ".."}]
-    return "/" + "/".join(parts)
-
-
 def _normalize_relative_path(path: str) -> str:
     raw = (path or "").replace("\\", "/").strip().lstrip("/")
     parts = [p for p in raw.split("/") if p and p not in {".", ".."}]
@@ -55,7 +45,7 @@ def _build_sources() -> dict[str, dict]:
             "label": label,
             "dir": directory,
             "dir_resolved": resolved,
-            "public_prefix": _normalize_public_path(public_prefix).rstrip("/"),
+            "public_prefix": normalize_public_path(public_prefix).rstrip("/"),
         }
 
     _add("current", "Current uploads", settings.product_image_dir, "/uploads/images")
@@ -90,61 +80,6 @@ def _iter_image_files(source: dict):
         yield path
 
 
-def _extract_public_refs(raw_value: str, sources: dict[str, dict]) -> set[str]:
-    refs: set[str] = set()
-    parsed_path = urlparse(raw_value).path if isinstance(raw_value, str) else ""
-    if not parsed_path:
-        return refs
-
-    normalized = _normalize_public_path(parsed_path)
-    if not normalized:
-        return refs
-
-    for source in sources.values():
-        prefix = source["public_prefix"]
-        if not prefix:
-            continue
-        marker = prefix + "/"
-        idx = normalized.find(marker)
-        if idx >= 0:
-            refs.add(_normalize_public_path(normalized[idx:]))
-        elif normalized == prefix:
-            refs.add(prefix)
-    return refs
-
-
-def _collect_linked_public_paths(db: Session, sources: dict[str, dict]) -> set[str]:
-    linked: set[str] = set()
-    rows = db.query(ProductModel).all()
-
-    for row in rows:
-        for image in row.images or []:
-            if isinstance(image, str):
-                linked.update(_extract_public_refs(image, sources))
-
-        attrs = row.attributes or {}
-        if not isinstance(attrs, dict):
-            continue
-        variants = attrs.get("variants", [])
-        if not isinstance(variants, list):
-            continue
-
-        for variant in variants:
-            if not isinstance(variant, dict):
-                continue
-            for key in ("image", "imageUrl"):
-                value = variant.get(key)
-                if isinstance(value, str):
-                    linked.update(_extract_public_refs(value, sources))
-            var_images = variant.get("images")
-            if isinstance(var_images, list):
-                for value in var_images:
-                    if isinstance(value, str):
-                        linked.update(_extract_public_refs(value, sources))
-
-    return linked
-
-
 @router.get("/sources")
 def list_media_sources(
     current_admin: User = Depends(get_current_admin_user),
@@ -180,36 +115,40 @@ def list_media_files(
         raise HTTPException(status_code=404, detail="Unknown media source")
 
     selected_sources = sources.values() if source == "all" else [sources[source]]
-    linked_public_paths = _collect_linked_public_paths(db, sources)
     query_text = (q or "").strip().lower()
 
-    items: list[dict] = []
+    candidates: list[tuple[dict, Path, str, str]] = []
     for src in selected_sources:
         prefix = src["public_prefix"]
         for file_path in _iter_image_files(src):
             rel = file_path.relative_to(Path(src["dir_resolved"])).as_posix()
-            public_path = _normalize_public_path(f"{prefix}/{rel}")
-            is_linked = public_path in linked_public_paths
-
-            if unlinked_only and is_linked:
-                continue
             if query_text and query_text not in rel.lower() and query_text not in file_path.name.lower():
                 continue
+            candidates.append((src, file_path, rel, normalize_public_path(f"{prefix}/{rel}")))
+
+    # Indexed lookups of just these files in product_image_refs.
+    linked_public_paths = linked_image_paths(db, (public_path for *_, public_path in candidates))
 
-            stat = file_path.stat()
-            items.append(
-                {
-                    "id": f"{src['id']}:{rel}",
-                    "source": src["id"],
-                    "source_label": src["label"],
-                    "path": rel,
-                    "filename": file_path.name,
-                    "public_path": public_path,
-                    "size_bytes": stat.st_size,
-                    "updated_at": stat.st_mtime,
-                    "is_linked": is_linked,
-                }
-            )
+    items: list[dict] = []
+    for src, file_path, rel, public_path in candidates:
+        is_linked = public_path in linked_public_paths
+        if unlinked_only and is_linked:
+            continue
+
+        stat = file_path.stat()
+        items.append(
+            {
+                "id": f"{src['id']}:{rel}",
+                "source": src["id"],
+                "source_label": src["label"],
+                "path": rel,
+                "filename": file_path.name,
+                "public_path": public_path,
+                "size_bytes": stat.st_size,
+                "updated_at": stat.st_mtime,
+                "is_linked": is_linked,
+            }
+        )
 
     items.sort(key=lambda x: x["updated_at"], reverse=True)
     total = len(items)
@@ -270,9 +209,8 @@ def delete_media_file(
     if not target.exists() or not target.is_file():
         raise HTTPException(status_code=404, detail="File not found")
 
-    public_path = _normalize_public_path(f"{src['public_prefix']}/{normalized_rel}")
-    linked_public_paths = _collect_linked_public_paths(db, sources)
-    is_linked = public_path in linked_public_paths
+    public_path = normalize_public_path(f"{src['public_prefix']}/{normalized_rel}")
+    is_linked = bool(linked_image_paths(db, [public_path]))
 
     if is_linked and not payload.force:
         raise HTTPException(
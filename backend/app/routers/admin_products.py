@@ -4,16 +4,29 @@ from pathlib import Path
 from typing import Any
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
-from sqlalchemy import or_
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import Select, func, or_, select, text, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.config import settings
 from app.deps.admin_auth import get_current_admin_user, get_db
 from app.models.product import Product as ProductModel
 from app.models.user import User
 from app.schemas.product import ProductUpsert
-from app.services.audit import log_admin_action
+from app.services.audit import log_admin_action, log_admin_actions
+from app.services.catalog_search import SearchClause, build_search_clause
+from app.services.image_refs import image_paths_used_elsewhere
+from app.services.idempotency import (
+    claim_idempotency_key,
+    replay_response,
+    request_fingerprint,
+    store_idempotent_response,
+)
+from app.services.optimistic_lock import VERSION_CONFLICT_DETAIL, check_expected_version
+from app.services.pagination import decode_cursor, encode_cursor, set_next_cursor, set_total_count
 
 router = APIRouter(
     prefix="/admin/products",
@@ -21,6 +34,14 @@ router = APIRouter(
 )
 
 UPLOAD_PUBLIC_PREFIX = "/uploads/images/"
+MAX_BULK_SYNC_ITEMS = 5000
+# Keeps each sku IN (...) well under the driver's bind parameter limit.
+BULK_SYNC_PREFETCH_SIZE = 1000
+# Searches in the recycle bin count at most this many matches.
+RECYCLE_BIN_COUNT_CAP = 1000
+# Predicate and sort key must match ix_products_recycle_bin (app/models/product.py).
+RECYCLE_BIN_FILTER = or_(ProductModel.deleted_at.isnot(None), ProductModel.status == "archived")
+RECYCLE_BIN_REMOVED_AT = func.coalesce(ProductModel.deleted_at, ProductModel.updated_at)
 ALLOWED_CATALOG_STATUSES = {
     "draft",
     "published",
@@ -154,12 +175,33 @@ def _collect_product_image_paths(product: ProductModel) -> set[str]:
     return refs
 
 
-def _collect_image_paths_in_other_products(db: Session, excluded_product_id: int) -> set[str]:
-    refs: set[str] = set()
-    rows = db.query(ProductModel).filter(ProductModel.id != excluded_product_id).all()
-    for row in rows:
-        refs.update(_collect_product_image_paths(row))
-    return refs
+def recycle_bin_query(stmt: Select, search: SearchClause | None = None) -> Select:
+    """Recycle-bin rows in page order; served by the ix_products_recycle_bin partial index."""
+    stmt = stmt.where(RECYCLE_BIN_FILTER)
+    if search is not None:
+        # Filter only: pages stay in removal order so the cursor keeps working.
+        stmt = stmt.where(search.where)
+    return stmt.order_by(RECYCLE_BIN_REMOVED_AT.desc(), ProductModel.id.desc())
+
+
+def _recycle_bin_total(db: Session, search: SearchClause | None) -> tuple[int, bool]:
+    """
+    (total, estimated). The unfiltered total is the partial index's row count
+    from pg_class, which autovacuum/ANALYZE keep current, so no scan is
+    needed. Searches are counted exactly up to RECYCLE_BIN_COUNT_CAP.
+    """
+    if search is None:
+        estimate = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass('ix_products_recycle_bin')")
+        ).scalar()
+        if estimate is not None and estimate > 0:
+            return int(estimate), True
+        # Never analyzed yet (-1) or empty: an exact count is cheap then.
+        return db.execute(select(func.count()).select_from(ProductModel).where(RECYCLE_BIN_FILTER)).scalar_one(), False
+
+    capped = recycle_bin_query(select(ProductModel.id), search).limit(RECYCLE_BIN_COUNT_CAP + 1).subquery()
+    count = db.execute(select(func.count()).select_from(capped)).scalar_one()
+    return min(count, RECYCLE_BIN_COUNT_CAP), count > RECYCLE_BIN_COUNT_CAP
 
 
 def _resolve_target_path(public_path: str) -> Path | None:
@@ -190,22 +232,9 @@ def _archive_product(product: ProductModel) -> None:
     product.deleted_at = datetime.utcnow()
 
 
-@router.post("/sync")
-async def upsert_product(
-    payload: ProductUpsert,
-    request: Request,
-    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user),
-):
-    """
-    Upsert a product row directly in Postgres so quick edits from the admin table persist.
-    """
-    product = db.query(ProductModel).filter(ProductModel.sku == payload.sku).first()
-
-    created = False
-    if not product:
-        created = True
+def _apply_upsert(product: ProductModel | None, payload: ProductUpsert) -> ProductModel:
+    """Apply a sync payload to an existing row, or build a new one when ``product`` is None."""
+    if product is None:
         slug = payload.slug or (payload.sku or "").lower().replace(" ", "-")
         title_el = payload.title.el or payload.title.en or slug or payload.sku
         title_en = payload.title.en or payload.title.el or slug or payload.sku
@@ -242,11 +271,57 @@ async def upsert_product(
         product.visible = True
         product.deleted_at = None
 
-    product.version = payload.version
+    return product
+
+
+def _sync_audit_metadata(product: ProductModel, idempotency_key: str | None, created: bool) -> dict[str, Any]:
+    return {
+        "sku": product.sku,
+        "slug": product.slug,
+        "status": product.status,
+        "version": product.version,
+        "idempotency_key": idempotency_key,
+        "created": created,
+    }
+
+
+def _sync_result(product: ProductModel, idempotency_key: str | None, created: bool) -> dict[str, Any]:
+    return {
+        "shop_product_id": product.id,
+        "status": (product.attributes or {}).get("catalog_status", product.status),
+        "version": product.version,
+        "idempotency_key": idempotency_key,
+        "created": created,
+    }
+
+
+@router.post("/sync")
+def upsert_product(
+    payload: ProductUpsert,
+    request: Request,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Upsert a product row directly in Postgres so quick edits from the admin table persist.
+    """
+    claim = None
+    if idempotency_key:
+        fingerprint = request_fingerprint(request.url.path, payload.model_dump(mode="json"))
+        claim = claim_idempotency_key(db, current_admin.id, idempotency_key, fingerprint)
+        if claim.replayed:
+            return replay_response(claim)
+
+    product = db.query(ProductModel).filter(ProductModel.sku == payload.sku).first()
+    if product is not None:
+        check_expected_version(product.version, payload.expected_version)
+
+    created = product is None
+    product = _apply_upsert(product, payload)
 
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    db.flush()
 
     action = "product_create" if created else "product_update"
     log_admin_action(
@@ -255,59 +330,147 @@ async def upsert_product(
         action=action,
         resource_type="product",
         resource_id=product.id,
-        metadata={
-            "sku": product.sku,
-            "slug": product.slug,
-            "status": product.status,
-            "version": product.version,
-            "idempotency_key": idempotency_key,
-            "created": created,
-        },
+        metadata=_sync_audit_metadata(product, idempotency_key, created),
         request=request,
+        commit=False,
     )
-    return {
-        "shop_product_id": product.id,
-        "status": (product.attributes or {}).get("catalog_status", product.status),
-        "version": product.version,
+    result = _sync_result(product, idempotency_key, created)
+    if claim is not None:
+        store_idempotent_response(db, claim, result)
+    # Product, audit row and stored response become visible together.
+    db.commit()
+    return result
+
+
+@router.post("/sync/bulk")
+def bulk_upsert_products(
+    payload: list[dict[str, Any]],
+    request: Request,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Upsert many products (ERP price/stock pushes) in one transaction: one
+    SKU pre-fetch, one flush, one multi-row audit insert and one commit.
+    Items that fail validation or repeat a SKU are reported and skipped.
+    """
+    if len(payload) > MAX_BULK_SYNC_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_SYNC_ITEMS} products per request")
+
+    claim = None
+    if idempotency_key:
+        fingerprint = request_fingerprint(request.url.path, payload)
+        claim = claim_idempotency_key(db, current_admin.id, idempotency_key, fingerprint)
+        if claim.replayed:
+            return replay_response(claim)
+
+    results: dict[int, dict[str, Any]] = {}
+    valid: dict[int, ProductUpsert] = {}
+    seen_skus: set[str] = set()
+    for index, raw in enumerate(payload):
+        try:
+            item = ProductUpsert.model_validate(raw)
+        except ValidationError as exc:
+            sku = raw.get("sku") if isinstance(raw, dict) else None
+            results[index] = {"index": index, "sku": sku, "ok": False, "error": exc.errors(include_url=False)}
+            continue
+        if item.sku in seen_skus:
+            results[index] = {"index": index, "sku": item.sku, "ok": False, "error": "Duplicate SKU in payload"}
+            continue
+        seen_skus.add(item.sku)
+        valid[index] = item
+
+    existing: dict[str, ProductModel] = {}
+    skus = list(seen_skus)
+    for start in range(0, len(skus), BULK_SYNC_PREFETCH_SIZE):
+        chunk = skus[start:start + BULK_SYNC_PREFETCH_SIZE]
+        existing.update((p.sku, p) for p in db.query(ProductModel).filter(ProductModel.sku.in_(chunk)))
+
+    touched: list[tuple[int, ProductModel, bool]] = []
+    for index, item in valid.items():
+        current = existing.get(item.sku)
+        if current is not None and item.expected_version not in (None, current.version):
+            results[index] = {"index": index, "sku": item.sku, "ok": False, "error": VERSION_CONFLICT_DETAIL}
+            continue
+        product = _apply_upsert(current, item)
+        if current is None:
+            db.add(product)
+        touched.append((index, product, current is None))
+
+    try:
+        # One flush: batched INSERT ... RETURNING for new rows, executemany UPDATEs for the rest.
+        db.flush()
+    except (IntegrityError, StaleDataError) as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Bulk sync conflicted with a concurrent write; retry") from exc
+
+    log_admin_actions(
+        db=db,
+        admin=current_admin,
+        entries=[
+            {
+                "action": "product_create" if created else "product_update",
+                "resource_type": "product",
+                "resource_id": product.id,
+                "metadata": {**_sync_audit_metadata(product, idempotency_key, created), "bulk": True},
+            }
+            for _, product, created in touched
+        ],
+        request=request,
+        commit=False,
+    )
+
+    for index, product, created in touched:
+        results[index] = {"index": index, "sku": product.sku, "ok": True, **_sync_result(product, idempotency_key, created)}
+    items = [results[i] for i in sorted(results)]
+    response = {
+        "created": sum(1 for _, _, created in touched if created),
+        "updated": sum(1 for _, _, created in touched if not created),
+        "failed": len(items) - len(touched),
         "idempotency_key": idempotency_key,
-        "created": created,
+        "items": items,
     }
+    if claim is not None:
+        store_idempotent_response(db, claim, response)
+    db.commit()
+    return response
 
 
 @router.get("/deleted")
-async def list_deleted_products(
+def list_deleted_products(
+    response: Response,
     limit: int = Query(default=200, ge=1, le=500),
     offset: int = Query(default=0, ge=0),
+    cursor: str | None = Query(default=None, description="Opaque keyset cursor from the X-Next-Cursor header"),
     q: str | None = Query(default=None),
     db: Session = Depends(get_db),
     current_admin: User = Depends(get_current_admin_user),
 ):
     """
-    Return archived (soft-deleted) products for recycle-bin management.
+    Return archived (soft-deleted) products for recycle-bin management,
+    most recently removed first. Pass ``cursor`` (from ``X-Next-Cursor``)
+    instead of ``offset`` to page; ``X-Total-Count`` carries the total.
     """
-    query = db.query(ProductModel).filter(
-        or_(
-            ProductModel.deleted_at.isnot(None),
-            ProductModel.status == "archived",
-        )
-    )
-    if q:
-        like = f"%{q.strip()}%"
-        query = query.filter(
-            or_(
-                ProductModel.sku.ilike(like),
-                ProductModel.slug.ilike(like),
-                ProductModel.title_el.ilike(like),
-                ProductModel.title_en.ilike(like),
-            )
-        )
+    search = build_search_clause(q) if q else None
+    after = decode_cursor(cursor) if cursor else None
+
+    stmt = recycle_bin_query(select(ProductModel, RECYCLE_BIN_REMOVED_AT.label("removed_at")), search)
+    if after:
+        stmt = stmt.where(tuple_(RECYCLE_BIN_REMOVED_AT, ProductModel.id) < after)
+    else:
+        stmt = stmt.offset(offset)
+    rows = db.execute(stmt.limit(limit)).all()
 
-    rows = query.order_by(ProductModel.deleted_at.desc(), ProductModel.updated_at.desc()).offset(offset).limit(limit).all()
-    return [_serialize_admin_product(row) for row in rows]
+    if len(rows) == limit and rows[-1].removed_at is not None:
+        set_next_cursor(response, encode_cursor(rows[-1].removed_at, rows[-1].Product.id))
+    total, estimated = _recycle_bin_total(db, search)
+    set_total_count(response, total, estimated)
+    return [_serialize_admin_product(row.Product) for row in rows]
 
 
 @router.post("/{sku}/restore")
-async def restore_product(
+def restore_product(
     sku: str,
     request: Request,
     db: Session = Depends(get_db),
@@ -359,7 +522,7 @@ async def restore_product(
 
 
 @router.delete("/{sku}")
-async def delete_product_permanently(
+def delete_product_permanently(
     sku: str,
     request: Request,
     delete_images: bool = Query(default=True),
@@ -378,7 +541,7 @@ async def delete_product_permanently(
     product_slug = product.slug
     product_image_paths = _collect_product_image_paths(product)
     referenced_by_others = (
-        _collect_image_paths_in_other_products(db, excluded_product_id=product_id) if delete_images else set()
+        image_paths_used_elsewhere(db, product_id, product_image_paths) if delete_images else set()
     )
     removable_public_paths = sorted(product_image_paths - referenced_by_others) if delete_images else []
 
@@ -432,7 +595,7 @@ async def delete_product_permanently(
 
 
 @router.get("/{sku}")
-async def get_product_admin(
+def get_product_admin(
     sku: str,
     current_admin: User = Depends(get_current_admin_user),
 ):
@@ -460,7 +623,7 @@ async def get_product_admin(
 
 
 @router.post("/{sku}/unpublish")
-async def unpublish_product(
+def unpublish_product(
     sku: str,
     request: Request,
     db: Session = Depends(get_db),
@@ -0,0 +1,35 @@
+# app/routers/feeds.py
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.services.http_cache import FEED_CACHE_CONTROL, is_not_modified, not_modified_response, set_cache_headers
+from app.services.merchant_feed import read_feed_meta
+
+router = APIRouter(prefix="/feeds", tags=["feeds"])
+
+
+@router.get("/merchant.tsv.gz")
+def get_merchant_feed(request: Request):
+    """
+    Prebuilt Google Merchant feed (scripts/build_merchant_feed.py). Served as
+    a file, so Range / If-Range requests resume partial downloads.
+    """
+    path = Path(settings.merchant_feed_path)
+    meta = read_feed_meta(path)
+    if meta is None or not path.is_file():
+        raise HTTPException(status_code=404, detail="Feed has not been built yet")
+
+    etag = meta["etag"]
+    last_modified = datetime.fromisoformat(meta["generated_at"])
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, cache_control=FEED_CACHE_CONTROL)
+
+    response = FileResponse(path, media_type="application/gzip", filename=path.name)
+    # Set before the file is stat'ed, so these win over the mtime-based defaults
+    # and If-Range is checked against the content ETag.
+    set_cache_headers(response, etag, last_modified, cache_control=FEED_CACHE_CONTROL)
+    return response
@@ -1,12 +1,33 @@
-import unicodedata
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import math
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from sqlalchemy import BigInteger, Select, case, column, func, literal, or_, select, true, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, aliased, load_only
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 
+from app.config import settings
 from app.db import SessionLocal
 from app.models.product import Product
+from app.models.product_neighbour import ProductNeighbour
+from app.models.product_tombstone import ProductTombstone
+from app.services.catalog_cache import catalog_stamp, catalog_version, get_catalog_cache
+from app.services.catalog_projection import CARD_COLUMNS, card_attributes, parse_fields
+from app.services.catalog_search import SearchClause, build_search_clause
+from app.services.catalog_tokens import alias_tokens, category_value, fold_search_text, normalize_category_string
+from app.services.catalog_visibility import ALLOWED_STATUSES
+from app.services.change_tracking import change_horizon
+from app.services.fast_json import catalog_json_response
+from app.services.http_cache import (
+    AVAILABILITY_CACHE_CONTROL,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    set_cache_headers,
+)
+from app.services.pagination import decode_cursor, decode_watermark, encode_cursor, encode_watermark, set_next_cursor
 
 router = APIRouter(prefix="/shop-products", tags=["shop-products"])
 
@@ -43,6 +64,48 @@ class ProductListItem(BaseModel):
     attributes: dict = Field(default_factory=dict)
     isStock: Optional[bool] = None
 
+class VariantAvailability(BaseModel):
+    sku: str | None = None
+    stock: int | None = None
+    status: str | None = None
+    price: float | None = None
+    discountPrice: float | None = None
+
+
+class UpsertedProduct(BaseModel):
+    id: int
+    slug: str | None
+    updatedAt: datetime
+    product: ProductListItem
+
+
+class RemovedProduct(BaseModel):
+    id: int
+    sku: str
+    slug: str | None
+    removedAt: datetime
+
+
+class CatalogChanges(BaseModel):
+    upserted: List[UpsertedProduct] = Field(default_factory=list)
+    removed: List[RemovedProduct] = Field(default_factory=list)
+    watermark: str
+    hasMore: bool = False
+
+
+class FacetBucket(BaseModel):
+    value: str
+    label: str
+    count: int
+
+
+class ProductFacets(BaseModel):
+    total: int
+    stock: int
+    categories: List[FacetBucket] = Field(default_factory=list)
+    audiences: List[FacetBucket] = Field(default_factory=list)
+    brands: List[FacetBucket] = Field(default_factory=list)
+
 class ProductDetail(ProductListItem):
     ean: str | None
     images: list
@@ -60,77 +123,142 @@ def get_db():
         yield db
     finally:
         db.close()
-ALLOWED_STATUSES = {"published", "in_stock", "preorder"}
 
 
-def _normalize_category_string(value: Any) -> str:
+_listing_cache = get_catalog_cache("shop_products.list")
+_detail_cache = get_catalog_cache("shop_products.detail")
+_facets_cache = get_catalog_cache("shop_products.facets")
+_card_cache = get_catalog_cache("shop_products.card")
+_related_cache = get_catalog_cache("shop_products.related")
+_availability_cache = get_catalog_cache(
+    "shop_products.availability",
+    ttl_seconds=settings.catalog_availability_ttl_seconds,
+)
+
+MAX_BATCH_SIZE = 100
+MAX_CHANGES_PAGE = 1000
+MAX_RELATED = 24
+# Start of the change stream for a first full sync (no ?since=).
+_CHANGES_EPOCH = (-1, 0)
+
+
+def _apply_storefront_filters(
+    stmt: Select,
+    *,
+    search: Optional[SearchClause],
+    category_aliases: List[str],
+    audience_filters: List[str],
+) -> Select:
+    stmt = stmt.where(
+        Product.visible.is_(True),
+        Product.status.in_(ALLOWED_STATUSES),
+    )
+    if search is not None:
+        stmt = stmt.where(search.where)
+
+    # Category/audience matching runs on the precomputed token arrays (GIN indexed).
+    if category_aliases:
+        stmt = stmt.where(Product.category_tokens.overlap(alias_tokens(category_aliases)))
+    if audience_filters:
+        stmt = stmt.where(Product.audience_tokens.overlap(alias_tokens(audience_filters)))
+    return stmt
+
+
+def _list_item_meta(attrs: Dict[str, Any]) -> Dict[str, Any]:
+    if not isinstance(attrs, dict):
+        return {"brand": None, "category": None, "audience": None, "status": None}
+    return {
+        "brand": attrs.get("brand_label") or attrs.get("brand"),
+        "category": category_value(attrs),
+        "audience": attrs.get("audience"),
+        "status": attrs.get("catalog_status"),
+    }
+
+
+def _filters_cache_key(q: Optional[str], category_aliases: List[str], audience_filters: List[str]) -> tuple:
+    return (
+        fold_search_text(q),
+        tuple(sorted(alias_tokens(category_aliases))),
+        tuple(sorted(alias_tokens(audience_filters))),
+        bool(category_aliases),
+        bool(audience_filters),
+    )
+
+
+def _list_item_dict(r: Product, attrs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Mirror the frontend normalization:
-    - lowercase
-    - strip diacritics
-    - keep only letters/numbers
+    ProductListItem as a plain dict, same keys and order as its model_dump().
+    ``attrs`` is the SQL-side card projection; r.attributes is not loaded.
     """
-    if value is None:
-        return ""
-    text = unicodedata.normalize("NFD", str(value)).lower()
-    return "".join(ch for ch in text if ch.isalnum())
-
-
-def _matches_category_alias(value: Any, aliases: List[str]) -> bool:
-    normalized = _normalize_category_string(value)
-    if not normalized:
-        return False
-    for alias in aliases:
-        norm_alias = _normalize_category_string(alias)
-        if not norm_alias:
-            continue
-        if (
-            normalized == norm_alias
-            or normalized.startswith(norm_alias)
-            or normalized.endswith(norm_alias)
-            or norm_alias in normalized
-        ):
-            return True
-    return False
+    attrs = attrs if isinstance(attrs, dict) else {}
+    meta = _list_item_meta(attrs)
+    return {
+        "sku": r.sku,
+        "slug": r.slug,
+        "title": {"el": r.title_el, "en": r.title_en},
+        "price": float(r.price or 0),
+        "discountPrice": float(r.compare_at_price) if r.compare_at_price is not None else None,
+        "stock": int(r.stock or 0),
+        "brand": meta.get("brand"),
+        "category": meta.get("category"),
+        "audience": meta.get("audience"),
+        "images": r.images or [],
+        "status": meta.get("status") or r.status,
+        "attributes": attrs,
+        "isStock": r.is_stock or None,
+    }
+
+
+def _load_listing_page(
+    db: Session,
+    *,
+    search: Optional[SearchClause],
+    category_aliases: List[str],
+    audience_filters: List[str],
+    limit: int,
+    offset: int,
+    after: Optional[tuple],
+) -> tuple[List[Dict[str, Any]], Optional[str]]:
+    stmt = _apply_storefront_filters(
+        select(Product, card_attributes()).options(load_only(*CARD_COLUMNS)),
+        search=search,
+        category_aliases=category_aliases,
+        audience_filters=audience_filters,
+    )
 
+    # Keyset pagination when a cursor is given; plain OFFSET stays for old clients.
+    if after:
+        stmt = stmt.where(tuple_(Product.created_at, Product.id) < after)
+    else:
+        stmt = stmt.offset(offset)
+    if search is not None:
+        stmt = stmt.order_by(search.rank.desc())
+    stmt = stmt.order_by(Product.created_at.desc(), Product.id.desc()).limit(limit)
+    rows = db.execute(stmt).all()
 
-def _gather_category_candidates(
-    *,
-    cat_value: Optional[str],
-    raw_categories: List[str],
-    tags: List[str],
-    slug: Optional[str],
-    title_el: Optional[str],
-    title_en: Optional[str],
-    product_type: Optional[str],
-) -> List[str]:
-    # Include everything that can reasonably indicate a category.
-    candidates: List[str] = []
-    if cat_value:
-        candidates.append(cat_value)
-    candidates.extend(raw_categories)
-    candidates.extend(tags)
-    if product_type:
-        candidates.append(product_type)
-    if slug:
-        candidates.append(slug)
-    if title_el:
-        candidates.append(title_el)
-    if title_en:
-        candidates.append(title_en)
-    # Deduplicate while preserving order
-    return list(dict.fromkeys([c for c in candidates if c]))
+    next_cursor = None
+    if search is None and len(rows) == limit and rows[-1].Product.created_at is not None:
+        next_cursor = encode_cursor(rows[-1].Product.created_at, rows[-1].Product.id)
+    return [_list_item_dict(r.Product, r.card_attributes) for r in rows], next_cursor
 
 
 @router.get("", response_model=List[ProductListItem])
 def list_products(
+    request: Request,
     q: Optional[str] = Query(None),
     category: Optional[List[str]] = Query(None),
     audience: Optional[List[str]] = Query(None),
     limit: int = 24,
     offset: int = 0,
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from the X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description="Comma-separated subset of list item fields"),
     db: Session = Depends(get_db),
 ):
+    after = decode_cursor(cursor) if cursor else None
+    selected = parse_fields(fields, ProductListItem.model_fields)
+    search = build_search_clause(q) if q else None
+    if after and search is not None:
+        raise HTTPException(status_code=400, detail="Search results are ranked; use offset to page them")
     try:
         # Normalize pagination params
         safe_limit = max(1, min(limit, 200))
@@ -140,175 +268,291 @@ def list_products(
         category_aliases = [c for c in (category or []) if c]
         audience_filters = [a for a in (audience or []) if a]
 
-        base_stmt = select(Product).where(
-            Product.visible.is_(True),
-            Product.status.in_(ALLOWED_STATUSES),
+        cache_key = (
+            _filters_cache_key(q, category_aliases, audience_filters),
+            safe_limit,
+            after or safe_offset,
         )
-        if q:
-            like = f"%{q.lower()}%"
-            base_stmt = base_stmt.where(
-                (Product.title_el.ilike(like)) | (Product.title_en.ilike(like))
-            )
-
-        base_stmt = base_stmt.order_by(Product.created_at.desc())
-
-        # Apply filtering after fetch so pagination respects the filtered list.
-        # Fetch in batches until we have enough matching products to satisfy offset+limit.
-        batch_size = max(safe_limit, 50)
-        matched: List[tuple[Product, Dict[str, Any]]] = []
-        skipped = 0
-        cursor = 0
-
-        while len(matched) < safe_limit:
-            batch_stmt = base_stmt.limit(batch_size).offset(cursor)
-            batch_rows = db.execute(batch_stmt).scalars().all()
-            if not batch_rows:
-                break
-
-            for r in batch_rows:
-                attrs: Dict[str, Any] = r.attributes or {}
-
-                brand = None
-                cat_value = None
-                aud_value = None
-                status = None
-                tags: List[str] = []
-
-                raw_categories: List[str] = []
-                is_stock_flag = False
-
-                if isinstance(attrs, dict):
-                    brand = attrs.get("brand_label") or attrs.get("brand")
-                    for key in ("category_label", "category", "category_value"):
-                        val = attrs.get(key)
-                        if isinstance(val, str):
-                            raw_categories.append(val)
-                    cat_value = (
-                        raw_categories[0]
-                        if raw_categories
-                        else None
-                    )
-                    aud_value = attrs.get("audience")
-                    status = attrs.get("catalog_status")
-                    raw_tags = attrs.get("tags") or []
-                    if isinstance(raw_tags, list):
-                        tags = [t for t in raw_tags if isinstance(t, str)]
-                    for stock_key in ("is_stock", "isStock", "stock_category"):
-                        val = attrs.get(stock_key)
-                        if val is True or (isinstance(val, str) and _matches_category_alias(val, ["stock", "stok"])):
-                            is_stock_flag = True
-                    if attrs.get("stock") is True:
-                        is_stock_flag = True
-
-                if not cat_value and isinstance(attrs, dict):
-                    if attrs.get("product_type") == "contact_lens":
-                        cat_value = "contact_lenses"
-
-                category_candidates = _gather_category_candidates(
-                    cat_value=cat_value,
-                    raw_categories=raw_categories,
-                    tags=tags or [],
-                    slug=r.slug,
-                    title_el=r.title_el,
-                    title_en=r.title_en,
-                    product_type=attrs.get("product_type") if isinstance(attrs, dict) else None,
-                )
-                if is_stock_flag:
-                    category_candidates.append("stock")
-
-                if category_aliases:
-                    if not any(
-                        _matches_category_alias(val, category_aliases)
-                        for val in category_candidates
-                        if val is not None
-                    ):
-                        continue
-
-                if audience_filters:
-                    audience_candidates = []
-                    if aud_value:
-                        audience_candidates.append(str(aud_value))
-                    raw_audiences = attrs.get("audiences") if isinstance(attrs, dict) else None
-                    if isinstance(raw_audiences, list):
-                        audience_candidates.extend(
-                            str(v) for v in raw_audiences if v is not None
-                        )
-                    if not any(val in audience_filters for val in audience_candidates):
-                        continue
-
-                if skipped < safe_offset:
-                    skipped += 1
-                    continue
-
-                matched.append(
-                    (
-                        r,
-                        {
-                            "brand": brand,
-                            "category": cat_value,
-                            "audience": aud_value,
-                            "status": status,
-                        },
-                    )
-                )
-
-                if len(matched) >= safe_limit:
-                    break
-
-            cursor += len(batch_rows)
-            if len(batch_rows) < batch_size:
-                break
-
-        items: List[ProductListItem] = []
-        for r, meta in matched:
-            attrs = r.attributes or {}
-            # Heuristic: treat as stock if any category/tag/slug/title matches stock keywords
-            stock_aliases = ["stock", "stok", "στοκ", "στοκσ"]
-            is_stock = any(
-                _matches_category_alias(val, stock_aliases)
-                for val in _gather_category_candidates(
-                    cat_value=meta.get("category"),
-                    raw_categories=[],
-                    tags=attrs.get("tags", []) if isinstance(attrs.get("tags"), list) else [],
-                    slug=r.slug,
-                    title_el=r.title_el,
-                    title_en=r.title_en,
-                    product_type=attrs.get("product_type") if isinstance(attrs, dict) else None,
-                )
-            )
-            items.append(
-                ProductListItem(
-                    sku=r.sku,
-                    slug=r.slug,
-                    title={"el": r.title_el, "en": r.title_en},
-                    price=float(r.price or 0),
-                    discountPrice=float(r.compare_at_price)
-                    if r.compare_at_price is not None
-                    else None,
-                    stock=int(r.stock or 0),
-                    brand=meta.get("brand"),
-                    category=meta.get("category"),
-                    audience=meta.get("audience"),
-                    images=r.images or [],
-                    status=meta.get("status") or r.status,
-                    attributes=attrs if isinstance(attrs, dict) else {},
-                    isStock=is_stock or None,
-                )
-            )
 
-        return items
+        # Lists are validated against the catalog-wide stamp, so a repeat
+        # visit gets its 304 before any page query runs.
+        last_modified, product_count = catalog_stamp(db)
+        etag = make_etag("shop-products", last_modified, product_count, cache_key, sorted(selected or ()))
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        items, next_cursor = _listing_cache.get_or_load(
+            cache_key,
+            lambda: _load_listing_page(
+                db,
+                search=search,
+                category_aliases=category_aliases,
+                audience_filters=audience_filters,
+                limit=safe_limit,
+                offset=safe_offset,
+                after=after,
+            ),
+        )
+        if selected is not None:
+            items = [{k: v for k, v in item.items() if k in selected} for item in items]
+        # Items are already plain JSON-ready dicts; response_model only documents the shape.
+        response = catalog_json_response(items)
+        set_next_cursor(response, next_cursor)
+        set_cache_headers(response, etag, last_modified)
+        return response
 
     except Exception as e:
         print("ERROR /api/products:", repr(e))
         raise HTTPException(status_code=500, detail="Internal error")
 
-@router.get("/{slug}", response_model=ProductDetail)
-def get_product(slug: str, db: Session = Depends(get_db)):
+
+def _json_text(*keys: str):
+    return func.coalesce(*[func.nullif(Product.attributes[k].astext, "") for k in keys])
+
+
+def _fold_buckets(rows: List[tuple[Optional[str], int]]) -> List[FacetBucket]:
+    """
+    Merge raw labels that normalize to the same value (case, accents,
+    punctuation), labelling each bucket with its most common spelling.
+    """
+    counts: Dict[str, int] = {}
+    labels: Dict[str, tuple[int, str]] = {}
+    for raw, count in rows:
+        key = normalize_category_string(raw)
+        if not key:
+            continue
+        counts[key] = counts.get(key, 0) + count
+        if count > labels.get(key, (0, ""))[0]:
+            labels[key] = (count, raw)
+    buckets = [FacetBucket(value=k, label=labels[k][1], count=c) for k, c in counts.items()]
+    buckets.sort(key=lambda b: (-b.count, b.value))
+    return buckets
+
+
+def _compute_facets(
+    db: Session,
+    *,
+    q: Optional[str],
+    category_aliases: List[str],
+    audience_filters: List[str],
+) -> ProductFacets:
+    category_expr = func.coalesce(
+        _json_text("category_label", "category", "category_value"),
+        case((Product.attributes["product_type"].astext == "contact_lens", "contact_lenses")),
+    )
+    filtered = _apply_storefront_filters(
+        select(
+            category_expr.label("category"),
+            _json_text("brand_label", "brand").label("brand"),
+            _json_text("audience").label("audience"),
+            Product.is_stock.label("is_stock"),
+        ),
+        search=build_search_clause(q) if q else None,
+        category_aliases=category_aliases,
+        audience_filters=audience_filters,
+    ).subquery()
+
+    # One pass over the filtered rows; GROUPING() tells which set a row belongs to.
+    cols = (filtered.c.category, filtered.c.brand, filtered.c.audience, filtered.c.is_stock)
+    stmt = select(
+        func.grouping(*cols).label("grouping_id"),
+        *cols,
+        func.count().label("n"),
+    ).group_by(func.grouping_sets(*cols, tuple_()))
+
+    grouped: Dict[str, List[tuple[Optional[str], int]]] = {"category": [], "brand": [], "audience": []}
+    total = 0
+    stock = 0
+    # GROUPING() sets a bit for every column *not* grouped in that row (leftmost = highest bit).
+    set_for_bits = {0b0111: "category", 0b1011: "brand", 0b1101: "audience", 0b1110: "is_stock"}
+    for row in db.execute(stmt):
+        set_name = set_for_bits.get(row.grouping_id)
+        if row.grouping_id == 0b1111:
+            total = row.n
+        elif set_name == "is_stock":
+            if row.is_stock:
+                stock = row.n
+        elif set_name:
+            grouped[set_name].append((getattr(row, set_name), row.n))
+
+    return ProductFacets(
+        total=total,
+        stock=stock,
+        categories=_fold_buckets(grouped["category"]),
+        audiences=_fold_buckets(grouped["audience"]),
+        brands=_fold_buckets(grouped["brand"]),
+    )
+
+
+@router.get("/facets", response_model=ProductFacets)
+def get_product_facets(
+    q: Optional[str] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    audience: Optional[List[str]] = Query(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Counts per category, audience, brand and stock flag for the current
+    q/category/audience selection, computed in one aggregate query.
+    """
+    category_aliases = [c for c in (category or []) if c]
+    audience_filters = [a for a in (audience or []) if a]
+    return _facets_cache.get_or_load(
+        _filters_cache_key(q, category_aliases, audience_filters),
+        lambda: _compute_facets(
+            db,
+            q=q,
+            category_aliases=category_aliases,
+            audience_filters=audience_filters,
+        ),
+    )
+
+
+def _split_batch_param(values: Optional[List[str]]) -> List[str]:
+    # Accept both ?slugs=a&slugs=b and ?slugs=a,b
+    return list(dict.fromkeys(v.strip() for raw in (values or []) for v in raw.split(",") if v.strip()))
+
+
+@router.get("/batch", response_model=Dict[str, ProductListItem])
+def get_products_batch(
+    slugs: Optional[List[str]] = Query(None, description="Product slugs (repeated or comma-separated)"),
+    skus: Optional[List[str]] = Query(None, description="Product SKUs (repeated or comma-separated)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Resolve many products at once (cart, wishlist, recently viewed) as list
+    cards keyed by slug. Unknown or hidden products are simply absent.
+    """
+    keys = [("slug", v) for v in _split_batch_param(slugs)] + [("sku", v) for v in _split_batch_param(skus)]
+    if len(keys) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} slugs/skus per request")
+
+    # Cards are cached per slug/sku under the catalog version (misses included),
+    # so only the keys not seen since the last write go to the database.
+    missing = object()
+    found: Dict[tuple, Optional[Dict[str, Any]]] = {}
+    pending: List[tuple] = []
+    for key in keys:
+        card = _card_cache.get(key, missing)
+        if card is missing:
+            pending.append(key)
+        else:
+            found[key] = card
+
+    if pending:
+        version = catalog_version()
+        pending_slugs = [v for kind, v in pending if kind == "slug"]
+        pending_skus = [v for kind, v in pending if kind == "sku"]
+        stmt = _apply_storefront_filters(
+            select(Product, card_attributes()).options(load_only(*CARD_COLUMNS)),
+            search=None,
+            category_aliases=[],
+            audience_filters=[],
+        ).where(or_(Product.slug.in_(pending_slugs), Product.sku.in_(pending_skus)))
+        loaded: Dict[tuple, Dict[str, Any]] = {}
+        for row in db.execute(stmt):
+            card = _list_item_dict(row.Product, row.card_attributes)
+            loaded[("slug", row.Product.slug)] = card
+            loaded[("sku", row.Product.sku)] = card
+        for key in pending:
+            found[key] = loaded.get(key)
+            _card_cache.set(key, found[key], version)
+
+    result: Dict[str, Dict[str, Any]] = {}
+    for key in keys:
+        card = found.get(key)
+        if card is not None and card["slug"]:
+            result[card["slug"]] = card
+    return catalog_json_response(result)
+
+
+def _is_live(r: Product) -> bool:
+    return bool(r.visible) and r.status in ALLOWED_STATUSES
+
+
+@router.get("/changes", response_model=CatalogChanges)
+def get_catalog_changes(
+    since: Optional[str] = Query(None, description="Watermark from a previous response; omit for a full sync"),
+    limit: int = 500,
+    db: Session = Depends(get_db),
+):
+    """
+    Products changed since ``since``, oldest first, for consumers that keep a
+    local copy of the catalog. Visible products come back as list cards in
+    ``upserted``. Products that were hidden, archived or hard-deleted come back in
+    ``removed``. Call again with the returned ``watermark`` while ``hasMore``.
+
+    Rows are read by keyset on (change_xid, id) for products and tombstones,
+    so a sync costs O(changes) rather than O(catalog). Only rows stamped below
+    the commit-ordered horizon (app/services/change_tracking.py) are returned:
+    their transactions have finished, so nothing can still appear behind the
+    returned watermark, however long a writer's transaction ran.
+    """
+    safe_limit = max(1, min(limit, MAX_CHANGES_PAGE))
+    product_pos, tombstone_pos = decode_watermark(since, 2) if since else (_CHANGES_EPOCH, _CHANGES_EPOCH)
+    horizon = change_horizon(db)
+
+    products = db.execute(
+        select(Product, card_attributes())
+        .options(load_only(*CARD_COLUMNS, Product.visible, Product.updated_at, Product.change_xid))
+        .where(
+            Product.change_xid < horizon,
+            tuple_(Product.change_xid, Product.id) > product_pos,
+        )
+        .order_by(Product.change_xid, Product.id)
+        .limit(safe_limit)
+    ).all()
+    tombstones = db.execute(
+        select(ProductTombstone)
+        .where(
+            ProductTombstone.change_xid < horizon,
+            tuple_(ProductTombstone.change_xid, ProductTombstone.id) > tombstone_pos,
+        )
+        .order_by(ProductTombstone.change_xid, ProductTombstone.id)
+        .limit(safe_limit)
+    ).scalars().all()
+
+    # Merge both streams in commit order and keep one page; whatever is cut
+    # off stays after the advanced positions for the next call.
+    events = sorted(
+        [(r.Product.change_xid, 0, r.Product.id, r) for r in products]
+        + [(t.change_xid, 1, t.id, t) for t in tombstones],
+        key=lambda e: e[:3],
+    )
+    page = events[:safe_limit]
+    has_more = len(events) > safe_limit or len(products) == safe_limit or len(tombstones) == safe_limit
+
+    upserted: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    for xid, kind, row_id, row in page:
+        if kind == 1:
+            tombstone_pos = (xid, row_id)
+            removed.append({"id": row.product_id, "sku": row.sku, "slug": row.slug, "removedAt": row.deleted_at.isoformat()})
+            continue
+        product_pos = (xid, row_id)
+        r = row.Product
+        changed_at = r.updated_at.isoformat()
+        if _is_live(r):
+            card = _list_item_dict(r, row.card_attributes)
+            upserted.append({"id": r.id, "slug": r.slug, "updatedAt": changed_at, "product": card})
+        else:
+            removed.append({"id": r.id, "sku": r.sku, "slug": r.slug, "removedAt": changed_at})
+    return catalog_json_response(
+        {
+            "upserted": upserted,
+            "removed": removed,
+            "watermark": encode_watermark([product_pos, tombstone_pos]),
+            "hasMore": has_more,
+        }
+    )
+
+
+def _load_product_detail(db: Session, slug: str) -> Optional[tuple[ProductDetail, str, Optional[datetime]]]:
     r = db.execute(
         select(Product).where(Product.slug == slug, Product.visible == True)
     ).scalar_one_or_none()
     if not r:
-        raise HTTPException(status_code=404, detail="Not found")
+        return None
 
     attrs: Dict[str, Any] = r.attributes or {}
     brand = None
@@ -354,7 +598,7 @@ def get_product(slug: str, db: Session = Depends(get_db)):
         variants.append(Variant(**payload))
     status = status or r.status
 
-    return ProductDetail(
+    detail = ProductDetail(
         sku=r.sku,
         slug=r.slug,
         title={"el": r.title_el, "en": r.title_en},
@@ -374,3 +618,171 @@ def get_product(slug: str, db: Session = Depends(get_db)):
         reorderLevel=reorder_level,
         status=status,
     )
+    etag = make_etag("shop-product", r.id, r.version, r.updated_at.isoformat() if r.updated_at else None)
+    return detail, etag, r.updated_at
+
+
+def _refresh_product_detail(slug: str) -> Optional[tuple[ProductDetail, str, Optional[datetime]]]:
+    # Background stale-while-revalidate reload: the request's session is gone by then.
+    db = SessionLocal()
+    try:
+        return _load_product_detail(db, slug)
+    finally:
+        db.close()
+
+
+@router.get("/{slug}", response_model=ProductDetail)
+def get_product(slug: str, request: Request, response: Response, db: Session = Depends(get_db)):
+    # Entries are stamped with the catalog version, so this is effectively a
+    # (slug, version) cache: any admin write to products invalidates it.
+    # Concurrent misses for a slug share one load; an expired entry is served
+    # stale while it refreshes in the background. Misses are cached too.
+    cached = _detail_cache.get_or_load(
+        slug,
+        lambda: _load_product_detail(db, slug),
+        refresh=lambda: _refresh_product_detail(slug),
+    )
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    product, etag, last_modified = cached
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    set_cache_headers(response, etag, last_modified)
+    return product
+
+
+def _variant_number(value: Optional[str], cast):
+    """A variant's stock/price from its JSONB text; None when missing or not a finite number."""
+    if value in (None, ""):
+        return None
+    try:
+        parsed = float(value)
+    except ValueError:
+        return None
+    # "nan"/"inf"/"1e400" parse as floats but are not valid JSON numbers.
+    return cast(parsed) if math.isfinite(parsed) else None
+
+
+def _load_availability(db: Session, slug: str) -> Optional[tuple[List[Dict[str, Any]], str, Optional[datetime]]]:
+    # Unnest attributes->'variants' in SQL and keep only the polled fields, so
+    # neither the description nor the rest of the JSONB leaves the database.
+    variants_json = Product.attributes["variants"]
+    variants = (
+        func.jsonb_array_elements(
+            case((func.jsonb_typeof(variants_json) == "array", variants_json), else_=literal([], JSONB))
+        )
+        .table_valued(column("value", JSONB))
+        .alias("variant")
+    )
+    v = variants.c.value
+    stmt = (
+        select(
+            Product.id,
+            Product.sku,
+            Product.stock,
+            Product.status,
+            Product.price,
+            Product.compare_at_price,
+            Product.version,
+            Product.updated_at,
+            Product.attributes["catalog_status"].astext.label("catalog_status"),
+            v.isnot(None).label("has_variant"),
+            v["sku"].astext.label("v_sku"),
+            v["stock"].astext.label("v_stock"),
+            v["status"].astext.label("v_status"),
+            v["price"].astext.label("v_price"),
+            v["discountPrice"].astext.label("v_discount_price"),
+        )
+        .select_from(Product)
+        .outerjoin(variants, true())
+        .where(Product.slug == slug, Product.visible == True)
+    )
+    rows = db.execute(stmt).all()
+    if not rows:
+        return None
+
+    head = rows[0]
+    if not head.has_variant:
+        # Simple product without variants: report the product itself.
+        items = [
+            {
+                "sku": head.sku,
+                "stock": int(head.stock or 0),
+                "status": head.catalog_status or head.status,
+                "price": float(head.price) if head.price is not None else None,
+                "discountPrice": float(head.compare_at_price) if head.compare_at_price is not None else None,
+            }
+        ]
+    else:
+        items = [
+            {
+                "sku": r.v_sku,
+                "stock": _variant_number(r.v_stock, int),
+                "status": r.v_status,
+                "price": _variant_number(r.v_price, float),
+                "discountPrice": _variant_number(r.v_discount_price, float),
+            }
+            for r in rows
+        ]
+    updated = head.updated_at.isoformat() if head.updated_at else None
+    return items, make_etag("availability", head.id, head.version, updated, items), head.updated_at
+
+
+@router.get("/{slug}/availability", response_model=List[VariantAvailability])
+def get_product_availability(slug: str, request: Request, db: Session = Depends(get_db)):
+    """
+    Per-variant sku/stock/status/price for PDP polling; a fraction of the
+    full product payload.
+    """
+    cached = _availability_cache.get_or_load(slug, lambda: _load_availability(db, slug))
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    items, etag, last_modified = cached
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, AVAILABILITY_CACHE_CONTROL)
+    response = catalog_json_response(items)
+    set_cache_headers(response, etag, last_modified, AVAILABILITY_CACHE_CONTROL)
+    return response
+
+
+def _load_related(db: Session, slug: str, kind: str, limit: int) -> List[Dict[str, Any]]:
+    # One statement: slug -> product_neighbours row -> unnest the id list in
+    # stored order -> live cards. Every step is a primary key or slug lookup.
+    source = aliased(Product)
+    ids = ProductNeighbour.similar_ids if kind == "similar" else ProductNeighbour.brand_ids
+    ranked = (
+        func.unnest(ids)
+        .table_valued(column("id", BigInteger), with_ordinality="position")
+        .render_derived()
+        .lateral("ranked")
+    )
+    stmt = _apply_storefront_filters(
+        select(Product, card_attributes())
+        .options(load_only(*CARD_COLUMNS))
+        .select_from(source)
+        .join(ProductNeighbour, ProductNeighbour.product_id == source.id)
+        .join(ranked, true())
+        .join(Product, Product.id == ranked.c.id)
+        .where(source.slug == slug, source.visible.is_(True)),
+        search=None,
+        category_aliases=[],
+        audience_filters=[],
+    )
+    rows = db.execute(stmt.order_by(ranked.c.position).limit(limit)).all()
+    return [_list_item_dict(r.Product, r.card_attributes) for r in rows]
+
+
+@router.get("/{slug}/related", response_model=List[ProductListItem])
+def get_related_products(
+    slug: str,
+    kind: Literal["similar", "brand"] = Query("similar", description="similar frames, or more from this brand"),
+    limit: int = 12,
+    db: Session = Depends(get_db),
+):
+    """
+    Precomputed related products for the PDP (scripts/build_related_products.py).
+    Unknown slugs and products without a list yet return an empty list.
+    """
+    safe_limit = max(1, min(limit, MAX_RELATED))
+    items = _related_cache.get_or_load((slug, kind, safe_limit), lambda: _load_related(db, slug, kind, safe_limit))
+    return catalog_json_response(items)
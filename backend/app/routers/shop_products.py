@@ -1,12 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+import csv
+import io
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Optional, List, Dict, Any, AsyncIterator, Literal, Set, Tuple
 from decimal import Decimal
-from sqlalchemy.orm import Session
-from sqlalchemy import select
-
-from app.db import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from sqlalchemy import BigInteger, Integer, cast, column, or_, select, tuple_, update, values as values_clause
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+
+from app.db import AsyncSessionLocal
+from app.deps.admin_auth import get_current_admin_user
 from app.models.product import Product as ProductModel
+from app.models.user import User
+from app.services.catalog_cache import get_catalog_cache, mark_catalog_dirty
+from app.services.catalog_tokens import compute_catalog_tokens, compute_search_text
+from app.services.catalog_projection import CARD_COLUMNS, card_attributes, parse_fields
+from app.services.fast_json import catalog_json_response, dump_json
+from app.services.http_cache import is_not_modified, make_etag, not_modified_response, set_cache_headers
+from app.services.image_refs import product_image_paths, replace_image_refs
+from app.services.optimistic_lock import VERSION_CONFLICT_DETAIL, check_expected_version
+from app.services.pagination import decode_cursor, encode_cursor, set_next_cursor
 
 router = APIRouter(
     prefix="/products",
@@ -49,19 +65,38 @@ class Product(BaseModel):
     reorderLevel: Optional[int] = None   # optional overall reorder point
     variants: List[Variant] = Field(default_factory=list)
     status: Optional[str] = None
+    # Current version on reads; on writes, the version the client edited (409 if it moved on).
+    version: Optional[int] = None
 
-def get_db():
-    db = SessionLocal()
-    try:
+# List responses are cards: no description, no variants, no version.
+LIST_FIELDS = frozenset(Product.model_fields) - {"description", "variants", "version"}
+
+MAX_BULK_ITEMS = 1000
+BULK_BATCH_SIZE = 200
+
+# Streaming export (?format=ndjson|csv)
+EXPORT_BATCH_SIZE = 500
+CSV_COLUMNS = [
+    "slug", "sku", "ean", "title_el", "title_en", "brand", "category", "audience",
+    "price", "discountPrice", "stock", "status", "images",
+]
+
+_list_cache = get_catalog_cache("products.list")
+_detail_cache = get_catalog_cache("products.detail")
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 def _variant_dump(variants: List[Variant]) -> List[Dict[str, Any]]:
     return [v.model_dump() for v in variants]
 
 
+_SCHEMA_LIFTED_ATTRIBUTES = {"variants", "brand_label", "category_label", "audience", "reorderLevel", "catalog_status"}
+
+
 def _to_product_schema(row: ProductModel) -> Product:
     attrs = row.attributes or {}
     variants = attrs.get("variants", []) if isinstance(attrs, dict) else []
@@ -77,14 +112,141 @@ def _to_product_schema(row: ProductModel) -> Product:
         title=Title(el=row.title_el, en=row.title_en),
         description=row.description,
         images=row.images or [],
-        attributes={k: v for k, v in attrs.items() if k not in {"variants", "brand_label", "category_label", "audience", "reorderLevel", "catalog_status"}},
+        attributes={k: v for k, v in attrs.items() if k not in _SCHEMA_LIFTED_ATTRIBUTES},
         stock=row.stock,
         reorderLevel=attrs.get("reorderLevel"),
         variants=[Variant(**v) for v in variants if isinstance(v, dict)],
         status=attrs.get("catalog_status", row.status),
+        version=row.version,
     )
 
 
+def _product_card_dict(row: ProductModel, attrs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    List variant of _to_product_schema, built from the card projection as a
+    plain dict (the LIST_FIELDS of Product.model_dump(), in the same order).
+    """
+    attrs = attrs if isinstance(attrs, dict) else {}
+    return {
+        "slug": row.slug,
+        "brand": attrs.get("brand_label"),
+        "category": attrs.get("category_label"),
+        "audience": attrs.get("audience"),
+        "price": float(row.price) if row.price is not None else None,
+        "discountPrice": float(row.compare_at_price) if row.compare_at_price is not None else None,
+        "sku": row.sku,
+        "ean": row.ean,
+        "title": {"el": row.title_el, "en": row.title_en},
+        "images": row.images or [],
+        "attributes": {k: v for k, v in attrs.items() if k not in _SCHEMA_LIFTED_ATTRIBUTES},
+        "stock": row.stock,
+        "reorderLevel": None,
+        "status": attrs.get("catalog_status", row.status),
+    }
+
+
+def _csv_row(product: Product) -> List[Any]:
+    return [
+        product.slug,
+        product.sku,
+        product.ean,
+        product.title.el,
+        product.title.en,
+        product.brand,
+        product.category,
+        product.audience,
+        product.price,
+        product.discountPrice,
+        product.stock,
+        product.status,
+        "|".join(product.images),
+    ]
+
+
+async def _export_products() -> AsyncIterator[Product]:
+    # Own session: the request-scoped one may be closed before the body is streamed.
+    stmt = (
+        select(ProductModel)
+        .where(
+            ProductModel.visible.is_(True),
+            ProductModel.status != "archived",
+        )
+        .order_by(ProductModel.created_at.desc(), ProductModel.id.desc())
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async with AsyncSessionLocal() as db:
+        # Server-side cursor; rows arrive EXPORT_BATCH_SIZE at a time.
+        result = await db.stream_scalars(stmt)
+        async for row in result:
+            yield _to_product_schema(row)
+
+
+async def _export_ndjson() -> AsyncIterator[bytes]:
+    chunk: List[bytes] = []
+    async for product in _export_products():
+        chunk.append(dump_json(product.model_dump(mode="json")) + b"\n")
+        if len(chunk) >= EXPORT_BATCH_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+async def _export_csv() -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    rows = 0
+    async for product in _export_products():
+        writer.writerow(_csv_row(product))
+        rows += 1
+        if rows % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+_RESERVED_ATTRIBUTES = {
+    "variants",
+    "brand_label",
+    "category_label",
+    "category",
+    "audience",
+    "reorderLevel",
+    "catalog_status",
+}
+
+
+def _apply_controlled_attributes(attrs: Dict[str, Any], prod: Product) -> Dict[str, Any]:
+    """Write the schema-level fields (brand, category, variants...) into attributes."""
+    attrs["variants"] = _variant_dump(prod.variants)
+    if prod.brand:
+        attrs["brand_label"] = prod.brand
+    if prod.category:
+        attrs["category_label"] = prod.category
+        attrs["category"] = prod.category
+    if prod.audience:
+        attrs["audience"] = prod.audience
+    if prod.reorderLevel is not None:
+        attrs["reorderLevel"] = prod.reorderLevel
+    if prod.status:
+        attrs["catalog_status"] = prod.status
+    return attrs
+
+
+def _product_stock(prod: Product, fallback: int) -> int:
+    stock = prod.stock
+    if stock is None and prod.variants:
+        stock = sum(filter(None, (v.stock for v in prod.variants)))
+    return fallback if stock is None else stock
+
+
+def _db_status(prod: Product) -> str:
+    catalog_status = (prod.status or "").lower()
+    return "published" if catalog_status not in {"draft", "published"} else catalog_status
+
+
 def _ensure_price(value: Optional[float]) -> Decimal:
     try:
         return Decimal(str(value)) if value is not None else Decimal("0")
@@ -103,61 +265,86 @@ def _ensure_sku(prod: Product) -> str:
 async def list_products(
     limit: int | None = Query(default=None, ge=1, le=500),
     offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(default=None, description="Opaque keyset cursor from the X-Next-Cursor header"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated subset of product card fields"),
+    format: Optional[Literal["ndjson", "csv"]] = Query(default=None, description="Stream a full export instead of a page"),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Return all products as a simple list backed by Postgres.
+    Pass ``cursor`` (from the ``X-Next-Cursor`` header) instead of ``offset``
+    to page with a keyset seek. Items are product cards (no ``description``
+    or ``variants``); ``fields`` trims them further.
+
+    ``format=ndjson|csv`` streams every product (full records, paging
+    parameters ignored) from a server-side cursor with constant memory.
     """
+    if format == "ndjson":
+        return StreamingResponse(
+            _export_ndjson(),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="products.ndjson"'},
+        )
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="products.csv"'},
+        )
+
+    selected = parse_fields(fields, LIST_FIELDS)
     stmt = (
-        select(ProductModel)
+        select(ProductModel, card_attributes())
+        .options(load_only(*CARD_COLUMNS))
         .where(
             ProductModel.visible.is_(True),
             ProductModel.status != "archived",
         )
-        .order_by(ProductModel.created_at.desc())
+        .order_by(ProductModel.created_at.desc(), ProductModel.id.desc())
     )
+    after = decode_cursor(cursor) if cursor else None
+    if after:
+        stmt = stmt.where(tuple_(ProductModel.created_at, ProductModel.id) < after)
+    elif limit is not None:
+        stmt = stmt.offset(offset)
     if limit is not None:
-        stmt = stmt.limit(limit).offset(offset)
-    rows = db.execute(stmt).scalars().all()
-    return [_to_product_schema(r) for r in rows]
+        stmt = stmt.limit(limit)
+
+    async def load():
+        rows = (await db.execute(stmt)).all()
+        next_cursor = None
+        if limit is not None and len(rows) == limit and rows[-1].Product.created_at is not None:
+            next_cursor = encode_cursor(rows[-1].Product.created_at, rows[-1].Product.id)
+        return [_product_card_dict(r.Product, r.card_attributes) for r in rows], next_cursor
+
+    cache_key = (limit, after or (offset if limit is not None else 0))
+    items, next_cursor = await _list_cache.aget_or_load(cache_key, load)
+    if selected is not None:
+        items = [{k: v for k, v in item.items() if k in selected} for item in items]
+    response = catalog_json_response(items)
+    set_next_cursor(response, next_cursor)
+    return response
 
 
 @router.post("", status_code=201)
-async def create_product(prod: Product, db: Session = Depends(get_db)):
+async def create_product(prod: Product, db: AsyncSession = Depends(get_db)):
     """
     Create a product for testing against the real DB so that PLP/PDP can see it.
     """
-    existing = db.execute(select(ProductModel).where(ProductModel.slug == prod.slug)).scalar_one_or_none()
+    existing = (await db.execute(select(ProductModel).where(ProductModel.slug == prod.slug))).scalar_one_or_none()
     if existing:
         raise HTTPException(status_code=400, detail="Slug already exists")
 
-    attrs = dict(prod.attributes or {})
-    attrs["variants"] = _variant_dump(prod.variants)
-    if prod.brand:
-        attrs["brand_label"] = prod.brand
-    if prod.category:
-        attrs["category_label"] = prod.category
-        attrs["category"] = prod.category  
-    if prod.audience:
-        attrs["audience"] = prod.audience
-    if prod.reorderLevel is not None:
-        attrs["reorderLevel"] = prod.reorderLevel
-    if prod.status:
-        attrs["catalog_status"] = prod.status
+    attrs = _apply_controlled_attributes(dict(prod.attributes or {}), prod)
 
     price = _ensure_price(prod.price if prod.price is not None else prod.discountPrice)
     compare_at = _ensure_price(prod.discountPrice) if prod.discountPrice is not None else None
-    stock = prod.stock
-    if stock is None and prod.variants:
-        stock = sum(filter(None, (v.stock for v in prod.variants)))
-    if stock is None:
-        stock = 0
+    stock = _product_stock(prod, 0)
 
     title_el = prod.title.el or prod.title.en or prod.slug
     title_en = prod.title.en or prod.title.el or prod.slug
 
-    catalog_status = (prod.status or "").lower()
-    db_status = "published" if catalog_status not in {"draft", "published"} else catalog_status
+    db_status = _db_status(prod)
 
     db_product = ProductModel(
         sku=_ensure_sku(prod),
@@ -176,51 +363,295 @@ async def create_product(prod: Product, db: Session = Depends(get_db)):
     )
 
     db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
+    await db.commit()
+    await db.refresh(db_product)
     return _to_product_schema(db_product)
 
+class BulkItemResult(BaseModel):
+    index: int
+    slug: Optional[str] = None
+    status: Literal["created", "updated", "error"]
+    detail: Optional[Any] = None
+
+
+class BulkResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    errors: int = 0
+    items: List[BulkItemResult] = Field(default_factory=list)
+
+
+def _derived_columns(values: Dict[str, Any]) -> Dict[str, Any]:
+    # Core INSERT/UPDATE bypasses the mapper events that maintain these.
+    derived = compute_catalog_tokens(values["attributes"], values["slug"], values["title_el"], values["title_en"])
+    derived["search_text"] = compute_search_text(
+        values["attributes"], values["sku"], values["title_el"], values["title_en"], values["slug"]
+    )
+    return derived
+
+
+async def _insert_new_products(db: AsyncSession, batch: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Insert a batch; returns sku -> id of the rows written (colliding rows are left out)."""
+    table = ProductModel.__table__
+    # The pre-fetch already filtered known SKUs; ON CONFLICT covers concurrent writers.
+    stmt = insert(table).on_conflict_do_nothing(index_elements=[table.c.sku]).returning(table.c.sku, table.c.id)
+    try:
+        async with db.begin_nested():
+            return dict((await db.execute(stmt.values(batch))).tuples().all())
+    except IntegrityError:
+        pass
+    # Another unique constraint fired (e.g. a slug created concurrently): retry row by row.
+    written: Dict[str, int] = {}
+    for values in batch:
+        try:
+            async with db.begin_nested():
+                written.update((await db.execute(stmt.values([values]))).tuples().all())
+        except IntegrityError:
+            continue
+    return written
+
+
+# Columns the bulk upsert rewrites on an existing product.
+_BULK_UPDATE_COLUMNS = (
+    "sku",
+    "ean",
+    "slug",
+    "title_el",
+    "title_en",
+    "description",
+    "images",
+    "price",
+    "compare_at_price",
+    "attributes",
+    "stock",
+    "status",
+    "category_tokens",
+    "audience_tokens",
+    "is_stock",
+    "search_text",
+)
+
+
+def _bulk_update_stmt(batch: List[Dict[str, Any]]):
+    """
+    One ``UPDATE ... FROM (VALUES ...) RETURNING id`` for the batch, a
+    compare-and-swap on each row's version like the ORM's version_id_col.
+    Rows whose version moved on are not returned.
+    """
+    table = ProductModel.__table__
+    cols = [column(name, table.c[name].type) for name in _BULK_UPDATE_COLUMNS]
+    cols += [column("_id", BigInteger), column("_version", Integer)]
+    incoming = values_clause(*cols, name="incoming").data(
+        [tuple(values[col.name] for col in cols) for values in batch]
+    )
+    # VALUES columns that are NULL in every row come back as text; cast them back.
+    assignments = {name: cast(incoming.c[name], table.c[name].type) for name in _BULK_UPDATE_COLUMNS}
+    assignments["version"] = table.c.version + 1
+    return (
+        update(table)
+        .where(table.c.id == incoming.c._id, table.c.version == incoming.c._version)
+        .values(assignments)
+        .returning(table.c.id)
+    )
+
+
+async def _update_existing_products(db: AsyncSession, batch: List[Dict[str, Any]]) -> Tuple[Set[int], Set[int]]:
+    """
+    Update a batch; returns (ids written, ids whose new SKU/slug collided).
+    The remaining ids lost the version compare-and-swap.
+    """
+    try:
+        async with db.begin_nested():
+            return set((await db.execute(_bulk_update_stmt(batch))).scalars()), set()
+    except IntegrityError:
+        pass
+    # e.g. a SKU taken by a concurrent writer after the pre-fetch: retry row by row.
+    written: Set[int] = set()
+    collided: Set[int] = set()
+    for values in batch:
+        try:
+            async with db.begin_nested():
+                written.update((await db.execute(_bulk_update_stmt([values]))).scalars())
+        except IntegrityError:
+            collided.add(values["_id"])
+    return written, collided
+
+
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_upsert_products(
+    payload: List[Dict[str, Any]],
+    db: AsyncSession = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user),
+):
+    """
+    Create or update many products (matched by slug) in one transaction.
+    Invalid items, and updates that lost a version race with another writer,
+    are reported per index and skipped; the rest are written.
+    """
+    if len(payload) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} products per request")
+
+    results: Dict[int, BulkItemResult] = {}
+    products: Dict[int, Product] = {}
+    seen_slugs: Dict[str, int] = {}
+    seen_skus: Dict[str, int] = {}
+    for index, raw in enumerate(payload):
+        try:
+            prod = Product.model_validate(raw)
+        except ValidationError as exc:
+            slug = raw.get("slug") if isinstance(raw, dict) else None
+            results[index] = BulkItemResult(index=index, slug=slug, status="error", detail=exc.errors(include_url=False))
+            continue
+        sku = _ensure_sku(prod)
+        if prod.slug in seen_slugs or sku in seen_skus:
+            results[index] = BulkItemResult(index=index, slug=prod.slug, status="error", detail="Duplicate slug or SKU in payload")
+            continue
+        seen_slugs[prod.slug] = index
+        seen_skus[sku] = index
+        products[index] = prod
+
+    # One round trip for everything the payload could collide with.
+    existing_rows = (
+        await db.execute(
+            select(
+                ProductModel.id,
+                ProductModel.slug,
+                ProductModel.sku,
+                ProductModel.stock,
+                ProductModel.attributes,
+                ProductModel.version,
+            ).where(
+                or_(ProductModel.slug.in_(list(seen_slugs)), ProductModel.sku.in_(list(seen_skus)))
+            )
+        )
+    ).all()
+    by_slug = {row.slug: row for row in existing_rows}
+    sku_owner = {row.sku: row.id for row in existing_rows}
+
+    inserts: List[Dict[str, Any]] = []
+    insert_index: Dict[str, int] = {}
+    updates: List[Dict[str, Any]] = []
+    update_index: Dict[int, int] = {}
+    for index, prod in products.items():
+        current = by_slug.get(prod.slug)
+        if current is None:
+            sku = _ensure_sku(prod)
+            if sku in sku_owner:
+                results[index] = BulkItemResult(index=index, slug=prod.slug, status="error", detail="SKU already exists")
+                continue
+            values = {
+                "sku": sku,
+                "ean": prod.ean,
+                "slug": prod.slug,
+                "title_el": prod.title.el or prod.title.en or prod.slug,
+                "title_en": prod.title.en or prod.title.el or prod.slug,
+                "description": prod.description,
+                "images": prod.images,
+                "price": _ensure_price(prod.price if prod.price is not None else prod.discountPrice),
+                "compare_at_price": _ensure_price(prod.discountPrice) if prod.discountPrice is not None else None,
+                "attributes": _apply_controlled_attributes(dict(prod.attributes or {}), prod),
+                "stock": _product_stock(prod, 0),
+                "status": _db_status(prod),
+                "visible": True,
+            }
+            values.update(_derived_columns(values))
+            inserts.append(values)
+            insert_index[sku] = index
+        else:
+            sku = prod.sku or current.sku
+            if sku_owner.get(sku, current.id) != current.id:
+                results[index] = BulkItemResult(index=index, slug=prod.slug, status="error", detail="SKU already exists")
+                continue
+            if prod.version not in (None, current.version):
+                results[index] = BulkItemResult(index=index, slug=prod.slug, status="error", detail=VERSION_CONFLICT_DETAIL)
+                continue
+            # Same merge as update_product: keep unknown attribute keys.
+            attrs = {k: v for k, v in (current.attributes or {}).items() if k not in _RESERVED_ATTRIBUTES}
+            attrs.update(prod.attributes or {})
+            values = {
+                "sku": sku,
+                "ean": prod.ean,
+                "slug": prod.slug,
+                "title_el": prod.title.el or prod.title.en or prod.slug,
+                "title_en": prod.title.en or prod.title.el or prod.slug,
+                "description": prod.description,
+                "images": prod.images,
+                "price": _ensure_price(prod.price if prod.price is not None else prod.discountPrice),
+                "compare_at_price": _ensure_price(prod.discountPrice) if prod.discountPrice is not None else None,
+                "attributes": _apply_controlled_attributes(attrs, prod),
+                "stock": _product_stock(prod, current.stock or 0),
+                "status": _db_status(prod),
+            }
+            values.update(_derived_columns(values))
+            values["_id"] = current.id
+            values["_version"] = current.version
+            updates.append(values)
+            update_index[current.id] = index
+
+    table = ProductModel.__table__
+    # Core writes skip the mapper event that maintains product_image_refs.
+    image_refs: Dict[int, Set[str]] = {}
+    for start in range(0, len(inserts), BULK_BATCH_SIZE):
+        batch = inserts[start:start + BULK_BATCH_SIZE]
+        written = await _insert_new_products(db, batch)
+        for values in batch:
+            index = insert_index[values["sku"]]
+            if values["sku"] in written:
+                image_refs[written[values["sku"]]] = product_image_paths(values["images"], values["attributes"])
+                results[index] = BulkItemResult(index=index, slug=values["slug"], status="created")
+            else:
+                results[index] = BulkItemResult(
+                    index=index, slug=values["slug"], status="error", detail="SKU or slug already exists"
+                )
+
+    for start in range(0, len(updates), BULK_BATCH_SIZE):
+        batch = updates[start:start + BULK_BATCH_SIZE]
+        written_ids, collided_ids = await _update_existing_products(db, batch)
+        for values in batch:
+            index = update_index[values["_id"]]
+            if values["_id"] not in written_ids:
+                # Its SKU was taken, or the product changed, since the pre-fetch.
+                detail = "SKU or slug already exists" if values["_id"] in collided_ids else VERSION_CONFLICT_DETAIL
+                results[index] = BulkItemResult(index=index, slug=values["slug"], status="error", detail=detail)
+                continue
+            image_refs[values["_id"]] = product_image_paths(values["images"], values["attributes"])
+            results[index] = BulkItemResult(index=index, slug=values["slug"], status="updated")
+
+    # Every written row has an entry, so this is also "anything written".
+    if image_refs:
+        await db.run_sync(replace_image_refs, image_refs)
+        mark_catalog_dirty(db)
+    await db.commit()
+
+    items = [results[i] for i in sorted(results)]
+    return BulkResult(
+        created=sum(1 for r in items if r.status == "created"),
+        updated=sum(1 for r in items if r.status == "updated"),
+        errors=sum(1 for r in items if r.status == "error"),
+        items=items,
+    )
+
+
 @router.put("/{slug}")
-async def update_product(slug: str, prod: Product, db: Session = Depends(get_db)):
+async def update_product(slug: str, prod: Product, db: AsyncSession = Depends(get_db)):
     """
     Update an existing product by slug.
     """
-    existing = db.execute(
+    existing = (await db.execute(
         select(ProductModel).where(ProductModel.slug == slug)
-    ).scalar_one_or_none()
+    )).scalar_one_or_none()
 
     if not existing:
         raise HTTPException(status_code=404, detail="Not found")
+    check_expected_version(existing.version, prod.version)
 
     # --- rebuild attributes, preserving unknown keys ---
     base_attrs = existing.attributes or {}
-    reserved_keys = {
-        "variants",
-        "brand_label",
-        "category_label",
-        "category",
-        "audience",
-        "reorderLevel",
-        "catalog_status",
-    }
-    clean_base = {k: v for k, v in base_attrs.items() if k not in reserved_keys}
-
-    attrs = dict(clean_base)
+    attrs = {k: v for k, v in base_attrs.items() if k not in _RESERVED_ATTRIBUTES}
     attrs.update(prod.attributes or {})
 
     # controlled fields
-    attrs["variants"] = _variant_dump(prod.variants)
-    if prod.brand:
-        attrs["brand_label"] = prod.brand
-    if prod.category:
-        attrs["category_label"] = prod.category
-        attrs["category"] = prod.category
-    if prod.audience:
-        attrs["audience"] = prod.audience
-    if prod.reorderLevel is not None:
-        attrs["reorderLevel"] = prod.reorderLevel
-    if prod.status:
-        attrs["catalog_status"] = prod.status
+    _apply_controlled_attributes(attrs, prod)
 
     price = _ensure_price(prod.price if prod.price is not None else prod.discountPrice)
     compare_at = (
@@ -245,35 +676,38 @@ async def update_product(slug: str, prod: Product, db: Session = Depends(get_db)
     existing.attributes = attrs
 
     # recompute stock
-    stock = prod.stock
-    if stock is None and prod.variants:
-        stock = sum(filter(None, (v.stock for v in prod.variants)))
-    if stock is None:
-        stock = existing.stock or 0
-    existing.stock = stock
-
-    catalog_status = (prod.status or "").lower()
-    db_status = "published" if catalog_status not in {"draft", "published"} else catalog_status
-    existing.status = db_status
+    existing.stock = _product_stock(prod, existing.stock or 0)
+    existing.status = _db_status(prod)
 
     db.add(existing)
-    db.commit()
-    db.refresh(existing)
+    await db.commit()
+    await db.refresh(existing)
 
     return _to_product_schema(existing)
 
 @router.get("/{slug}")
-async def get_product(slug: str, db: Session = Depends(get_db)):
+async def get_product(slug: str, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Fetch a single product by slug from Postgres.
     """
-    product = db.execute(
-        select(ProductModel).where(
-            ProductModel.slug == slug,
-            ProductModel.visible.is_(True),
-            ProductModel.status != "archived",
-        )
-    ).scalar_one_or_none()
-    if not product:
+    async def load():
+        row = (await db.execute(
+            select(ProductModel).where(
+                ProductModel.slug == slug,
+                ProductModel.visible.is_(True),
+                ProductModel.status != "archived",
+            )
+        )).scalar_one_or_none()
+        if not row:
+            return None
+        etag = make_etag("product", row.id, row.version, row.updated_at.isoformat() if row.updated_at else None)
+        return _to_product_schema(row), etag, row.updated_at
+
+    cached = await _detail_cache.aget_or_load(slug, load)
+    if not cached:
         raise HTTPException(status_code=404, detail="Not found")
-    return _to_product_schema(product)
+    product, etag, last_modified = cached
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+    set_cache_headers(response, etag, last_modified)
+    return product
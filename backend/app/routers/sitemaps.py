@@ -0,0 +1,43 @@
+# app/routers/sitemaps.py
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.services.http_cache import FEED_CACHE_CONTROL, is_not_modified, not_modified_response, set_cache_headers
+from app.services.sitemaps import INDEX_NAME, read_sitemap_meta
+
+# Mounted at the site root (no /api prefix): a sitemap may only list URLs
+# under its own path, so the index has to live at /sitemap.xml.
+router = APIRouter(tags=["sitemaps"])
+
+
+def _sitemap_file(request: Request, name: str, etag: str, lastmod: str | None, media_type: str):
+    last_modified = datetime.fromisoformat(lastmod) if lastmod else None
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified, cache_control=FEED_CACHE_CONTROL)
+    response = FileResponse(Path(settings.sitemap_dir) / name, media_type=media_type)
+    set_cache_headers(response, etag, last_modified, cache_control=FEED_CACHE_CONTROL)
+    return response
+
+
+@router.get("/sitemap.xml")
+def get_sitemap_index(request: Request):
+    """Sitemap index (scripts/build_sitemaps.py), one entry per shard."""
+    meta = read_sitemap_meta(Path(settings.sitemap_dir))
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Sitemaps have not been built yet")
+    return _sitemap_file(request, INDEX_NAME, meta["index_etag"], meta["generated_at"], "application/xml")
+
+
+@router.get("/sitemaps/{name}")
+def get_sitemap_shard(name: str, request: Request):
+    """One gzip-compressed child sitemap listed in /sitemap.xml."""
+    meta = read_sitemap_meta(Path(settings.sitemap_dir))
+    # Only names recorded by the builder are served, which also rules out path tricks.
+    entry = (meta or {}).get("files", {}).get(name)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Sitemap not found")
+    return _sitemap_file(request, name, entry["etag"], entry.get("lastmod"), "application/gzip")
@@ -1,6 +1,6 @@
 from typing import Any, Dict, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class LocaleString(BaseModel):
@@ -29,4 +29,22 @@ class ProductUpsert(BaseModel):
     )
     attributes: Dict[str, Any] = Field(default_factory=dict)
     seo: Optional[Dict[str, Any]] = None
-    version: int = 1
+    # The server bumps version on every write; clients only send it back.
+    version: Optional[int] = Field(
+        default=None,
+        description="Older spelling of expected_version; checked the same way",
+    )
+    expected_version: Optional[int] = Field(
+        default=None,
+        description="Product version the client edited; 409 if it has changed since",
+    )
+
+    @model_validator(mode="after")
+    def merge_version(self) -> "ProductUpsert":
+        # A version the client sent is never silently ignored.
+        if self.version is not None:
+            if self.expected_version is None:
+                self.expected_version = self.version
+            elif self.expected_version != self.version:
+                raise ValueError("version and expected_version disagree")
+        return self
@@ -0,0 +1,131 @@
+# app/services/alias_matcher.py
+"""
+Compiled category-alias matching.
+
+Aliases are normalized once (``normalize_category_string``) and compiled into
+an Aho-Corasick automaton, so checking a value against N aliases is a single
+pass over the normalized value instead of N substring searches, each redoing
+the Unicode normalization of the alias.
+
+Used for the derived product columns (app/services/catalog_tokens.py) and by
+scripts/import_wp_dump.py.
+"""
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Mapping, Set, Tuple, Union
+
+MATCH_MODES = ("contains", "prefix", "suffix", "exact")
+
+# Up to this many aliases, plain ``in`` checks on the pre-normalized keys beat
+# walking the automaton in Python.
+_SMALL_SET = 8
+
+
+def normalize_category_string(value: Any) -> str:
+    """
+    Mirror the frontend normalization:
+    - lowercase
+    - strip diacritics
+    - keep only letters/numbers
+    """
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFD", str(value)).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+class AliasMatcher:
+    """
+    Multi-pattern matcher over normalized aliases.
+
+    ``aliases`` is either an iterable of alias strings (each is its own label)
+    or a mapping alias -> label, so several spellings can report one label.
+    """
+
+    def __init__(self, aliases: Union[Iterable[str], Mapping[str, Hashable]]):
+        items = aliases.items() if isinstance(aliases, Mapping) else ((a, a) for a in aliases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Per state: (alias length, label) for every alias ending there.
+        self._out: List[List[Tuple[int, Hashable]]] = [[]]
+        self._keys: List[Tuple[str, Hashable]] = []
+        for alias, label in items:
+            key = normalize_category_string(alias)
+            if key:
+                self._keys.append((key, label))
+                self._insert(key, label)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _insert(self, key: str, label: Hashable) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(key), label))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt].extend(self._out[self._fail[nxt]])
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int, Hashable]]:
+        """Yield (start, end, label) for every alias occurrence in ``text``."""
+        if len(self._keys) <= _SMALL_SET:
+            for key, label in self._keys:
+                start = text.find(key)
+                while start != -1:
+                    yield start, start + len(key), label
+                    start = text.find(key, start + 1)
+            return
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, ch in enumerate(text, start=1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, label in out[state]:
+                yield end - length, end, label
+
+    @staticmethod
+    def _accepts(mode: str, start: int, end: int, size: int) -> bool:
+        if mode == "contains":
+            return True
+        if mode == "prefix":
+            return start == 0
+        if mode == "suffix":
+            return end == size
+        return start == 0 and end == size
+
+    def labels(self, value: Any, mode: str = "contains") -> Set[Hashable]:
+        """Labels of every alias found in ``value`` under ``mode``."""
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {mode}")
+        text = normalize_category_string(value)
+        return {label for start, end, label in self._scan(text) if self._accepts(mode, start, end, len(text))}
+
+    def matches(self, value: Any, mode: str = "contains") -> bool:
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown match mode: {mode}")
+        text = normalize_category_string(value)
+        if not text:
+            return False
+        return any(self._accepts(mode, start, end, len(text)) for start, end, _ in self._scan(text))
+
+    def matches_any(self, values: Iterable[Any], mode: str = "contains") -> bool:
+        return any(self.matches(v, mode) for v in values)
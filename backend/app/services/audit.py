@@ -1,7 +1,9 @@
 # app/services/audit.py
-from typing import Any, Mapping
+from datetime import datetime, timezone
+from typing import Any, Iterable, Mapping
 
 from fastapi import Request
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.admin_audit_log import AdminAuditLog
@@ -16,6 +18,7 @@ def log_admin_action(
     resource_id: str | None = None,
     metadata: Mapping[str, Any] | None = None,
     request: Request | None = None,
+    commit: bool = True,
 ) -> None:
     ip = request.client.host if request and request.client else None
     user_agent = request.headers.get("user-agent") if request else None
@@ -30,4 +33,41 @@ def log_admin_action(
         user_agent=user_agent,
     )
     db.add(log)
-    db.commit()
+    if commit:
+        db.commit()
+
+
+def log_admin_actions(
+    db: Session,
+    admin: User | None,
+    entries: Iterable[Mapping[str, Any]],
+    request: Request | None = None,
+    commit: bool = True,
+) -> int:
+    """
+    Write many audit rows with a single multi-row INSERT. Each entry has
+    ``action``, ``resource_type`` and optionally ``resource_id``/``metadata``.
+    With ``commit=False`` the rows join the caller's transaction.
+    """
+    ip = request.client.host if request and request.client else None
+    user_agent = request.headers.get("user-agent") if request else None
+    now = datetime.now(timezone.utc)
+
+    rows = [
+        {
+            "admin_id": admin.id if admin else None,
+            "action": entry["action"],
+            "resource_type": entry["resource_type"],
+            "resource_id": str(entry["resource_id"]) if entry.get("resource_id") is not None else None,
+            "metadata": dict(entry["metadata"]) if entry.get("metadata") else None,
+            "ip": ip,
+            "user_agent": user_agent,
+            "created_at": now,
+        }
+        for entry in entries
+    ]
+    if rows:
+        db.execute(insert(AdminAuditLog.__table__).values(rows))
+    if commit:
+        db.commit()
+    return len(rows)
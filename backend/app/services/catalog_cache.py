@@ -0,0 +1,311 @@
+# app/services/catalog_cache.py
+"""
+In-process read cache for the storefront catalog.
+
+Every committed transaction that inserted, updated or deleted a Product bumps a
+process-wide catalog version. Cache entries remember the version they were
+loaded under, so an admin write invalidates everything cached before it without
+having to know which entries it affected. Entries also expire after a TTL and
+each cache is a bounded LRU.
+
+Concurrent misses for one key are coalesced: one caller runs the loader, the
+others wait for its result (a threading.Event for sync callers, an
+asyncio.Future for ``aget_or_load``). Callers that pass a ``refresh`` loader also get
+stale-while-revalidate: for ``stale_seconds`` after the TTL (same version
+only) the old value is served while a background thread reloads it.
+
+NOTE:
+- The version is per-process, like the rate limiter buckets. Other workers
+  only see a write once their cached entries expire (TTL).
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import chain
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.product import Product
+
+_version_lock = threading.Lock()
+_catalog_version = 0
+
+_DIRTY_KEY = "catalog_dirty"
+
+_FRESH, _STALE, _MISS = "fresh", "stale", "miss"
+# Result of an async flight whose leader raised or was cancelled.
+_FAILED = object()
+
+# Background stale-while-revalidate reloads; few workers, refreshes are rare.
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="catalog-cache-refresh")
+
+
+def catalog_version() -> int:
+    return _catalog_version
+
+
+def bump_catalog_version() -> int:
+    global _catalog_version
+    with _version_lock:
+        _catalog_version += 1
+        return _catalog_version
+
+
+def mark_catalog_dirty(db: Session) -> None:
+    """
+    Flag a session whose pending transaction changes products outside the ORM
+    unit of work (e.g. Core UPDATE statements), so its commit bumps the version.
+    """
+    db.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_product_writes(session, flush_context):
+    if any(isinstance(obj, Product) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop(_DIRTY_KEY, False):
+        bump_catalog_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_on_rollback(session):
+    session.info.pop(_DIRTY_KEY, None)
+
+
+class _Flight:
+    """One in-progress load that concurrent callers for the same key wait on."""
+
+    def __init__(self, version: int):
+        # Catalog version the load started under; later callers only join a
+        # flight that cannot predate a write they might have seen.
+        self.version = version
+        self.done = threading.Event()
+        self.value: Any = None
+        self.failed = False
+
+
+class _AsyncFlight:
+    """_Flight for coroutine callers: waiters await a Future on the leader's loop."""
+
+    def __init__(self, version: int):
+        self.version = version
+        self.future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+
+
+class CatalogCache:
+    """Bounded LRU with TTL whose entries are only valid for one catalog version."""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, stale_seconds: float = 0.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self._lock = threading.Lock()
+        # key -> (version, expires_at, value)
+        self._entries: "OrderedDict[Hashable, tuple[int, float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._ainflight: Dict[Hashable, _AsyncFlight] = {}
+
+    def _lookup(self, key: Hashable, now: float) -> Tuple[str, Any]:
+        # Caller holds self._lock.
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISS, None
+        version, expires_at, value = entry
+        if version == _catalog_version:
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return _FRESH, value
+            if now < expires_at + self.stale_seconds:
+                return _STALE, value
+        del self._entries[key]
+        return _MISS, None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            state, value = self._lookup(key, time.monotonic())
+            if state == _FRESH:
+                self.hits += 1
+                return value
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, version: int) -> None:
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current[0] > version:
+                # A slower load from an older version must not replace a newer entry.
+                return
+            self._entries[key] = (version, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        refresh: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Return the cached value or load it, coalescing concurrent misses.
+
+        ``refresh`` enables stale-while-revalidate. It runs on a background
+        thread, so it must not use the request's DB session.
+        """
+        with self._lock:
+            state, value = self._lookup(key, time.monotonic())
+            if state == _FRESH:
+                self.hits += 1
+                return value
+            if state == _STALE and refresh is not None:
+                self.stale_served += 1
+                if key not in self._inflight:
+                    flight = self._inflight[key] = _Flight(_catalog_version)
+                    _refresh_executor.submit(self._lead, key, refresh, flight, True)
+                return value
+            self.misses += 1
+            flight = self._inflight.get(key)
+            leader = flight is None or flight.version != _catalog_version
+            if leader:
+                flight = self._inflight[key] = _Flight(_catalog_version)
+
+        if leader:
+            return self._lead(key, loader, flight)
+
+        flight.done.wait()
+        if flight.failed:
+            # The leader's load raised; try on our own rather than share its error.
+            return loader()
+        with self._lock:
+            self.coalesced += 1
+        return flight.value
+
+    async def aget_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_load for routes on the async session, coalescing concurrent misses."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state, value = self._lookup(key, time.monotonic())
+            if state == _FRESH:
+                self.hits += 1
+                return value
+            self.misses += 1
+            flight = self._ainflight.get(key)
+            leader = flight is None or flight.version != _catalog_version or flight.future.get_loop() is not loop
+            if leader:
+                flight = self._ainflight[key] = _AsyncFlight(_catalog_version)
+
+        if leader:
+            return await self._alead(key, loader, flight)
+
+        # shield: a waiter being cancelled must not cancel the shared load.
+        value = await asyncio.shield(flight.future)
+        if value is _FAILED:
+            # The leader's load raised or was cancelled; try on our own.
+            return await loader()
+        with self._lock:
+            self.coalesced += 1
+        return value
+
+    async def _alead(self, key: Hashable, loader: Callable[[], Awaitable[Any]], flight: _AsyncFlight) -> Any:
+        # Same version stamping as _lead.
+        value: Any = _FAILED
+        try:
+            value = await loader()
+            self.set(key, value, flight.version)
+            return value
+        finally:
+            with self._lock:
+                if self._ainflight.get(key) is flight:
+                    del self._ainflight[key]
+            flight.future.set_result(value)
+
+    def _lead(self, key: Hashable, loader: Callable[[], Any], flight: _Flight, background: bool = False) -> Any:
+        # Stamp with the version seen *before* loading: a write committed
+        # mid-load makes this entry stale instead of caching old data as new.
+        version = flight.version
+        try:
+            flight.value = loader()
+        except Exception:
+            flight.failed = True
+            if background:
+                # Keep serving the stale value until the window closes.
+                return None
+            raise
+        else:
+            self.set(key, flight.value, version)
+            return flight.value
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "stale_served": self.stale_served,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+_caches: Dict[str, CatalogCache] = {}
+
+
+def get_catalog_cache(name: str, ttl_seconds: Optional[float] = None) -> CatalogCache:
+    """Return the named cache, creating it with the configured size/TTL."""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches.setdefault(
+            name,
+            CatalogCache(
+                name,
+                max_entries=settings.catalog_cache_max_entries,
+                ttl_seconds=settings.catalog_cache_ttl_seconds if ttl_seconds is None else ttl_seconds,
+                stale_seconds=settings.catalog_cache_stale_seconds,
+            ),
+        )
+    return cache
+
+
+def catalog_cache_stats() -> Dict[str, Any]:
+    caches: List[Dict[str, Any]] = [cache.stats() for cache in _caches.values()]
+    return {"catalog_version": _catalog_version, "caches": caches}
+
+
+def catalog_stamp(db: Session) -> Tuple[Optional[datetime], int]:
+    """
+    Catalog-wide (last updated_at, product count), used to validate list
+    responses. Cached per catalog version so a 304 costs no query.
+    """
+    return get_catalog_cache("catalog.stamp").get_or_load(
+        "stamp",
+        lambda: tuple(db.execute(select(func.max(Product.updated_at), func.count(Product.id))).one()),
+    )
@@ -0,0 +1,80 @@
+# app/services/catalog_projection.py
+"""
+Card projection and sparse fieldsets for catalog list endpoints.
+
+A product grid card only needs a handful of columns and a few keys out of the
+``attributes`` JSONB. List queries ``load_only`` those columns and pick the
+keys in SQL (``card_attributes``), so ``description`` and the ``variants``
+arrays (thousands of entries on some contact lenses) are never read from the
+database nor shipped to the browser.
+
+``fields=`` lets a client trim the response further to named top-level fields.
+"""
+from typing import Iterable, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.models.product import Product
+
+# Attribute keys the storefront reads off list items (cards, brand/category/
+# audience/stock helpers). Anything else stays in the PDP payload only.
+CARD_ATTRIBUTE_KEYS = (
+    "product_type",
+    "brand",
+    "brand_label",
+    "brand_name",
+    "brand_value",
+    "category",
+    "category_label",
+    "category_value",
+    "stock_category",
+    "is_stock",
+    "isStock",
+    "stock",
+    "tags",
+    "audience",
+    "audiences",
+    "catalog_status",
+    "color",
+    "colour",
+)
+
+CARD_COLUMNS = (
+    Product.id,
+    Product.sku,
+    Product.ean,
+    Product.slug,
+    Product.title_el,
+    Product.title_en,
+    Product.price,
+    Product.compare_at_price,
+    Product.images,
+    Product.stock,
+    Product.status,
+    Product.is_stock,
+    Product.created_at,
+)
+
+
+def card_attributes():
+    """``attributes`` reduced to CARD_ATTRIBUTE_KEYS, built server-side."""
+    pairs: List = []
+    for key in CARD_ATTRIBUTE_KEYS:
+        pairs.extend((key, Product.attributes[key]))
+    return func.jsonb_strip_nulls(func.jsonb_build_object(*pairs), type_=JSONB).label("card_attributes")
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[frozenset]:
+    """
+    Parse a comma-separated ``fields`` parameter. Returns None when the client
+    wants the default card; raises 400 on unknown names.
+    """
+    if not fields:
+        return None
+    requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+    unknown = sorted(requested - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested or None
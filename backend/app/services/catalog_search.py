@@ -0,0 +1,40 @@
+# app/services/catalog_search.py
+"""
+Ranked storefront search over the products' maintained search document.
+
+``Product.search_text`` holds the accent-folded titles, SKU, brand, tags and slug
+(see compute_search_text) and ``search_vector`` is its 'simple' tsvector. A
+query is folded the same way, so "γυαλια" finds "Γυαλιά". Rows match on:
+- prefix full-text match of every query word (GIN on search_vector),
+- substring match on the folded document (GIN trigram index),
+- trigram word similarity, which tolerates small typos.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import ColumnElement, func, or_
+
+from app.models.product import Product
+from app.services.catalog_tokens import fold_search_text
+
+
+@dataclass
+class SearchClause:
+    where: ColumnElement
+    rank: ColumnElement
+
+
+def build_search_clause(q: Optional[str]) -> Optional[SearchClause]:
+    folded = fold_search_text(q)
+    if not folded:
+        return None
+
+    tsquery = func.to_tsquery("simple", " & ".join(f"{word}:*" for word in folded.split()))
+    return SearchClause(
+        where=or_(
+            Product.search_vector.op("@@")(tsquery),
+            Product.search_text.like(f"%{folded}%"),
+            Product.search_text.op("%>")(folded),
+        ),
+        rank=func.ts_rank_cd(Product.search_vector, tsquery) + func.word_similarity(folded, Product.search_text),
+    )
@@ -0,0 +1,214 @@
+# app/services/catalog_tokens.py
+"""
+Precomputed storefront filter tokens for products.
+
+The PLP filters by category/audience aliases coming from the frontend. Rather
+than normalizing every row on each request, the normalized tokens are stored on
+the product row (``category_tokens``, ``audience_tokens``, ``is_stock``) and
+matched in SQL with the array overlap operator, backed by GIN indexes.
+
+A category candidate (label, tag, slug, title...) contributes its whole
+normalized value and every run of up to ``MAX_ALIAS_WORDS`` adjacent words, so
+aliases like "sunglasses", "γυαλιά ηλίου" or "υγρά φακών επαφής" still match
+titles and slugs that merely contain them. Aliases longer than that only
+match a candidate that is exactly the alias.
+
+``search_text`` is the accent-folded search document behind the ``q`` filter
+(titles, SKU, brand, tags and slug); see app/services/catalog_search.py.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.services.alias_matcher import AliasMatcher, normalize_category_string
+
+STOCK_ALIASES = ["stock", "stok", "στοκ", "στοκσ"]
+STOCK_MATCHER = AliasMatcher(STOCK_ALIASES)
+
+# Longest storefront alias is three words ("stock γυαλια ορασεως"); one spare.
+MAX_ALIAS_WORDS = 4
+
+_WORD_SPLIT_RE = re.compile(r"[^\w]+|_", re.UNICODE)
+
+
+@lru_cache(maxsize=256)
+def _compiled_matcher(aliases: tuple) -> AliasMatcher:
+    return AliasMatcher(aliases)
+
+
+def matches_category_alias(value: Any, aliases: Iterable[str]) -> bool:
+    """Substring match of any alias in value (both normalized); aliases are compiled once per set."""
+    return _compiled_matcher(tuple(aliases)).matches(value)
+
+
+def gather_category_candidates(
+    *,
+    cat_value: Optional[str],
+    raw_categories: List[str],
+    tags: List[str],
+    slug: Optional[str],
+    title_el: Optional[str],
+    title_en: Optional[str],
+    product_type: Optional[str],
+) -> List[str]:
+    # Include everything that can reasonably indicate a category.
+    candidates: List[str] = []
+    if cat_value:
+        candidates.append(cat_value)
+    candidates.extend(raw_categories)
+    candidates.extend(tags)
+    if product_type:
+        candidates.append(product_type)
+    if slug:
+        candidates.append(slug)
+    if title_el:
+        candidates.append(title_el)
+    if title_en:
+        candidates.append(title_en)
+    # Deduplicate while preserving order
+    return list(dict.fromkeys([c for c in candidates if c]))
+
+
+def value_tokens(value: Any) -> List[str]:
+    """
+    Tokens a single candidate value contributes: the whole normalized value
+    and every run of 1..MAX_ALIAS_WORDS adjacent normalized words.
+    """
+    if value is None:
+        return []
+    whole = normalize_category_string(value)
+    if not whole:
+        return []
+    words = [w for w in (normalize_category_string(p) for p in _WORD_SPLIT_RE.split(str(value))) if w]
+    tokens = [whole]
+    for size in range(1, MAX_ALIAS_WORDS + 1):
+        tokens.extend("".join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return list(dict.fromkeys(tokens))
+
+
+def alias_tokens(aliases: Iterable[Any]) -> List[str]:
+    """Normalize filter aliases from the query string into overlap operands."""
+    return list(dict.fromkeys(t for t in (normalize_category_string(a) for a in aliases) if t))
+
+
+def category_value(attrs: Dict[str, Any]) -> Optional[str]:
+    """Primary category label as shown on product cards."""
+    if not isinstance(attrs, dict):
+        return None
+    for key in ("category_label", "category", "category_value"):
+        val = attrs.get(key)
+        if isinstance(val, str) and val:
+            return val
+    if attrs.get("product_type") == "contact_lens":
+        return "contact_lenses"
+    return None
+
+
+def compute_catalog_tokens(
+    attributes: Any,
+    slug: Optional[str],
+    title_el: Optional[str],
+    title_en: Optional[str],
+) -> Dict[str, Any]:
+    """
+    Return the column values for ``category_tokens``, ``audience_tokens`` and
+    ``is_stock`` derived from a product's attributes and identity fields.
+    """
+    attrs: Dict[str, Any] = attributes if isinstance(attributes, dict) else {}
+
+    raw_categories = [
+        attrs[key]
+        for key in ("category_label", "category", "category_value")
+        if isinstance(attrs.get(key), str)
+    ]
+    raw_tags = attrs.get("tags") or []
+    tags = [t for t in raw_tags if isinstance(t, str)] if isinstance(raw_tags, list) else []
+    product_type = attrs.get("product_type") if isinstance(attrs.get("product_type"), str) else None
+
+    candidates = gather_category_candidates(
+        cat_value=category_value(attrs),
+        raw_categories=raw_categories,
+        tags=tags,
+        slug=slug,
+        title_el=title_el,
+        title_en=title_en,
+        product_type=product_type,
+    )
+
+    is_stock = attrs.get("stock") is True
+    for stock_key in ("is_stock", "isStock", "stock_category"):
+        val = attrs.get(stock_key)
+        if val is True or (isinstance(val, str) and STOCK_MATCHER.matches(val)):
+            is_stock = True
+    if not is_stock:
+        is_stock = STOCK_MATCHER.matches_any(candidates)
+
+    category_tokens: List[str] = []
+    for val in candidates:
+        category_tokens.extend(value_tokens(val))
+    if is_stock:
+        category_tokens.append("stock")
+
+    audience_values: List[Any] = []
+    if attrs.get("audience"):
+        audience_values.append(attrs["audience"])
+    raw_audiences = attrs.get("audiences")
+    if isinstance(raw_audiences, list):
+        audience_values.extend(v for v in raw_audiences if v is not None)
+
+    return {
+        "category_tokens": list(dict.fromkeys(category_tokens)),
+        "audience_tokens": alias_tokens(audience_values),
+        "is_stock": is_stock,
+    }
+
+
+def fold_search_text(value: Any) -> str:
+    """
+    Accent- and case-fold free text for search (γυαλιά -> γυαλια, ς -> σ),
+    collapsing punctuation to single spaces but keeping word boundaries.
+    """
+    if value is None:
+        return ""
+    text = unicodedata.normalize("NFD", str(value)).casefold()
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(w for w in _WORD_SPLIT_RE.split(text) if w)
+
+
+def compute_search_text(
+    attributes: Any,
+    sku: Optional[str],
+    title_el: Optional[str],
+    title_en: Optional[str],
+    slug: Optional[str] = None,
+) -> str:
+    attrs: Dict[str, Any] = attributes if isinstance(attributes, dict) else {}
+    # The compact SKU lets "rb2140" find "RB-2140" as well as "rb 2140".
+    parts: List[Any] = [title_el, title_en, sku, normalize_category_string(sku), attrs.get("brand_label") or attrs.get("brand")]
+    # Imported WooCommerce slugs are Greeklish and cannot be derived from the titles.
+    parts.append(slug)
+    raw_tags = attrs.get("tags")
+    if isinstance(raw_tags, list):
+        parts.extend(t for t in raw_tags if isinstance(t, str))
+    folded = [fold_search_text(p) for p in parts if p]
+    return " ".join(dict.fromkeys(f for f in folded if f))
+
+
+def refresh_catalog_tokens(product: Any) -> None:
+    """Recompute the filter tokens and search document in place on a Product ORM instance."""
+    values = compute_catalog_tokens(
+        product.attributes,
+        product.slug,
+        product.title_el,
+        product.title_en,
+    )
+    for column, value in values.items():
+        setattr(product, column, value)
+    product.search_text = compute_search_text(
+        product.attributes,
+        product.sku,
+        product.title_el,
+        product.title_en,
+        product.slug,
+    )
@@ -0,0 +1,9 @@
+# app/services/catalog_visibility.py
+"""
+Which products the storefront shows: ``visible`` and one of ALLOWED_STATUSES.
+
+Shared by the public routers and the offline builders (merchant feed,
+sitemaps, related products). Keep in sync with the ix_products_storefront_keyset
+predicate (checked by scripts/explain_catalog_queries.py).
+"""
+ALLOWED_STATUSES = {"published", "in_stock", "preorder"}
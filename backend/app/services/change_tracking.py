@@ -0,0 +1,78 @@
+# app/services/change_tracking.py
+"""
+Commit-ordered change tracking for products and their tombstones.
+
+``updated_at`` is the writer's transaction *start* time, so a long
+transaction can commit rows stamped before a reader's watermark and those
+rows are never seen again. Instead, a trigger stamps every inserted or
+updated ``products`` / ``product_tombstones`` row with the writing
+transaction's id (``change_xid``, ``pg_current_xact_id()`` as bigint).
+
+The read horizon is ``pg_snapshot_xmin(pg_current_snapshot())``: the oldest
+transaction still running. Everything stamped below it was written by a
+transaction that has already committed or rolled back, and no new row can
+ever be stamped below it. A consumer therefore reads ``since <= change_xid``
+(up to the horizon, where it pages) and stores the horizon it took *before*
+reading as its next ``since``. Rows stamped at or above the horizon may be
+read twice, never missed.
+
+Builders whose output lives in files (merchant feed, sitemaps) keep their
+horizon in the file's sidecar; the others keep it in build_watermarks.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DDL, func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.build_watermark import BuildWatermark
+
+CHANGE_XID_FUNCTION = "stamp_change_xid"
+
+CHANGE_XID_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {CHANGE_XID_FUNCTION}() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$
+"""
+
+_HORIZON = text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def change_xid_trigger_sql(table: str, events: str = "INSERT OR UPDATE") -> str:
+    return (
+        f"CREATE TRIGGER {table}_change_xid BEFORE {events} ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {CHANGE_XID_FUNCTION}()"
+    )
+
+
+def change_xid_ddl(table: str, events: str = "INSERT OR UPDATE") -> list:
+    """after_create DDL for tables created outside Alembic (init_db)."""
+    return [
+        DDL(CHANGE_XID_FUNCTION_SQL).execute_if(dialect="postgresql"),
+        DDL(change_xid_trigger_sql(table, events)).execute_if(dialect="postgresql"),
+    ]
+
+
+def change_horizon(db: Session) -> int:
+    """Every change_xid below this belongs to a finished transaction."""
+    return int(db.execute(_HORIZON).scalar_one())
+
+
+def load_watermark(db: Session, name: str) -> Optional[BuildWatermark]:
+    return db.get(BuildWatermark, name)
+
+
+def store_watermark(db: Session, name: str, horizon: int, as_of: datetime) -> None:
+    """Upsert ``name``'s horizon; committed by the caller together with its output."""
+    stmt = insert(BuildWatermark).values(name=name, horizon=horizon, as_of=as_of)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[BuildWatermark.name],
+            set_={"horizon": stmt.excluded.horizon, "as_of": stmt.excluded.as_of, "updated_at": func.now()},
+        )
+    )
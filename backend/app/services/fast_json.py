@@ -0,0 +1,39 @@
+# app/services/fast_json.py
+"""
+Fast JSON path for hot catalog list endpoints.
+
+Those endpoints build plain dicts straight from the rows and hand them to
+``catalog_json_response``, which encodes them with orjson. That skips the
+pydantic model per row plus FastAPI's second validation/``jsonable_encoder``
+pass against ``response_model``. orjson encoding is opt-in
+(``CATALOG_FAST_JSON=true``); by default the stdlib encoder is used (same
+payload, slower).
+"""
+from decimal import Decimal
+from typing import Any, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dump_json(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def catalog_json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> JSONResponse:
+    """Wrap already-serializable content; no response_model validation happens."""
+    response_class = FastJSONResponse if settings.catalog_fast_json else JSONResponse
+    return response_class(content, status_code=status_code, headers=headers)
@@ -0,0 +1,70 @@
+# app/services/http_cache.py
+"""
+Conditional GET helpers (ETag / Last-Modified / 304) for public catalog reads.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Browsers revalidate quickly; a CDN in front may keep a copy a little longer.
+CATALOG_CACHE_CONTROL = "public, max-age=30, s-maxage=60, stale-while-revalidate=120"
+# Stock/price polling: short-lived everywhere.
+AVAILABILITY_CACHE_CONTROL = "public, max-age=5, s-maxage=5, stale-while-revalidate=30"
+# Prebuilt files (merchant feed, sitemaps): rebuilt on a schedule, not per write.
+FEED_CACHE_CONTROL = "public, max-age=300"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in candidates
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have second precision.
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def set_cache_headers(
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime],
+    cache_control: str = CATALOG_CACHE_CONTROL,
+) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified_response(
+    etag: str,
+    last_modified: Optional[datetime],
+    cache_control: str = CATALOG_CACHE_CONTROL,
+) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag, last_modified, cache_control)
+    return response
@@ -0,0 +1,129 @@
+# app/services/idempotency.py
+"""
+Idempotency-Key handling for admin writes (ERP sync retries).
+
+Flow for a request carrying an ``Idempotency-Key`` header:
+
+1. ``claim_idempotency_key`` first does a plain indexed read. A finished
+   response stored under (admin, key, request hash) is replayed as-is, with
+   no lock and no write.
+2. Otherwise it inserts a claim row in the request's own transaction. If a
+   concurrent duplicate already inserted the same row and has not committed,
+   Postgres makes this INSERT wait on the unique index until the first
+   transaction ends. It then finds the committed response and replays it. If
+   the first one rolled back, it proceeds as the new owner.
+3. The route does its write and calls ``store_idempotent_response`` before
+   its single commit, so a claim row becomes visible only together with its
+   response.
+
+Expired rows are reclaimed on conflict and deleted by
+``sweep_idempotency_keys`` (scripts/sweep_idempotency_keys.py).
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.idempotency_key import IdempotencyKey
+
+REPLAY_HEADER = "Idempotent-Replayed"
+# A claim can lose to the sweeper between the INSERT and the re-read; retry then.
+_CLAIM_ATTEMPTS = 3
+
+
+@dataclass
+class IdempotencyClaim:
+    record_id: Optional[int] = None
+    status_code: Optional[int] = None
+    response: Any = None
+
+    @property
+    def replayed(self) -> bool:
+        return self.record_id is None
+
+
+def request_fingerprint(path: str, payload: Any) -> str:
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{path}\n{canonical}".encode()).hexdigest()
+
+
+def _stored(db: Session, admin_id: int, key: str, request_hash: str) -> Optional[IdempotencyClaim]:
+    row = db.execute(
+        select(IdempotencyKey.status_code, IdempotencyKey.response).where(
+            IdempotencyKey.admin_id == admin_id,
+            IdempotencyKey.idempotency_key == key,
+            IdempotencyKey.request_hash == request_hash,
+            IdempotencyKey.expires_at > func.now(),
+            IdempotencyKey.status_code.isnot(None),
+        )
+    ).first()
+    return IdempotencyClaim(status_code=row.status_code, response=row.response) if row else None
+
+
+def claim_idempotency_key(db: Session, admin_id: int, key: str, request_hash: str) -> IdempotencyClaim:
+    """
+    Either the stored response to replay (``claim.replayed``) or a claim the
+    caller now owns and must complete with ``store_idempotent_response``.
+    """
+    stored = _stored(db, admin_id, key, request_hash)
+    if stored is not None:
+        return stored
+
+    table = IdempotencyKey.__table__
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(hours=settings.idempotency_ttl_hours)
+    for _ in range(_CLAIM_ATTEMPTS):
+        stmt = insert(table).values(
+            admin_id=admin_id,
+            idempotency_key=key,
+            request_hash=request_hash,
+            created_at=now,
+            expires_at=expires_at,
+        )
+        # Only an expired leftover may be taken over; a live row means "replay".
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.admin_id, table.c.idempotency_key, table.c.request_hash],
+            set_={"created_at": now, "expires_at": expires_at, "status_code": None, "response": None},
+            where=table.c.expires_at <= func.now(),
+        ).returning(table.c.id)
+        record_id = db.execute(stmt).scalar_one_or_none()
+        if record_id is not None:
+            return IdempotencyClaim(record_id=record_id)
+        stored = _stored(db, admin_id, key, request_hash)
+        if stored is not None:
+            return stored
+    raise RuntimeError("Could not claim idempotency key")
+
+
+def store_idempotent_response(db: Session, claim: IdempotencyClaim, response: Any, status_code: int = 200) -> None:
+    """Attach the response to an owned claim; commits with the caller's write."""
+    db.execute(
+        update(IdempotencyKey.__table__)
+        .where(IdempotencyKey.__table__.c.id == claim.record_id)
+        .values(status_code=status_code, response=jsonable_encoder(response))
+    )
+
+
+def replay_response(claim: IdempotencyClaim) -> JSONResponse:
+    return JSONResponse(claim.response, status_code=claim.status_code or 200, headers={REPLAY_HEADER: "true"})
+
+
+def sweep_idempotency_keys(db: Session, batch_size: int = 5000) -> int:
+    """Delete expired rows in batches (short transactions); returns the count."""
+    table = IdempotencyKey.__table__
+    total = 0
+    while True:
+        expired = select(table.c.id).where(table.c.expires_at <= func.now()).limit(batch_size).scalar_subquery()
+        deleted = db.execute(delete(table).where(table.c.id.in_(expired))).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
@@ -0,0 +1,109 @@
+# app/services/image_refs.py
+"""
+Index of which uploaded image files each product links to (product_image_refs).
+
+The media manager ("is this file linked?") and permanent product deletes
+("does another product still use this file?") look paths up here by index
+instead of loading and walking every product. The rows are maintained on
+every write:
+
+- ORM writes: Product's after_insert/after_update event calls
+  ``replace_image_refs`` when ``images`` or ``attributes`` changed;
+- Core bulk writes (shop_products bulk upsert) call it themselves;
+- hard deletes cascade through the foreign key.
+
+Paths are stored normalized (``/uploads/images/2024/a.webp``) for the
+product ``images`` plus each variant's ``images``/``image``/``imageUrl``,
+under any of the public prefixes the app serves uploads from.
+"""
+from typing import Any, Dict, Iterable, List, Set
+from urllib.parse import urlparse
+
+from sqlalchemy import delete, insert, select
+
+from app.models.product_image_ref import ProductImageRef
+
+# Same public prefixes as the media manager sources (admin_media._build_sources).
+IMAGE_PUBLIC_PREFIXES = ("/uploads/images", "/product_images")
+LOOKUP_BATCH_SIZE = 1000
+
+
+def normalize_public_path(path: str) -> str:
+    raw = (path or "").replace("\\", "/").strip()
+    if not raw:
+        return ""
+    if not raw.startswith("/"):
+        raw = "/" + raw
+    parts = [p for p in raw.split("/") if p and p not in {".", ".."}]
+    return "/" + "/".join(parts)
+
+
+def extract_image_paths(raw_value: Any) -> Set[str]:
+    """Public upload paths inside one image value (absolute URL or path)."""
+    refs: Set[str] = set()
+    if not isinstance(raw_value, str):
+        return refs
+    normalized = normalize_public_path(urlparse(raw_value.strip()).path)
+    if not normalized:
+        return refs
+    for prefix in IMAGE_PUBLIC_PREFIXES:
+        idx = normalized.find(prefix + "/")
+        if idx >= 0:
+            refs.add(normalize_public_path(normalized[idx:]))
+    return refs
+
+
+def product_image_paths(images: Any, attributes: Any) -> Set[str]:
+    refs: Set[str] = set()
+    for image in images or []:
+        refs |= extract_image_paths(image)
+
+    variants = attributes.get("variants", []) if isinstance(attributes, dict) else []
+    for variant in variants if isinstance(variants, list) else []:
+        if not isinstance(variant, dict):
+            continue
+        for key in ("image", "imageUrl"):
+            refs |= extract_image_paths(variant.get(key))
+        var_images = variant.get("images")
+        if isinstance(var_images, list):
+            for value in var_images:
+                refs |= extract_image_paths(value)
+    return refs
+
+
+def replace_image_refs(conn, refs: Dict[int, Set[str]]) -> None:
+    """Replace the stored paths of the given products (a Connection or Session)."""
+    if not refs:
+        return
+    table = ProductImageRef.__table__
+    conn.execute(delete(table).where(table.c.product_id.in_(list(refs))))
+    rows = [{"product_id": pid, "public_path": path} for pid, paths in refs.items() for path in sorted(paths)]
+    if rows:
+        conn.execute(insert(table), rows)
+
+
+def linked_image_paths(db, paths: Iterable[str]) -> Set[str]:
+    """The subset of ``paths`` linked to at least one product."""
+    wanted: List[str] = sorted(set(paths))
+    linked: Set[str] = set()
+    for start in range(0, len(wanted), LOOKUP_BATCH_SIZE):
+        chunk = wanted[start:start + LOOKUP_BATCH_SIZE]
+        linked.update(
+            db.execute(
+                select(ProductImageRef.public_path).distinct().where(ProductImageRef.public_path.in_(chunk))
+            ).scalars()
+        )
+    return linked
+
+
+def image_paths_used_elsewhere(db, product_id: int, paths: Iterable[str]) -> Set[str]:
+    """The subset of ``paths`` also linked to a product other than ``product_id``."""
+    wanted = sorted(set(paths))
+    if not wanted:
+        return set()
+    stmt = (
+        select(ProductImageRef.public_path)
+        .distinct()
+        .where(ProductImageRef.public_path.in_(wanted), ProductImageRef.product_id != product_id)
+    )
+    return set(db.execute(stmt).scalars())
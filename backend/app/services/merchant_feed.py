@@ -0,0 +1,354 @@
+# app/services/merchant_feed.py
+"""
+Google Merchant product feed, written as a gzip-compressed TSV file.
+
+Every frame colour in ``attributes.variants`` becomes its own item, with an
+id built from the variant sku, ean or colour (never its list position).
+Products without such variants, and contact lenses, are a single item. All items of a product share
+``item_group_id`` (the product id), and the file is ordered by it. That
+ordering lets an incremental build merge-join the previous file with the
+products stamped at or past the last commit-ordered watermark
+(app/services/change_tracking.py), plus hard-delete tombstones, in one
+streaming pass:
+
+- database work is proportional to the number of changes;
+- the old file is re-streamed line by line, never loaded into memory;
+- the product query runs on a server-side cursor (``yield_per``).
+
+TSV rather than XML because it is line-oriented, which keeps that merge
+simple. The file is replaced atomically; a ``.json`` sidecar holds the
+watermark and ETag used by the /api/feeds route.
+"""
+import gzip
+import hashlib
+import html
+import io
+import json
+import os
+import re
+from decimal import Decimal
+from itertools import groupby
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.product import Product
+from app.models.product_tombstone import ProductTombstone
+from app.services.alias_matcher import normalize_category_string
+from app.services.catalog_visibility import ALLOWED_STATUSES
+from app.services.change_tracking import change_horizon
+from app.services.http_cache import make_etag
+
+FEED_COLUMNS = [
+    "id",
+    "item_group_id",
+    "title",
+    "description",
+    "link",
+    "image_link",
+    "additional_image_link",
+    "availability",
+    "price",
+    "sale_price",
+    "brand",
+    "gtin",
+    "mpn",
+    "condition",
+    "color",
+    "product_type",
+]
+FEED_CURRENCY = "EUR"
+FEED_BATCH_SIZE = 500
+MAX_DESCRIPTION_LENGTH = 5000
+MAX_ADDITIONAL_IMAGES = 10
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+FeedGroup = Tuple[int, List[str]]
+
+
+def feed_meta_path(path: Path) -> Path:
+    return path.with_name(path.name + ".json")
+
+
+def read_feed_meta(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(feed_meta_path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _clean(value: Any, limit: Optional[int] = None) -> str:
+    # TSV cells cannot contain tabs or newlines; descriptions are stored as HTML.
+    text = _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", str(value or "")))).strip()
+    return text[:limit] if limit else text
+
+
+def _price(value: Any) -> str:
+    if value is None or value == "":
+        return ""
+    try:
+        return f"{Decimal(str(value)):.2f} {FEED_CURRENCY}"
+    except ArithmeticError:
+        return ""
+
+
+def absolute_url(path: Any) -> str:
+    path = str(path or "").strip()
+    if not path or path.startswith(("http://", "https://")):
+        return path
+    return settings.public_site_url.rstrip("/") + "/" + path.lstrip("/")
+
+
+def product_url(slug: Optional[str], attrs: Dict[str, Any]) -> str:
+    section = "contact-lens" if attrs.get("product_type") == "contact_lens" else "product"
+    return absolute_url(f"/{section}/{quote(slug)}") if slug else ""
+
+
+def _variant_color(variant: Dict[str, Any]) -> Optional[str]:
+    # Same lookup order as the PDP (public_products._load_product_detail).
+    attrs = variant.get("attributes") if isinstance(variant.get("attributes"), dict) else {}
+    return variant.get("color") or variant.get("colour") or attrs.get("pa_color") or attrs.get("color") or attrs.get("colour")
+
+
+def _stock(value: Any) -> int:
+    # Variant JSON (WooCommerce imports, admin editor) is not type-checked.
+    try:
+        return int(float(value)) if value not in (None, "") else 0
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def _availability(stock: Any, status: Optional[str]) -> str:
+    if status == "preorder":
+        return "preorder"
+    return "in_stock" if _stock(stock) > 0 else "out_of_stock"
+
+
+def _variant_item_id(row: Any, variant: Dict[str, Any]) -> Optional[str]:
+    """Stable per-variant item id (sku, ean or colour); None if the variant has no key."""
+    if variant.get("sku"):
+        return str(variant["sku"])
+    if variant.get("ean"):
+        return f"{row.sku}-{variant['ean']}"
+    colour = normalize_category_string(_variant_color(variant))
+    return f"{row.sku}-{colour}" if colour else None
+
+
+def _prices(price: Any, compare_at: Any) -> Tuple[str, str]:
+    # compare_at_price holds the discounted price (the storefront's discountPrice).
+    try:
+        discounted = compare_at is not None and price is not None and Decimal(str(compare_at)) < Decimal(str(price))
+    except ArithmeticError:
+        discounted = False
+    return (_price(price), _price(compare_at)) if discounted else (_price(price), "")
+
+
+def feed_items(row: Any) -> List[List[str]]:
+    """Feed rows (one per colour variant) for one product row."""
+    attrs = row.attributes if isinstance(row.attributes, dict) else {}
+    images = [img for img in (row.images or []) if isinstance(img, str) and img]
+    base = {
+        "item_group_id": str(row.id),
+        "title": _clean(row.title_el or row.title_en),
+        "description": _clean(row.description or row.title_el, MAX_DESCRIPTION_LENGTH),
+        "link": product_url(row.slug, attrs),
+        "brand": _clean(attrs.get("brand_label") or attrs.get("brand")),
+        "condition": "new",
+        "product_type": _clean(attrs.get("category_label") or attrs.get("category")),
+    }
+
+    # Only frame colour variants become items. Contact-lens variants are optical
+    # parameter combinations (no sku/stock/colour); a lens is a single item.
+    variants: List[Tuple[str, Dict[str, Any]]] = []
+    if attrs.get("product_type") != "contact_lens":
+        seen: Set[str] = set()
+        for variant in attrs.get("variants") or []:
+            if not isinstance(variant, dict) or variant.get("status") == "archived":
+                continue
+            item_id = _variant_item_id(row, variant)
+            if item_id and item_id not in seen:
+                seen.add(item_id)
+                variants.append((item_id, variant))
+
+    items: List[Dict[str, str]] = []
+    if not variants:
+        price, sale_price = _prices(row.price, row.compare_at_price)
+        availability = _availability(row.stock, row.status)
+        if attrs.get("product_type") == "contact_lens":
+            # Lens stock lives on the variants; the routes roll it up into status.
+            availability = "in_stock" if row.status == "in_stock" else _availability(0, row.status)
+        items.append(
+            {
+                "id": row.sku,
+                "images": images,
+                "availability": availability,
+                "price": price,
+                "sale_price": sale_price,
+                "gtin": row.ean or "",
+                "color": "",
+            }
+        )
+    for item_id, variant in variants:
+        price, sale_price = _prices(
+            variant.get("price") if variant.get("price") is not None else row.price,
+            variant.get("discountPrice") if variant.get("price") is not None else row.compare_at_price,
+        )
+        variant_images = [img for img in (variant.get("images") or []) if isinstance(img, str) and img]
+        items.append(
+            {
+                "id": item_id,
+                "images": variant_images or images,
+                "availability": _availability(
+                    variant.get("stock") if variant.get("stock") is not None else row.stock,
+                    variant.get("status") or row.status,
+                ),
+                "price": price,
+                "sale_price": sale_price,
+                "gtin": variant.get("ean") or "",
+                "color": _clean(_variant_color(variant)),
+            }
+        )
+
+    rows: List[List[str]] = []
+    for item in items:
+        item_images = item.pop("images")
+        values = {
+            **base,
+            **item,
+            "image_link": absolute_url(item_images[0]) if item_images else "",
+            "additional_image_link": ",".join(absolute_url(i) for i in item_images[1:1 + MAX_ADDITIONAL_IMAGES]),
+            "mpn": row.sku,
+        }
+        rows.append([_clean(values.get(col, "")) for col in FEED_COLUMNS])
+    return rows
+
+
+def _format_line(cells: List[str]) -> str:
+    return "\t".join(cells) + "\n"
+
+
+def _product_groups(db: Session, since: Optional[int]) -> Iterator[FeedGroup]:
+    """
+    (product id, lines) ordered by id, streamed from a server-side cursor.
+    A full build only reads live products. An incremental one reads everything
+    changed since the watermark; products that went offline get no lines.
+    """
+    stmt = select(
+        Product.id,
+        Product.sku,
+        Product.ean,
+        Product.slug,
+        Product.title_el,
+        Product.title_en,
+        Product.description,
+        Product.images,
+        Product.price,
+        Product.compare_at_price,
+        Product.attributes,
+        Product.stock,
+        Product.status,
+        Product.visible,
+    ).order_by(Product.id)
+    if since is None:
+        stmt = stmt.where(Product.visible.is_(True), Product.status.in_(ALLOWED_STATUSES))
+    else:
+        stmt = stmt.where(Product.change_xid >= since)
+
+    for row in db.execute(stmt.execution_options(yield_per=FEED_BATCH_SIZE)):
+        if not (row.visible and row.status in ALLOWED_STATUSES):
+            yield row.id, []
+            continue
+        yield row.id, [_format_line(cells) for cells in feed_items(row)]
+
+
+def _file_header(path: Path) -> Optional[str]:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as fh:
+            return fh.readline()
+    except (OSError, EOFError):
+        return None
+
+
+def _file_groups(path: Path) -> Iterator[FeedGroup]:
+    with gzip.open(path, "rt", encoding="utf-8", newline="") as fh:
+        next(fh, None)  # header
+        for key, lines in groupby(fh, key=lambda line: int(line.split("\t", 2)[1])):
+            yield key, list(lines)
+
+
+def _merge_groups(old: Iterable[FeedGroup], changed: Iterable[FeedGroup], removed: Set[int]) -> Iterator[str]:
+    old_it, new_it = iter(old), iter(changed)
+    o, n = next(old_it, None), next(new_it, None)
+    while o is not None or n is not None:
+        if n is None or (o is not None and o[0] < n[0]):
+            if o[0] not in removed:
+                yield from o[1]
+            o = next(old_it, None)
+        else:
+            yield from n[1]
+            if o is not None and o[0] == n[0]:
+                o = next(old_it, None)
+            n = next(new_it, None)
+
+
+def build_merchant_feed(db: Session, path: Optional[Path] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Write the feed to ``path`` (default settings.merchant_feed_path) and return
+    its metadata. Incremental unless ``full`` or there is no previous build.
+    """
+    path = Path(path or settings.merchant_feed_path)
+    meta = None if full else read_feed_meta(path)
+    since = None
+    # A missing or differently-shaped previous file cannot be merged into; a
+    # sidecar from before change_xid has no "horizon" and forces a full build.
+    if meta and "horizon" in meta and _file_header(path) == _format_line(FEED_COLUMNS):
+        since = int(meta["horizon"])
+
+    # Taken before reading: everything below it is committed and gets read
+    # now; anything at or above it is read (again) next time.
+    started = db.execute(select(func.now())).scalar_one()
+    horizon = change_horizon(db)
+
+    changed = _product_groups(db, since)
+    if since is None:
+        lines: Iterator[str] = (line for _, group in changed for line in group)
+    else:
+        removed = set(
+            db.execute(select(ProductTombstone.product_id).where(ProductTombstone.change_xid >= since)).scalars()
+        )
+        lines = _merge_groups(_file_groups(path), changed, removed)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    digest = hashlib.sha256()
+    items = 0
+    with open(tmp_path, "wb") as raw:
+        # mtime=0 keeps the bytes (and Range offsets) identical for identical content.
+        with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz, io.TextIOWrapper(gz, encoding="utf-8", newline="") as fh:
+            fh.write(_format_line(FEED_COLUMNS))
+            for line in lines:
+                fh.write(line)
+                digest.update(line.encode("utf-8"))
+                items += 1
+    os.replace(tmp_path, path)
+
+    etag = make_etag("merchant-feed", digest.hexdigest())
+    unchanged = meta is not None and meta.get("etag") == etag
+    new_meta = {
+        "horizon": horizon,
+        # Last-Modified only moves when the content does.
+        "generated_at": meta["generated_at"] if unchanged else started.isoformat(),
+        "etag": etag,
+        "items": items,
+        "incremental": since is not None,
+    }
+    meta_tmp = feed_meta_path(path).with_name(feed_meta_path(path).name + ".tmp")
+    meta_tmp.write_text(json.dumps(new_meta), encoding="utf-8")
+    os.replace(meta_tmp, feed_meta_path(path))
+    return new_meta
@@ -0,0 +1,31 @@
+# app/services/optimistic_lock.py
+"""
+Optimistic concurrency for product writes.
+
+``Product.version`` is the mapper's ``version_id_col``, so every ORM UPDATE
+or DELETE of a product goes out as ``... WHERE id = :id AND version =
+:loaded`` and sets ``version = :loaded + 1``. If another writer committed in
+between, no row matches and the flush raises StaleDataError. That becomes a
+409 through ``stale_data_handler`` (registered in app.main). Routes must not
+assign ``version`` themselves.
+
+Clients that send back the version they edited (``expected_version``) are
+also protected against a stale form, not only against the read-to-write race.
+Core writes (shop bulk upsert) add the same ``version`` guard by hand.
+"""
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm.exc import StaleDataError
+
+VERSION_CONFLICT_DETAIL = "Product was modified by someone else; reload and retry"
+
+
+def check_expected_version(current: Optional[int], expected: Optional[int]) -> None:
+    if expected is not None and expected != current:
+        raise HTTPException(status_code=409, detail=VERSION_CONFLICT_DETAIL)
+
+
+async def stale_data_handler(request: Request, exc: StaleDataError) -> JSONResponse:
+    return JSONResponse(status_code=409, content={"detail": VERSION_CONFLICT_DETAIL})
@@ -0,0 +1,60 @@
+# app/services/pagination.py
+"""
+Opaque keyset cursors for catalog listings.
+
+A cursor encodes the ``(timestamp, id)`` of the last row of a page so the next
+page can continue with ``WHERE (ts, id) < (:ts, :id)`` instead of ``OFFSET``,
+which keeps page N as cheap as page 1.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_ESTIMATED_HEADER = "X-Total-Count-Estimated"
+
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    raw = json.dumps([ts.isoformat(), int(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts_raw, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(ts_raw), int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def encode_watermark(positions: List[Tuple[int, int]]) -> str:
+    """Several ``(change_xid, id)`` keyset positions in one opaque token."""
+    raw = json.dumps([[int(xid), int(row_id)] for xid, row_id in positions], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_watermark(token: str, count: int) -> List[Tuple[int, int]]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        positions = [(int(xid), int(row_id)) for xid, row_id in json.loads(base64.urlsafe_b64decode(padded.encode()))]
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid watermark") from exc
+    if len(positions) != count:
+        raise HTTPException(status_code=400, detail="Invalid watermark")
+    return positions
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def set_total_count(response: Response, total: int, estimated: bool = False) -> None:
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    if estimated:
+        response.headers[TOTAL_ESTIMATED_HEADER] = "true"
@@ -0,0 +1,300 @@
+# app/services/related_products.py
+"""
+Precomputed "related products" lists behind /shop-products/{slug}/related.
+
+For every live product two ranked id lists are stored in product_neighbours:
+
+- ``similar_ids``: scored on same brand, same category, same audience, price
+  band and how often both were ordered together (order_notifications);
+- ``brand_ids``: "more from this brand", nearest in price first.
+
+Candidates are not all-pairs: a product is only compared with the
+NEIGHBOUR_WINDOW products either side of it by price within its category and
+within its brand, plus everything it was ordered with. That keeps a build
+roughly O(products * window).
+
+An incremental build (the default) loads the small feature columns of all
+products, but only rescores and rewrites the products that can have changed:
+
+- products written or tombstoned since the last build's commit-ordered
+  watermark (app/services/change_tracking.py), stored in build_watermarks;
+- their price-window neighbours;
+- lists that mention them;
+- co-purchase partners from new orders.
+
+Because windows shift a little as products come and go, run ``--full``
+periodically (e.g. nightly) to settle everything.
+"""
+import math
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.build_watermark import BuildWatermark
+from app.models.order_notification import OrderNotification
+from app.models.product import Product
+from app.models.product_neighbour import ProductNeighbour
+from app.models.product_tombstone import ProductTombstone
+from app.services.alias_matcher import normalize_category_string
+from app.services.catalog_visibility import ALLOWED_STATUSES
+from app.services.change_tracking import change_horizon, load_watermark, store_watermark
+
+TOP_K = 24
+NEIGHBOUR_WINDOW = 40
+COOCCURRENCE_WINDOW_DAYS = 365
+# Orders with more lines than this are bulk/wholesale and say little about affinity.
+MAX_ORDER_ITEMS = 20
+WRITE_BATCH_SIZE = 1000
+WATERMARK_NAME = "related_products"
+
+WEIGHT_BRAND = 3.0
+WEIGHT_CATEGORY = 2.0
+WEIGHT_AUDIENCE = 1.0
+WEIGHT_PRICE_BAND = 1.0
+WEIGHT_COOCCURRENCE = 1.5
+# Price bands are geometric: each band is 1.5x the previous one.
+PRICE_BAND_RATIO = 1.5
+
+
+@dataclass
+class _Features:
+    id: int
+    brand: str
+    category: str
+    audience: str
+    price: float
+    band: Optional[int]
+    live: bool
+
+
+_Block = List[Tuple[float, int]]
+
+
+def _price_band(price: float) -> Optional[int]:
+    return math.floor(math.log(price) / math.log(PRICE_BAND_RATIO)) if price > 0 else None
+
+
+def _load_features(db: Session) -> Tuple[Dict[int, _Features], Dict[str, int]]:
+    """Per-product ranking features, plus code (sku/slug/variant sku/id) -> product id."""
+    attr = Product.attributes
+    stmt = select(
+        Product.id,
+        Product.sku,
+        Product.slug,
+        Product.price,
+        Product.compare_at_price,
+        Product.visible,
+        Product.status,
+        func.coalesce(attr["brand_label"].astext, attr["brand"].astext).label("brand"),
+        func.coalesce(
+            attr["category_label"].astext,
+            attr["category"].astext,
+            attr["category_value"].astext,
+            attr["product_type"].astext,
+        ).label("category"),
+        attr["audience"].astext.label("audience"),
+        func.jsonb_path_query_array(attr, "$.variants[*].sku").label("variant_skus"),
+    )
+    features: Dict[int, _Features] = {}
+    codes: Dict[str, int] = {}
+    for row in db.execute(stmt.execution_options(yield_per=5000)):
+        price = row.price
+        if row.compare_at_price is not None and price is not None and row.compare_at_price < price:
+            price = row.compare_at_price
+        price = float(price or Decimal(0))
+        features[row.id] = _Features(
+            id=row.id,
+            brand=normalize_category_string(row.brand),
+            category=normalize_category_string(row.category),
+            audience=normalize_category_string(row.audience),
+            price=price,
+            band=_price_band(price),
+            live=bool(row.visible) and row.status in ALLOWED_STATUSES,
+        )
+        # Checkout sends sku, id or slug per cart line (CheckoutPaymentPage).
+        for code in (row.sku, row.slug, str(row.id), *(row.variant_skus or [])):
+            if isinstance(code, str) and code:
+                codes.setdefault(code, row.id)
+    return features, codes
+
+
+def _resolve_codes(raw: str, codes: Dict[str, int]) -> Set[int]:
+    return {codes[c.strip()] for c in (raw or "").split(",") if c.strip() in codes}
+
+
+def _load_cooccurrence(db: Session, codes: Dict[str, int], since: datetime) -> Dict[int, Counter]:
+    counts: Dict[int, Counter] = defaultdict(Counter)
+    stmt = select(OrderNotification.product_codes).where(OrderNotification.created_at >= since)
+    for raw in db.execute(stmt.execution_options(yield_per=5000)).scalars():
+        ids = _resolve_codes(raw, codes)
+        if len(ids) < 2 or len(ids) > MAX_ORDER_ITEMS:
+            continue
+        for a in ids:
+            for b in ids:
+                if a != b:
+                    counts[a][b] += 1
+    return counts
+
+
+def _blocks(features: Dict[int, _Features], key: str) -> Dict[str, _Block]:
+    blocks: Dict[str, _Block] = defaultdict(list)
+    for f in features.values():
+        value = getattr(f, key)
+        if f.live and value:
+            blocks[value].append((f.price, f.id))
+    for block in blocks.values():
+        block.sort()
+    return blocks
+
+
+def _window(block: Optional[_Block], f: _Features, size: int) -> Iterable[int]:
+    if not block:
+        return []
+    at = bisect_left(block, (f.price, f.id))
+    return [pid for _, pid in block[max(0, at - size):at + size + 1] if pid != f.id]
+
+
+def _similar(
+    f: _Features,
+    features: Dict[int, _Features],
+    by_category: Dict[str, _Block],
+    by_brand: Dict[str, _Block],
+    cooccurrence: Dict[int, Counter],
+) -> List[int]:
+    partners = cooccurrence.get(f.id, Counter())
+    candidates = set(partners)
+    candidates.update(_window(by_category.get(f.category), f, NEIGHBOUR_WINDOW))
+    candidates.update(_window(by_brand.get(f.brand), f, NEIGHBOUR_WINDOW))
+
+    scored: List[Tuple[float, float, int]] = []
+    for pid in candidates:
+        other = features.get(pid)
+        if other is None or not other.live or pid == f.id:
+            continue
+        score = 0.0
+        if f.brand and other.brand == f.brand:
+            score += WEIGHT_BRAND
+        if f.category and other.category == f.category:
+            score += WEIGHT_CATEGORY
+        if f.audience and other.audience == f.audience:
+            score += WEIGHT_AUDIENCE
+        if f.band is not None and other.band is not None and abs(other.band - f.band) <= 1:
+            score += WEIGHT_PRICE_BAND if other.band == f.band else WEIGHT_PRICE_BAND / 2
+        if partners[pid]:
+            score += WEIGHT_COOCCURRENCE * math.log1p(partners[pid])
+        scored.append((-score, abs(other.price - f.price), pid))
+    scored.sort()
+    return [pid for _, _, pid in scored[:TOP_K]]
+
+
+def _same_brand(f: _Features, features: Dict[int, _Features], by_brand: Dict[str, _Block]) -> List[int]:
+    nearest = _window(by_brand.get(f.brand), f, TOP_K)
+    return sorted(nearest, key=lambda pid: (abs(features[pid].price - f.price), pid))[:TOP_K]
+
+
+def _affected_ids(
+    db: Session,
+    since: BuildWatermark,
+    features: Dict[int, _Features],
+    codes: Dict[str, int],
+    by_category: Dict[str, _Block],
+    by_brand: Dict[str, _Block],
+    cooccurrence: Dict[int, Counter],
+) -> Set[int]:
+    changed = set(db.execute(select(Product.id).where(Product.change_xid >= since.horizon)).scalars())
+    changed |= set(
+        db.execute(select(ProductTombstone.product_id).where(ProductTombstone.change_xid >= since.horizon)).scalars()
+    )
+
+    affected = set(changed)
+    for pid in changed:
+        f = features.get(pid)
+        if f is not None and f.live:
+            # Products whose price window now (may) include this one.
+            affected.update(_window(by_category.get(f.category), f, NEIGHBOUR_WINDOW))
+            affected.update(_window(by_brand.get(f.brand), f, NEIGHBOUR_WINDOW))
+    if changed:
+        changed_list = list(changed)
+        affected.update(
+            db.execute(
+                select(ProductNeighbour.product_id).where(
+                    or_(ProductNeighbour.similar_ids.overlap(changed_list), ProductNeighbour.brand_ids.overlap(changed_list))
+                )
+            ).scalars()
+        )
+
+    # New orders shift co-purchase scores for everything in them. Notifications
+    # are committed right after they are created, so created_at is a safe
+    # enough cursor; the periodic --full build settles any stragglers.
+    stmt = select(OrderNotification.product_codes).where(OrderNotification.created_at > since.as_of)
+    for raw in db.execute(stmt).scalars():
+        for pid in _resolve_codes(raw, codes):
+            affected.add(pid)
+            affected.update(cooccurrence.get(pid, ()))
+    return affected
+
+
+def build_related_products(db: Session, full: bool = False) -> Dict[str, int]:
+    """
+    Rebuild product_neighbours (incrementally unless ``full`` or no watermark
+    is stored yet) and commit. Returns counts of rows written and removed.
+    """
+    # Taken before reading; stored even when nothing is rewritten.
+    started = db.execute(select(func.now())).scalar_one()
+    horizon = change_horizon(db)
+    since = None if full else load_watermark(db, WATERMARK_NAME)
+
+    features, codes = _load_features(db)
+    cooccurrence = _load_cooccurrence(db, codes, started - timedelta(days=COOCCURRENCE_WINDOW_DAYS))
+    by_category = _blocks(features, "category")
+    by_brand = _blocks(features, "brand")
+
+    if since is None:
+        targets = set(features)
+    else:
+        targets = _affected_ids(db, since, features, codes, by_category, by_brand, cooccurrence)
+
+    rows = []
+    gone: List[int] = []
+    for pid in targets:
+        f = features.get(pid)
+        if f is None or not f.live:
+            gone.append(pid)
+            continue
+        rows.append(
+            {
+                "product_id": pid,
+                "similar_ids": _similar(f, features, by_category, by_brand, cooccurrence),
+                "brand_ids": _same_brand(f, features, by_brand),
+                "built_at": started,
+            }
+        )
+
+    table = ProductNeighbour.__table__
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        stmt = insert(table).values(rows[start:start + WRITE_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.product_id],
+            set_={
+                "similar_ids": stmt.excluded.similar_ids,
+                "brand_ids": stmt.excluded.brand_ids,
+                "built_at": stmt.excluded.built_at,
+            },
+        )
+        db.execute(stmt)
+    removed = 0
+    for start in range(0, len(gone), WRITE_BATCH_SIZE):
+        removed += db.execute(delete(table).where(table.c.product_id.in_(gone[start:start + WRITE_BATCH_SIZE]))).rowcount
+    if since is None:
+        # Full build: anything not rewritten above belongs to a product that is no longer live.
+        removed += db.execute(delete(table).where(table.c.built_at < started)).rowcount
+    store_watermark(db, WATERMARK_NAME, horizon, started)
+    db.commit()
+    return {"products": len(features), "rescored": len(targets), "written": len(rows), "removed": removed}
@@ -0,0 +1,204 @@
+# app/services/sitemaps.py
+"""
+Sharded XML sitemaps for product and category pages.
+
+Products are split into fixed id ranges of SHARD_SIZE (50k, the protocol's
+per-file URL limit), so a product always lands in the same shard. An
+incremental build finds the shards touched since the last commit-ordered
+watermark (``change_xid``, see app/services/change_tracking.py; product
+writes plus hard-delete tombstones) and rewrites only those;
+the category sitemap and the ``sitemap.xml`` index are small and rewritten
+every run. Shards are stored gzip-compressed next to a ``.json`` sidecar
+with per-file lastmod/ETag, which the /sitemaps routes serve from.
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.category import Category
+from app.models.product import Product
+from app.models.product_tombstone import ProductTombstone
+from app.services.catalog_visibility import ALLOWED_STATUSES
+from app.services.change_tracking import change_horizon
+from app.services.http_cache import make_etag
+from app.services.merchant_feed import absolute_url, product_url
+
+SHARD_SIZE = 50_000
+SITEMAP_BATCH_SIZE = 5000
+INDEX_NAME = "sitemap.xml"
+CATEGORIES_NAME = "categories.xml.gz"
+META_NAME = "sitemaps.json"
+
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+_NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def shard_name(shard: int) -> str:
+    return f"products-{shard}.xml.gz"
+
+
+def read_sitemap_meta(directory: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((directory / META_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _live(stmt):
+    return stmt.where(Product.visible.is_(True), Product.status.in_(ALLOWED_STATUSES))
+
+
+def _url_entry(loc: str, lastmod: Optional[datetime]) -> str:
+    entry = f"<url><loc>{escape(loc)}</loc>"
+    if lastmod is not None:
+        entry += f"<lastmod>{lastmod.isoformat(timespec='seconds')}</lastmod>"
+    return entry + "</url>\n"
+
+
+def _write_atomic(path: Path, chunks: Iterable[str], compress: bool) -> str:
+    """Write ``chunks`` to ``path`` via a temp file; returns the content ETag."""
+    digest = hashlib.sha256()
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as raw:
+        # mtime=0: identical content gives identical bytes.
+        out = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if compress else raw
+        try:
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                digest.update(data)
+                out.write(data)
+        finally:
+            if compress:
+                out.close()
+    os.replace(tmp_path, path)
+    return make_etag("sitemap", path.name, digest.hexdigest())
+
+
+def _write_product_shard(db: Session, directory: Path, shard: int) -> Optional[Dict[str, Any]]:
+    """Rewrite one shard; returns its meta entry, or None (file removed) when it is empty."""
+    lo, hi = shard * SHARD_SIZE, (shard + 1) * SHARD_SIZE
+    stmt = _live(
+        select(Product.slug, Product.updated_at, Product.attributes["product_type"].astext.label("product_type"))
+        .where(Product.id >= lo, Product.id < hi, Product.slug.isnot(None))
+        .order_by(Product.id)
+    )
+    lastmod: Optional[datetime] = None
+    count = 0
+
+    def entries():
+        nonlocal lastmod, count
+        yield _XML_HEADER + f"<urlset {_NS}>\n"
+        for row in db.execute(stmt.execution_options(yield_per=SITEMAP_BATCH_SIZE)):
+            count += 1
+            if row.updated_at is not None and (lastmod is None or row.updated_at > lastmod):
+                lastmod = row.updated_at
+            yield _url_entry(product_url(row.slug, {"product_type": row.product_type}), row.updated_at)
+        yield "</urlset>\n"
+
+    path = directory / shard_name(shard)
+    etag = _write_atomic(path, entries(), compress=True)
+    if not count:
+        path.unlink(missing_ok=True)
+        return None
+    return {"etag": etag, "lastmod": lastmod.isoformat() if lastmod else None, "urls": count}
+
+
+def _write_categories(db: Session, directory: Path) -> Dict[str, Any]:
+    # categories has no timestamps; lastmod is the newest live product in it.
+    stmt = (
+        select(Category.slug, func.max(Product.updated_at).label("lastmod"))
+        .outerjoin(
+            Product,
+            (Product.category_id == Category.id)
+            & Product.visible.is_(True)
+            & Product.status.in_(ALLOWED_STATUSES),
+        )
+        .group_by(Category.id, Category.slug)
+        .order_by(Category.slug)
+    )
+    rows = db.execute(stmt).all()
+    chunks = [_XML_HEADER + f"<urlset {_NS}>\n"]
+    chunks += [_url_entry(absolute_url(f"/shop/{row.slug}"), row.lastmod) for row in rows]
+    chunks.append("</urlset>\n")
+    lastmods = [row.lastmod for row in rows if row.lastmod is not None]
+    return {
+        "etag": _write_atomic(directory / CATEGORIES_NAME, chunks, compress=True),
+        "lastmod": max(lastmods).isoformat() if lastmods else None,
+        "urls": len(rows),
+    }
+
+
+def _write_index(directory: Path, files: Dict[str, Dict[str, Any]]) -> str:
+    chunks = [_XML_HEADER + f"<sitemapindex {_NS}>\n"]
+    for name, entry in files.items():
+        chunks.append(f"<sitemap><loc>{escape(absolute_url(f'/sitemaps/{name}'))}</loc>")
+        if entry.get("lastmod"):
+            chunks.append(f"<lastmod>{entry['lastmod']}</lastmod>")
+        chunks.append("</sitemap>\n")
+    chunks.append("</sitemapindex>\n")
+    return _write_atomic(directory / INDEX_NAME, chunks, compress=False)
+
+
+def _dirty_shards(db: Session, since: Optional[int]) -> Set[int]:
+    if since is None:
+        return {int(s) for s in db.execute(select(Product.id // SHARD_SIZE).distinct()).scalars()}
+    changed = db.execute(select(Product.id // SHARD_SIZE).distinct().where(Product.change_xid >= since)).scalars()
+    removed = db.execute(
+        select(ProductTombstone.product_id // SHARD_SIZE).distinct().where(ProductTombstone.change_xid >= since)
+    ).scalars()
+    return {int(s) for s in changed} | {int(s) for s in removed}
+
+
+def build_sitemaps(db: Session, directory: Optional[Path] = None, full: bool = False) -> Tuple[Dict[str, Any], Set[int]]:
+    """
+    Build the sitemap files under ``directory`` (default settings.sitemap_dir).
+    Returns the new metadata and the product shards that were rewritten.
+    """
+    directory = Path(directory or settings.sitemap_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    meta = None if full else read_sitemap_meta(directory)
+    # A sidecar from before change_xid has no "horizon" and forces a full build.
+    since = int(meta["horizon"]) if meta and "horizon" in meta else None
+
+    # Taken before reading, as in the merchant feed.
+    started = db.execute(select(func.now())).scalar_one()
+    horizon = change_horizon(db)
+
+    files: Dict[str, Dict[str, Any]] = dict(meta["files"]) if meta and since is not None else {}
+
+    dirty = _dirty_shards(db, since)
+    for shard in sorted(dirty):
+        entry = _write_product_shard(db, directory, shard)
+        if entry is None:
+            files.pop(shard_name(shard), None)
+        else:
+            files[shard_name(shard)] = entry
+    files[CATEGORIES_NAME] = _write_categories(db, directory)
+
+    ordered = {CATEGORIES_NAME: files.pop(CATEGORIES_NAME)}
+    ordered.update(sorted(files.items(), key=lambda item: int(item[0].split("-")[1].split(".")[0])))
+
+    new_meta = {
+        "horizon": horizon,
+        "generated_at": started.isoformat(),
+        "index_etag": _write_index(directory, ordered),
+        "files": ordered,
+    }
+    tmp_meta = directory / (META_NAME + ".tmp")
+    tmp_meta.write_text(json.dumps(new_meta), encoding="utf-8")
+    os.replace(tmp_meta, directory / META_NAME)
+
+    # After a full build, shards whose id range emptied out are left over.
+    for leftover in directory.glob("products-*.xml.gz"):
+        if leftover.name not in ordered:
+            leftover.unlink(missing_ok=True)
+    return new_meta, dirty
@@ -0,0 +1,101 @@
+"""
+Micro-benchmark: compiled AliasMatcher vs the previous per-call alias matching
+(``matches_category_alias`` re-normalizing every alias per candidate, and the
+importer's ``_is_stockish``).
+
+Usage:
+    python backend/scripts/bench_alias_matcher.py [--rows 2000] [--aliases 40]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import sys
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.alias_matcher import AliasMatcher, normalize_category_string  # noqa: E402
+from app.services.catalog_tokens import STOCK_MATCHER  # noqa: E402
+
+WORDS = [
+    "Γυαλιά", "Ηλίου", "Οράσεως", "Φακοί", "Επαφής", "Ανδρικά", "Γυναικεία", "Παιδικά",
+    "Ray-Ban", "Oakley", "Persol", "aviator", "polarized", "metal", "acetate", "unisex",
+    "sunglasses", "ophthalmic_frames", "contact_lenses", "Στοκ", "daily", "monthly",
+]
+
+
+def legacy_matches_category_alias(value: Any, aliases: List[str]) -> bool:
+    normalized = normalize_category_string(value)
+    if not normalized:
+        return False
+    for alias in aliases:
+        norm_alias = normalize_category_string(alias)
+        if norm_alias and norm_alias in normalized:
+            return True
+    return False
+
+
+def legacy_is_stockish(value: Optional[str]) -> bool:
+    if not value:
+        return False
+    text = unicodedata.normalize("NFD", value)
+    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
+    norm = re.sub(r"[^\w]+", "", text, flags=re.UNICODE).lower()
+    if not norm:
+        return False
+    return any(tok in norm for tok in {"stock", "stok", "στοκ", "στοκσ"})
+
+
+def timed(label: str, fn: Callable[[], int]) -> float:
+    start = time.perf_counter()
+    hits = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>32}: {elapsed * 1000:8.1f} ms  ({hits} hits)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000, help="synthetic products")
+    parser.add_argument("--candidates", type=int, default=8, help="candidate values per product")
+    parser.add_argument("--aliases", type=int, default=40, help="aliases per filter")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = [
+        [" ".join(rng.sample(WORDS, 3)) for _ in range(args.candidates)]
+        for _ in range(args.rows)
+    ]
+    # Two-word aliases: some rows match, most candidates have to be scanned in full.
+    aliases = [f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(args.aliases)]
+    matcher = AliasMatcher(aliases)
+
+    for candidates in rows:
+        for value in candidates:
+            assert legacy_matches_category_alias(value, aliases) == matcher.matches(value)
+            assert legacy_is_stockish(value) == STOCK_MATCHER.matches(value)
+
+    print(f"{args.rows} rows x {args.candidates} candidates, {len(aliases)} aliases")
+    legacy = timed(
+        "matches_category_alias (legacy)",
+        lambda: sum(legacy_matches_category_alias(v, aliases) for c in rows for v in c),
+    )
+    compiled = timed("AliasMatcher.matches", lambda: sum(matcher.matches(v) for c in rows for v in c))
+    print(f"{'speedup':>32}: {legacy / compiled:8.1f}x")
+
+    legacy = timed("_is_stockish (legacy)", lambda: sum(legacy_is_stockish(v) for c in rows for v in c))
+    compiled = timed("STOCK_MATCHER.matches", lambda: sum(STOCK_MATCHER.matches(v) for c in rows for v in c))
+    print(f"{'speedup':>32}: {legacy / compiled:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Concurrency benchmark: sync Session inside ``async def`` vs the async session.
+
+Fires N concurrent requests at two throwaway routes that each run a slow query
+(``SELECT pg_sleep(:delay)``):
+
+- ``/blocking``: ``async def`` + sync ``SessionLocal``, the old shop_products
+  pattern. Every query blocks the event loop, so requests run one by one.
+- ``/async``: ``async def`` + ``AsyncSessionLocal`` (psycopg async), the new
+  pattern. Queries overlap, bounded only by the connection pool.
+
+A fast request is interleaved with the slow ones to show how long it waits.
+Requests go through the ASGI app in-process (httpx.ASGITransport), so the only
+event loop involved is the one being measured. Needs DATABASE_URL to point at
+a reachable Postgres; nothing is written.
+
+Usage:
+    python backend/scripts/bench_async_routes.py [--requests 10] [--delay 0.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.db import AsyncSessionLocal, SessionLocal, async_engine  # noqa: E402
+
+SLOW_QUERY = text("SELECT pg_sleep(:delay)")
+
+bench_app = FastAPI()
+
+
+@bench_app.get("/blocking")
+async def blocking(delay: float):
+    db = SessionLocal()
+    try:
+        db.execute(SLOW_QUERY, {"delay": delay})
+    finally:
+        db.close()
+    return {"ok": True}
+
+
+@bench_app.get("/async")
+async def non_blocking(delay: float):
+    async with AsyncSessionLocal() as db:
+        await db.execute(SLOW_QUERY, {"delay": delay})
+    return {"ok": True}
+
+
+@bench_app.get("/ping")
+async def ping():
+    return {"ok": True}
+
+
+async def run(client: httpx.AsyncClient, path: str, count: int, delay: float) -> tuple[float, float]:
+    async def timed_ping() -> float:
+        # Let the slow requests start first, then see how long a trivial one takes.
+        await asyncio.sleep(delay / 4)
+        start = time.perf_counter()
+        await client.get("/ping")
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    slow = [client.get(path, params={"delay": delay}) for _ in range(count)]
+    *responses, ping_latency = await asyncio.gather(*slow, timed_ping())
+    elapsed = time.perf_counter() - start
+    assert all(r.status_code == 200 for r in responses), [r.status_code for r in responses]
+    return elapsed, ping_latency
+
+
+async def main_async(count: int, delay: float) -> None:
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm both pools so connection setup is not measured.
+        await client.get("/blocking", params={"delay": 0})
+        await client.get("/async", params={"delay": 0})
+
+        print(f"{count} concurrent requests, {delay:.2f}s query each (serial total {count * delay:.2f}s)")
+        for label, path in (("sync session", "/blocking"), ("async session", "/async")):
+            elapsed, ping_latency = await run(client, path, count, delay)
+            print(f"{label:>14}: wall {elapsed:6.2f}s   /ping latency {ping_latency * 1000:8.1f} ms")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="concurrent slow requests (keep <= pool size)")
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds each query sleeps")
+    args = parser.parse_args()
+    asyncio.run(main_async(args.requests, args.delay))
+
+
+if __name__ == "__main__":
+    main()
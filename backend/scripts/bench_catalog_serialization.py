@@ -0,0 +1,95 @@
+"""
+Benchmark list serialization for /api/shop-products: the pydantic path
+(ProductListItem per row, re-validated against response_model, stdlib json)
+versus the fast path (plain dicts encoded with orjson).
+
+No database needed; rows are synthetic card projections.
+
+Usage:
+    python backend/scripts/bench_catalog_serialization.py [--items 200] [--repeat 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from app.routers.public_products import ProductListItem, _list_item_dict  # noqa: E402
+from app.services.fast_json import dump_json  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    rows = []
+    for i in range(count):
+        product = SimpleNamespace(
+            id=i,
+            sku=f"SKU-{i:05d}",
+            slug=f"product-{i}",
+            title_el=f"Γυαλιά ηλίου {i}",
+            title_en=f"Sunglasses {i}",
+            price=Decimal("129.90"),
+            compare_at_price=Decimal("99.90") if i % 3 == 0 else None,
+            stock=i % 17,
+            images=[f"/media/uploads/images/{i}-{n}.webp" for n in range(4)],
+            status="published",
+            is_stock=i % 5 == 0,
+        )
+        attrs = {
+            "brand_label": "Ray-Ban",
+            "category_label": "Γυαλιά Ηλίου",
+            "audience": "unisex",
+            "product_type": "sunglasses",
+            "tags": ["polarized", "metal", "aviator"],
+            "color": "gold",
+        }
+        rows.append((product, attrs))
+    return rows
+
+
+def pydantic_path(rows: list, adapter: TypeAdapter) -> bytes:
+    # What FastAPI did before: build models, validate against response_model,
+    # jsonable_encoder, then the stdlib encoder.
+    items = [ProductListItem(**_list_item_dict(product, attrs)) for product, attrs in rows]
+    validated = adapter.validate_python([item.model_dump() for item in items])
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows: list) -> bytes:
+    return dump_json([_list_item_dict(product, attrs) for product, attrs in rows])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200, help="items per page")
+    parser.add_argument("--repeat", type=int, default=200, help="pages serialized per measurement")
+    args = parser.parse_args()
+
+    rows = make_rows(args.items)
+    adapter = TypeAdapter(List[ProductListItem])
+
+    assert json.loads(pydantic_path(rows, adapter)) == json.loads(fast_path(rows)), "payloads differ"
+
+    results = {}
+    for name, fn in (("pydantic", lambda: pydantic_path(rows, adapter)), ("fast", lambda: fast_path(rows))):
+        best = min(timeit.repeat(fn, number=args.repeat, repeat=5))
+        results[name] = best / args.repeat * 1000
+        print(f"{name:>9}: {results[name]:.3f} ms per {args.items}-item page")
+    print(f"  speedup: {results['pydantic'] / results['fast']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
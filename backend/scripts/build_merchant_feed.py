@@ -0,0 +1,44 @@
+"""
+Build (or incrementally refresh) the Google Merchant feed file served at
+/api/feeds/merchant.tsv.gz. Meant to run from cron; an incremental run only
+reads products changed since the previous build.
+
+Usage:
+    python backend/scripts/build_merchant_feed.py [--full] [--output PATH]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.config import settings  # noqa: E402
+from app.db import SessionLocal  # noqa: E402
+from app.services.merchant_feed import build_merchant_feed  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="rebuild from scratch instead of merging changes")
+    parser.add_argument("--output", type=Path, default=Path(settings.merchant_feed_path), help="feed file path")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        meta = build_merchant_feed(db, args.output, full=args.full)
+    finally:
+        db.close()
+    kind = "incremental" if meta["incremental"] else "full"
+    print(f"{kind} build: {meta['items']} items -> {args.output} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Rebuild the precomputed related-product lists (product_neighbours) served at
+/api/shop-products/{slug}/related. Meant to run from cron: incremental runs
+(default) rescore only what changed since the last build; run --full nightly.
+
+Usage:
+    python backend/scripts/build_related_products.py [--full]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.db import SessionLocal  # noqa: E402
+from app.services.related_products import build_related_products  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="rescore every product instead of only changed ones")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        counts = build_related_products(db, full=args.full)
+    finally:
+        db.close()
+    print(
+        f"{counts['products']} products, rescored {counts['rescored']}: "
+        f"{counts['written']} written, {counts['removed']} removed in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Build (or incrementally refresh) the sharded sitemaps served at /sitemap.xml
+and /sitemaps/<name>. Meant to run from cron; an incremental run only
+rewrites the product shards that changed since the previous build.
+
+Usage:
+    python backend/scripts/build_sitemaps.py [--full] [--output DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.config import settings  # noqa: E402
+from app.db import SessionLocal  # noqa: E402
+from app.services.sitemaps import build_sitemaps  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="rewrite every shard instead of only changed ones")
+    parser.add_argument("--output", type=Path, default=Path(settings.sitemap_dir), help="sitemap directory")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        meta, rewritten = build_sitemaps(db, args.output, full=args.full)
+    finally:
+        db.close()
+    urls = sum(entry["urls"] for entry in meta["files"].values())
+    print(
+        f"{len(meta['files'])} sitemaps, {urls} urls; rewrote {len(rewritten)} product shard(s) "
+        f"in {time.perf_counter() - start:.2f}s -> {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+EXPLAIN regression check for the hot catalog queries.
+
+Seeds synthetic products inside a transaction, ANALYZEs, runs EXPLAIN on each
+query the catalog routers issue and fails if any plan falls back to a
+sequential scan on ``products``. The transaction is rolled back at the end, so
+it is safe to point at a dev database that has the latest migrations applied.
+
+Usage:
+    python backend/scripts/explain_catalog_queries.py [--seed 20000] [--verbose]
+
+Exit status is 1 when at least one query regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from sqlalchemy import func, select, tuple_  # noqa: E402
+from sqlalchemy.engine import Connection  # noqa: E402
+from sqlalchemy.sql import Select  # noqa: E402
+
+from app.db import engine  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.routers.admin_products import RECYCLE_BIN_REMOVED_AT, recycle_bin_query  # noqa: E402
+from app.routers.public_products import _apply_storefront_filters  # noqa: E402
+from app.services.catalog_search import build_search_clause  # noqa: E402
+from app.services.catalog_tokens import compute_catalog_tokens, compute_search_text  # noqa: E402
+from app.services.catalog_visibility import ALLOWED_STATUSES  # noqa: E402
+
+BRANDS = ["Ray-Ban", "Oakley", "Persol", "Carrera", "Vogue", "Acuvue", "Dailies"]
+CATEGORIES = ["Γυαλιά Ηλίου", "Γυαλιά Οράσεως", "Φακοί Επαφής", "Stock"]
+AUDIENCES = ["male", "female", "unisex", "kids"]
+STATUSES = ["published"] * 8 + ["draft", "archived"]
+
+
+def seed_products(conn: Connection, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    rows: List[Dict[str, Any]] = []
+    for i in range(count):
+        attrs = {
+            "brand_label": BRANDS[i % len(BRANDS)],
+            "category_label": CATEGORIES[i % len(CATEGORIES)],
+            "audience": AUDIENCES[i % len(AUDIENCES)],
+            "tags": [f"tag-{i % 50}"],
+        }
+        if i % 25 == 0:
+            attrs["product_type"] = "contact_lens"
+        sku = f"EXPLAIN-{i:06d}"
+        slug = f"explain-product-{i}"
+        title = f"{attrs['brand_label']} model {i}"
+        status = STATUSES[i % len(STATUSES)]
+        rows.append(
+            {
+                "sku": sku,
+                "slug": slug,
+                "title_el": title,
+                "title_en": title,
+                "price": 100,
+                "stock": i % 10,
+                "status": status,
+                "visible": i % 20 != 0,
+                "attributes": attrs,
+                "images": [],
+                "deleted_at": now if status == "archived" else None,
+                "created_at": now - timedelta(minutes=i),
+                "updated_at": now - timedelta(minutes=i),
+                "search_text": compute_search_text(attrs, sku, title, title, slug),
+                **compute_catalog_tokens(attrs, slug, title, title),
+            }
+        )
+        if len(rows) == 1000:
+            conn.execute(Product.__table__.insert(), rows)
+            rows = []
+    if rows:
+        conn.execute(Product.__table__.insert(), rows)
+    conn.exec_driver_sql("ANALYZE products")
+
+
+def hot_queries() -> Iterator[Tuple[str, Select]]:
+    cursor = (datetime.now(timezone.utc) - timedelta(days=3), 10**9)
+
+    # Same shape as public_products._load_listing_page.
+    def storefront(**filters: Any) -> Select:
+        search = filters.get("search")
+        stmt = _apply_storefront_filters(
+            select(Product.id),
+            search=search,
+            category_aliases=filters.get("category_aliases", []),
+            audience_filters=filters.get("audience_filters", []),
+        )
+        if search is not None:
+            stmt = stmt.order_by(search.rank.desc())
+        return stmt.order_by(Product.created_at.desc(), Product.id.desc()).limit(24)
+
+    yield "shop-products list", storefront()
+    yield "shop-products keyset page", storefront().where(tuple_(Product.created_at, Product.id) < cursor)
+    yield "shop-products category filter", storefront(category_aliases=["γυαλιά ηλίου"])
+    yield "shop-products audience filter", storefront(audience_filters=["kids"])
+    yield "shop-products search", storefront(search=build_search_clause("ray ban"))
+    yield "shop-products detail", select(Product.id).where(Product.slug == "explain-product-42", Product.visible == True)  # noqa: E712
+    yield "products list", (
+        select(Product.id)
+        .where(Product.visible.is_(True), Product.status != "archived")
+        .order_by(Product.created_at.desc(), Product.id.desc())
+        .limit(24)
+    )
+    yield "products detail", select(Product.id).where(
+        Product.slug == "explain-product-42",
+        Product.visible.is_(True),
+        Product.status != "archived",
+    )
+    yield "sku lookup", select(Product.id).where(Product.sku == "EXPLAIN-000042")
+    yield "recycle bin", recycle_bin_query(select(Product.id)).limit(50)
+    yield "recycle bin keyset page", (
+        recycle_bin_query(select(Product.id)).where(tuple_(RECYCLE_BIN_REMOVED_AT, Product.id) < cursor).limit(50)
+    )
+    yield "recycle bin search", recycle_bin_query(select(Product.id), build_search_clause("ray ban")).limit(50)
+    yield "contact lens list", (
+        select(Product.id)
+        .where(Product.attributes["product_type"].astext == "contact_lens")
+        .order_by(Product.updated_at.desc())
+    )
+    yield "catalog stamp", select(func.max(Product.updated_at))
+    yield "changes feed", (
+        select(Product.id)
+        .where(tuple_(Product.updated_at, Product.id) > cursor)
+        .order_by(Product.updated_at, Product.id)
+        .limit(500)
+    )
+
+
+def _seq_scans(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == "products":
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from _seq_scans(child)
+
+
+def _node_types(plan: Dict[str, Any]) -> List[str]:
+    types = [plan["Node Type"] + (f" ({plan['Index Name']})" if "Index Name" in plan else "")]
+    for child in plan.get("Plans", []):
+        types.extend(_node_types(child))
+    return types
+
+
+def explain(conn: Connection, stmt: Select) -> Dict[str, Any]:
+    compiled = stmt.compile(bind=conn, compile_kwargs={"render_postcompile": True})
+    raw = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params).scalar_one()
+    doc = raw if isinstance(raw, list) else json.loads(raw)
+    return doc[0]["Plan"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=20000, help="synthetic products to insert (0 to use existing rows)")
+    parser.add_argument("--verbose", action="store_true", help="print the plan nodes of every query")
+    args = parser.parse_args()
+
+    assert ALLOWED_STATUSES == {"published", "in_stock", "preorder"}, "update ix_products_storefront_keyset predicate"
+
+    failures = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            if args.seed:
+                seed_products(conn, args.seed)
+            for name, stmt in hot_queries():
+                plan = explain(conn, stmt)
+                scans = list(_seq_scans(plan))
+                status = "SEQ SCAN" if scans else "ok"
+                failures += bool(scans)
+                print(f"{status:>8}  {name}")
+                if args.verbose or scans:
+                    print("          " + " -> ".join(_node_types(plan)))
+        finally:
+            trans.rollback()
+
+    if failures:
+        print(f"{failures} query(ies) fell back to a sequential scan on products")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
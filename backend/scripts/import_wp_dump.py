@@ -32,7 +32,6 @@ from pathlib import Path
 from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import sys
-import unicodedata
 from html import unescape
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -44,7 +43,26 @@ from app.db import SessionLocal
 from app.models.product import Product as ProductModel
 from app.models.brand import Brand
 from app.models.category import Category
-
+from app.services.alias_matcher import AliasMatcher
+from app.services.catalog_tokens import STOCK_MATCHER
+
+SUNGLASSES_CATEGORY = ("Γυαλιά Ηλίου", "gialia-iliou")
+OPTICAL_CATEGORY = ("Γυαλιά Οράσεως", "gialia-oraseos")
+
+# Tag keywords -> category for products without a product_cat (matched normalized,
+# so "γυαλιά ηλίου", "γυαλια ηλιου" and "γυαλιά-ηλίου" are one alias).
+TAG_CATEGORY_MATCHER = AliasMatcher({
+    "γυαλιά ηλίου": SUNGLASSES_CATEGORY,
+    "οράσεως": OPTICAL_CATEGORY,
+})
+
+AUDIENCE_MATCHER = AliasMatcher({
+    "unisex": "unisex",
+    "ανδρ": "male",
+    "andrika": "male",
+    "γυν": "female",
+    "gynaikeia": "female",
+})
 
 # --------- Low-level SQL INSERT parser (MySQL-style) ---------
 
@@ -342,24 +360,6 @@ def _html_to_text(value: str) -> str:
     return "\n".join(lines)
 
 
-def _normalize_token(value: Optional[str]) -> str:
-    if not value:
-        return ""
-    text = unicodedata.normalize("NFD", value)
-    text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
-    return re.sub(r"[^\w]+", "", text, flags=re.UNICODE).lower()
-
-
-def _is_stockish(value: Optional[str]) -> bool:
-    if not value:
-        return False
-    norm = _normalize_token(value)
-    if not norm:
-        return False
-    stock_tokens = {"stock", "stok", "στοκ", "στοκσ"}
-    return any(tok in norm for tok in stock_tokens)
-
-
 def _build_product_image_urls(meta: Dict[str, List[str]], attachments: Dict[int, WPPost]) -> List[str]:
     urls: List[str] = []
     thumb_id = _first(meta, "_thumbnail_id")
@@ -538,9 +538,7 @@ def import_dump(dump_path: Path):
         """
         # If any category explicitly mentions stock, prefer that so we can surface stock PLP buckets
         for c in product_cats:
-            name = (c.get("name") or "").lower()
-            slug = (c.get("slug") or "").lower()
-            if _is_stockish(name) or _is_stockish(slug):
+            if STOCK_MATCHER.matches(c.get("name")) or STOCK_MATCHER.matches(c.get("slug")):
                 return c.get("name") or "Stock", c.get("slug") or "stock"
 
         if product_cats:
@@ -548,30 +546,27 @@ def import_dump(dump_path: Path):
             return primary.get("name"), primary.get("slug")
 
         # From tags if no product_cat
-        if any(s in t for t in lower_tags for s in ["γυαλιά ηλίου", "γυαλια ηλιου", "γυαλιά-ηλίου"]):
-            return "Γυαλιά Ηλίου", "gialia-iliou"
-        if any(s in t for t in lower_tags for s in ["γυαλιά οράσεως", "γυαλια ορασεως", "οράσεως"]):
-            return "Γυαλιά Οράσεως", "gialia-oraseos"
-        if any(_is_stockish(t) for t in lower_tags):
+        tag_hits = set().union(*(TAG_CATEGORY_MATCHER.labels(t) for t in lower_tags))
+        for category in (SUNGLASSES_CATEGORY, OPTICAL_CATEGORY):
+            if category in tag_hits:
+                return category
+        if STOCK_MATCHER.matches_any(lower_tags):
             return "Stock", "stock"
         return None, None
 
     def infer_audience(product_cats: List[Dict[str, str]], lower_tags: List[str]) -> Optional[str]:
         # from categories
         for c in product_cats:
-            n = (c.get("name") or "").lower()
-            s = (c.get("slug") or "").lower()
-            if "unisex" in n or "unisex" in s:
-                return "unisex"
-            if "ανδρ" in n or "ανδρ" in s or "andrika" in s:
-                return "male"
-            if "γυν" in n or "γυν" in s or "gynaikeia" in s:
-                return "female"
+            hits = AUDIENCE_MATCHER.labels(c.get("name")) | AUDIENCE_MATCHER.labels(c.get("slug"))
+            for audience in ("unisex", "male", "female"):
+                if audience in hits:
+                    return audience
 
         # from tags
-        has_male = any("ανδρ" in t for t in lower_tags)
-        has_female = any("γυν" in t for t in lower_tags)
-        has_unisex = any("unisex" in t for t in lower_tags)
+        tag_hits = set().union(*(AUDIENCE_MATCHER.labels(t) for t in lower_tags))
+        has_male = "male" in tag_hits
+        has_female = "female" in tag_hits
+        has_unisex = "unisex" in tag_hits
         if has_unisex or (has_male and has_female):
             return "unisex"
         if has_male and not has_female:
@@ -656,7 +651,7 @@ def import_dump(dump_path: Path):
             attrs["variants"] = variants
         if catalog_status:
             attrs["catalog_status"] = catalog_status
-        if _is_stockish(category_label) or _is_stockish(category_slug) or any(_is_stockish(t) for t in tags):
+        if STOCK_MATCHER.matches_any([category_label, category_slug, *tags]):
             attrs["is_stock"] = True
             attrs["stock_category"] = "stock"
 
@@ -0,0 +1,38 @@
+"""
+Delete expired Idempotency-Key records (IDEMPOTENCY_TTL_HOURS). Meant to run
+from cron; expired rows are also reclaimed on reuse, so missing a run is harmless.
+
+Usage:
+    python backend/scripts/sweep_idempotency_keys.py [--batch-size 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = SCRIPT_DIR.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.db import SessionLocal  # noqa: E402
+from app.services.idempotency import sweep_idempotency_keys  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows deleted per transaction")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        deleted = sweep_idempotency_keys(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"deleted {deleted} expired idempotency key(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+from app.routers.public_products import _variant_number
+
+
+@pytest.mark.parametrize("value", [None, "", "abc", "nan", "NaN", "inf", "-inf", "1e400"])
+def test_variant_number_rejects_missing_and_non_finite(value):
+    assert _variant_number(value, int) is None
+    assert _variant_number(value, float) is None
+
+
+def test_variant_number_casts_finite_values():
+    assert _variant_number("3", int) == 3
+    assert _variant_number("2.0", int) == 2
+    assert _variant_number("19.90", float) == 19.9
+    assert _variant_number("-1", float) == -1.0
+
+
+def test_variant_numbers_are_valid_json():
+    item = {"stock": _variant_number("inf", int), "price": _variant_number("nan", float)}
+    # The stdlib JSONResponse renders with allow_nan=False.
+    assert json.loads(json.dumps(item, allow_nan=False)) == {"stock": None, "price": None}
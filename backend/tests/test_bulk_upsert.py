@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+from sqlalchemy.dialects import postgresql
+
+from app.routers.shop_products import _BULK_UPDATE_COLUMNS, _bulk_update_stmt
+
+
+def _values(product_id, version, **overrides):
+    values = {name: None for name in _BULK_UPDATE_COLUMNS}
+    values.update(
+        sku=f"SKU-{product_id}",
+        slug=f"product-{product_id}",
+        title_el="Τίτλος",
+        title_en="Title",
+        images=[],
+        price=Decimal("10.00"),
+        attributes={},
+        stock=1,
+        status="published",
+        category_tokens=[],
+        audience_tokens=[],
+        is_stock=False,
+        search_text="title",
+        _id=product_id,
+        _version=version,
+    )
+    values.update(overrides)
+    return values
+
+
+def test_bulk_update_is_a_per_row_compare_and_swap():
+    stmt = _bulk_update_stmt([_values(1, 3), _values(2, 7)])
+    sql = str(stmt.compile(dialect=postgresql.psycopg.dialect()))
+    assert "WHERE products.id = incoming._id AND products.version = incoming._version" in sql
+    assert "version=(products.version + " in sql
+    assert sql.rstrip().endswith("RETURNING products.id")
+
+
+def test_bulk_update_casts_all_null_columns():
+    sql = str(_bulk_update_stmt([_values(1, 1)]).compile(dialect=postgresql.psycopg.dialect()))
+    # ean/description/compare_at_price are NULL in every row, i.e. typed text in VALUES.
+    assert "compare_at_price=CAST(incoming.compare_at_price AS NUMERIC(10, 2))" in sql
+    assert "ean=CAST(incoming.ean AS TEXT)" in sql
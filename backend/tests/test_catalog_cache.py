@@ -0,0 +1,110 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services.catalog_cache import CatalogCache, bump_catalog_version
+
+
+def _cache(**kwargs):
+    return CatalogCache("test", max_entries=kwargs.pop("max_entries", 8), ttl_seconds=kwargs.pop("ttl_seconds", 60), **kwargs)
+
+
+def test_get_or_load_caches_until_the_catalog_version_moves():
+    cache = _cache()
+    calls = []
+    loader = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_load("k", loader) == 1
+    assert cache.get_or_load("k", loader) == 1
+    bump_catalog_version()
+    assert cache.get_or_load("k", loader) == 2
+
+
+def test_lru_bound():
+    cache = _cache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.get_or_load(key, lambda: key)
+    assert cache.stats()["size"] == 2
+    assert cache.get("a") is None
+
+
+def test_concurrent_sync_misses_share_one_load():
+    cache = _cache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("k", loader))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    while not cache._inflight:
+        pass
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert results == ["value"] * 5
+    assert len(calls) == 1
+
+
+def test_concurrent_async_misses_share_one_load():
+    cache = _cache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_load("k", loader) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["value"] * 10
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 9
+    assert not cache._ainflight
+
+
+def test_async_waiters_retry_when_the_leader_fails():
+    cache = _cache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_load("k", loader) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert isinstance(results[0], RuntimeError)
+    assert results[1:] == ["value", "value"]
+    assert not cache._ainflight
+
+
+def test_cancelled_async_waiter_does_not_cancel_the_load():
+    cache = _cache()
+
+    async def loader():
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def main():
+        leader = asyncio.ensure_future(cache.aget_or_load("k", loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.aget_or_load("k", loader))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return await leader
+
+    assert asyncio.run(main()) == "value"
+    assert cache.get("k") == "value"
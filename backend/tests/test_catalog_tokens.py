@@ -0,0 +1,107 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from app.services.catalog_tokens import (
+    MAX_ALIAS_WORDS,
+    alias_tokens,
+    compute_catalog_tokens,
+    compute_search_text,
+    value_tokens,
+)
+
+PLP_PATH = Path(__file__).resolve().parents[2] / "frontend" / "src" / "pages" / "PLP.jsx"
+
+
+def _plp_aliases():
+    """Every alias of the storefront's CATEGORY_CONFIG (frontend/src/pages/PLP.jsx)."""
+    source = PLP_PATH.read_text(encoding="utf-8")
+    block = source[source.index("const CATEGORY_CONFIG = {"):]
+    block = block[: block.index("\n};")]
+    aliases = []
+    for group in re.findall(r"aliases:\s*\[(.*?)\]", block, re.DOTALL):
+        aliases.extend(re.findall(r'"([^"]*)"', group))
+    return aliases
+
+
+def _matches(aliases, **product):
+    tokens = compute_catalog_tokens(
+        product.get("attributes", {}),
+        product.get("slug"),
+        product.get("title_el"),
+        product.get("title_en"),
+    )["category_tokens"]
+    return bool(set(alias_tokens(aliases)) & set(tokens))
+
+
+def test_value_tokens_cover_word_runs():
+    tokens = value_tokens("Renu Υγρά Φακών Επαφής 360ml")
+    assert "renuυγραφακωνεπαφης360ml" in tokens
+    assert "υγραφακωνεπαφης" in tokens
+    assert "φακωνεπαφης" in tokens
+    assert "επαφης" in tokens
+
+
+def test_value_tokens_stop_at_max_alias_words():
+    words = [f"w{i}" for i in range(MAX_ALIAS_WORDS + 2)]
+    tokens = value_tokens(" ".join(words))
+    assert "".join(words[:MAX_ALIAS_WORDS]) in tokens
+    assert "".join(words[: MAX_ALIAS_WORDS + 1]) not in tokens
+
+
+def test_value_tokens_empty():
+    assert value_tokens(None) == []
+    assert value_tokens(" - ") == []
+
+
+@pytest.mark.skipif(not PLP_PATH.exists(), reason="frontend sources not checked out")
+def test_plp_aliases_fit_in_the_token_window():
+    aliases = _plp_aliases()
+    assert aliases
+    for alias in aliases:
+        words = [w for w in re.split(r"[^\w]+|_", alias) if w]
+        assert len(words) <= MAX_ALIAS_WORDS, alias
+
+
+@pytest.mark.skipif(not PLP_PATH.exists(), reason="frontend sources not checked out")
+@pytest.mark.parametrize("template", ["Renu {} 360ml", "{}", "Ray-Ban {} RB2140"])
+def test_every_plp_alias_matches_a_title_containing_it(template):
+    for alias in _plp_aliases():
+        assert _matches([alias], title_el=template.format(alias)), alias
+
+
+@pytest.mark.parametrize(
+    "aliases,product",
+    [
+        (["υγρά φακών επαφής"], {"title_el": "Renu Υγρά Φακών Επαφής 360ml"}),
+        (["stock γυαλια ηλιου"], {"title_el": "Stock Γυαλιά Ηλίου Ray-Ban Aviator"}),
+        (["stock γυαλια ορασεως"], {"title_el": "STOCK γυαλιά οράσεως Oakley"}),
+        (["sunglasses-stock"], {"slug": "ray-ban-sunglasses-stock-rb2140"}),
+        (["ophthalmic_frames"], {"attributes": {"category": "ophthalmic_frames"}}),
+        (["contact_lenses"], {"attributes": {"product_type": "contact_lens"}}),
+        (["stock"], {"attributes": {"stock_category": "Στοκ"}}),
+    ],
+)
+def test_category_aliases_match(aliases, product):
+    assert _matches(aliases, **product)
+
+
+def test_category_aliases_do_not_match_unrelated_titles():
+    assert not _matches(["υγρά φακών επαφής"], title_el="Φακοί επαφής Acuvue Oasys")
+    assert not _matches(["sunglasses"], title_el="Ray-Ban RB5154 frames")
+
+
+def test_audience_tokens_and_stock_flag():
+    values = compute_catalog_tokens({"audience": "Γυναίκα", "audiences": ["Unisex", None], "is_stock": True}, None, None, None)
+    assert values["audience_tokens"] == ["γυναικα", "unisex"]
+    assert values["is_stock"] is True
+    assert "stock" in values["category_tokens"]
+
+
+def test_search_text_folds_accents_and_includes_slug_and_compact_sku():
+    text = compute_search_text({"brand": "Ray-Ban"}, "RB-2140", "Γυαλιά Ηλίου", None, "gyalia-iliou-rb2140")
+    assert "γυαλια ηλιου" in text
+    assert "rb2140" in text
+    assert "gyalia iliou rb2140" in text
+    assert "ray ban" in text
@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from app.services.http_cache import (
+    CATALOG_CACHE_CONTROL,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
+
+LAST_MODIFIED = datetime(2026, 10, 17, 12, 0, 0, 500000, tzinfo=timezone.utc)
+
+
+def _request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_make_etag_is_stable_and_quoted():
+    etag = make_etag("list", 3, None)
+    assert etag == make_etag("list", 3, None)
+    assert etag != make_etag("list", 4, None)
+    assert etag.startswith('"') and etag.endswith('"')
+
+
+def test_if_none_match():
+    etag = make_etag("product", 1)
+    assert is_not_modified(_request(if_none_match=etag), etag, None)
+    assert is_not_modified(_request(if_none_match=f'"other", W/{etag}'), etag, None)
+    assert is_not_modified(_request(if_none_match="*"), etag, None)
+    assert not is_not_modified(_request(if_none_match='"other"'), etag, None)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    request = _request(if_none_match='"other"', if_modified_since="Sat, 17 Oct 2026 12:00:00 GMT")
+    assert not is_not_modified(request, make_etag("x"), LAST_MODIFIED)
+
+
+def test_if_modified_since_has_second_precision():
+    etag = make_etag("x")
+    assert is_not_modified(_request(if_modified_since="Sat, 17 Oct 2026 12:00:00 GMT"), etag, LAST_MODIFIED)
+    assert not is_not_modified(_request(if_modified_since="Sat, 17 Oct 2026 11:59:59 GMT"), etag, LAST_MODIFIED)
+    assert not is_not_modified(_request(if_modified_since="garbage"), etag, LAST_MODIFIED)
+    assert not is_not_modified(_request(), etag, LAST_MODIFIED)
+
+
+def test_not_modified_response_carries_validators():
+    etag = make_etag("x")
+    response = not_modified_response(etag, LAST_MODIFIED)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == CATALOG_CACHE_CONTROL
+    assert response.headers["Last-Modified"] == "Sat, 17 Oct 2026 12:00:00 GMT"
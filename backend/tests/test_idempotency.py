@@ -0,0 +1,25 @@
+import json
+from decimal import Decimal
+
+from app.services.idempotency import REPLAY_HEADER, IdempotencyClaim, replay_response, request_fingerprint
+
+
+def test_fingerprint_ignores_key_order_but_not_content():
+    a = request_fingerprint("/api/admin/products/sync", {"sku": "A", "price": Decimal("9.90")})
+    b = request_fingerprint("/api/admin/products/sync", {"price": Decimal("9.90"), "sku": "A"})
+    assert a == b
+    assert a != request_fingerprint("/api/admin/products/sync", {"sku": "A", "price": Decimal("9.91")})
+    assert a != request_fingerprint("/api/admin/products/sync/bulk", {"sku": "A", "price": Decimal("9.90")})
+
+
+def test_claims():
+    assert IdempotencyClaim(record_id=5).replayed is False
+    assert IdempotencyClaim(status_code=201, response={"ok": True}).replayed is True
+
+
+def test_replay_response_returns_the_stored_response():
+    response = replay_response(IdempotencyClaim(status_code=201, response={"ok": True, "sku": "A"}))
+    assert response.status_code == 201
+    assert response.headers[REPLAY_HEADER] == "true"
+    assert json.loads(response.body) == {"ok": True, "sku": "A"}
+    assert replay_response(IdempotencyClaim(response=[])).status_code == 200
@@ -0,0 +1,33 @@
+from app.services.image_refs import extract_image_paths, normalize_public_path, product_image_paths
+
+
+def test_normalize_public_path():
+    assert normalize_public_path("uploads//images/./a.webp") == "/uploads/images/a.webp"
+    assert normalize_public_path("\\uploads\\images\\..\\a.webp") == "/uploads/images/a.webp"
+    assert normalize_public_path("  ") == ""
+
+
+def test_extract_image_paths_from_urls_and_paths():
+    assert extract_image_paths("https://www.lookoptica.gr/media/uploads/images/2024/a.webp?v=2") == {
+        "/uploads/images/2024/a.webp"
+    }
+    assert extract_image_paths("/product_images/b.jpg") == {"/product_images/b.jpg"}
+    assert extract_image_paths("/static/logo.png") == set()
+    assert extract_image_paths(None) == set()
+
+
+def test_product_image_paths_include_variant_images():
+    attributes = {
+        "variants": [
+            {"image": "/uploads/images/black.webp", "images": ["/uploads/images/black-2.webp", 7]},
+            {"imageUrl": "https://cdn.example/product_images/red.jpg"},
+            "not-a-variant",
+        ]
+    }
+    assert product_image_paths(["/uploads/images/main.webp"], attributes) == {
+        "/uploads/images/main.webp",
+        "/uploads/images/black.webp",
+        "/uploads/images/black-2.webp",
+        "/product_images/red.jpg",
+    }
+    assert product_image_paths(None, {"variants": "bad"}) == set()
@@ -0,0 +1,80 @@
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.services.merchant_feed import FEED_COLUMNS, _merge_groups, _prices, _stock, feed_items
+
+COL = {name: i for i, name in enumerate(FEED_COLUMNS)}
+
+
+def _row(**overrides):
+    values = {
+        "id": 10,
+        "sku": "RB2140",
+        "ean": None,
+        "slug": "ray-ban-wayfarer",
+        "title_el": "Ray-Ban Wayfarer",
+        "title_en": "Ray-Ban Wayfarer",
+        "description": "<p>Κλασικά\tγυαλιά</p>",
+        "images": ["/uploads/images/main.webp"],
+        "price": Decimal("150.00"),
+        "compare_at_price": Decimal("120.00"),
+        "attributes": {"brand": "Ray-Ban", "category": "sunglasses"},
+        "stock": 3,
+        "status": "in_stock",
+        "visible": True,
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_simple_product_is_one_item():
+    (item,) = feed_items(_row())
+    assert item[COL["id"]] == "RB2140"
+    assert item[COL["item_group_id"]] == "10"
+    assert item[COL["availability"]] == "in_stock"
+    assert item[COL["price"]] == "150.00 EUR"
+    assert item[COL["sale_price"]] == "120.00 EUR"
+    assert "\t" not in item[COL["description"]] and "<p>" not in item[COL["description"]]
+
+
+def test_variant_ids_are_stable_and_skip_archived_and_duplicates():
+    variants = [
+        {"sku": "RB2140-901", "color": "Black", "stock": 0},
+        {"ean": "8053672000001", "color": "Havana", "stock": 2},
+        {"color": "Μπλε", "stock": "1"},
+        {"sku": "RB2140-901", "color": "Black again"},
+        {"sku": "RB2140-OLD", "status": "archived"},
+        {"stock": 5},
+    ]
+    items = feed_items(_row(attributes={"variants": variants}))
+    assert [i[COL["id"]] for i in items] == ["RB2140-901", "RB2140-8053672000001", "RB2140-μπλε"]
+    assert [i[COL["availability"]] for i in items] == ["out_of_stock", "in_stock", "in_stock"]
+    # Reordering the variants keeps every item id.
+    reordered = feed_items(_row(attributes={"variants": list(reversed(variants))}))
+    assert {i[COL["id"]] for i in reordered} == {i[COL["id"]] for i in items}
+
+
+def test_contact_lens_is_a_single_item():
+    attrs = {"product_type": "contact_lens", "variants": [{"sph": "-1.00"}, {"sph": "-1.25"}]}
+    (item,) = feed_items(_row(attributes=attrs, stock=0, status="in_stock"))
+    assert item[COL["id"]] == "RB2140"
+    assert item[COL["availability"]] == "in_stock"
+
+
+def test_stock_and_prices_tolerate_bad_json():
+    assert _stock("3.0") == 3
+    assert _stock("inf") == 0
+    assert _stock("n/a") == 0
+    assert _stock(None) == 0
+    assert _prices(Decimal("10"), "junk") == ("10.00 EUR", "")
+
+
+def test_merge_groups_replaces_inserts_and_drops():
+    old = [(1, ["a1\n"]), (2, ["b1\n", "b2\n"]), (4, ["d1\n"]), (6, ["f1\n"])]
+    changed = [(2, ["B1\n"]), (3, ["C1\n"]), (6, [])]
+    assert list(_merge_groups(old, changed, removed={4})) == ["a1\n", "B1\n", "C1\n"]
+
+
+def test_merge_groups_with_no_changes_keeps_the_file():
+    old = [(1, ["a\n"]), (2, ["b\n"])]
+    assert list(_merge_groups(old, [], removed=set())) == ["a\n", "b\n"]
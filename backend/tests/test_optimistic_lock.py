@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.schemas.product import ProductUpsert
+from app.services.optimistic_lock import VERSION_CONFLICT_DETAIL, check_expected_version
+
+BASE = {"sku": "RB2140", "title": {"el": "Γυαλιά"}, "brand": "Ray-Ban", "category": "sunglasses", "price": 99, "stock": 1}
+
+
+def test_check_expected_version():
+    check_expected_version(3, None)
+    check_expected_version(3, 3)
+    with pytest.raises(HTTPException) as exc:
+        check_expected_version(4, 3)
+    assert exc.value.status_code == 409
+    assert exc.value.detail == VERSION_CONFLICT_DETAIL
+
+
+def test_upsert_without_version_is_unchecked():
+    assert ProductUpsert(**BASE).expected_version is None
+
+
+def test_upsert_version_is_the_expected_version():
+    assert ProductUpsert(**BASE, version=3).expected_version == 3
+    assert ProductUpsert(**BASE, version=3, expected_version=3).expected_version == 3
+    assert ProductUpsert(**BASE, expected_version=5).expected_version == 5
+
+
+def test_upsert_rejects_disagreeing_versions():
+    with pytest.raises(ValidationError):
+        ProductUpsert(**BASE, version=1, expected_version=2)
@@ -0,0 +1,67 @@
+import base64
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException, Response
+
+from app.services.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    TOTAL_ESTIMATED_HEADER,
+    decode_cursor,
+    decode_watermark,
+    encode_cursor,
+    encode_watermark,
+    set_next_cursor,
+    set_total_count,
+)
+
+
+def _token(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 10, 17, 12, 30, 5, 123456, tzinfo=timezone.utc)
+    cursor = encode_cursor(ts, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (ts, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", _token(["yesterday", 1]), _token([1, 2, 3])])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_watermark_round_trip():
+    positions = [(1234567890123, 7), (-1, 0)]
+    assert decode_watermark(encode_watermark(positions), 2) == positions
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        encode_watermark([(5, 1)]),
+        # Timestamp watermarks from before change_xid are not accepted.
+        _token([["2026-10-17T00:00:00+00:00", 1], ["2026-10-17T00:00:00+00:00", 2]]),
+        "%%%",
+    ],
+)
+def test_invalid_watermark_is_a_400(token):
+    with pytest.raises(HTTPException) as exc:
+        decode_watermark(token, 2)
+    assert exc.value.status_code == 400
+
+
+def test_response_headers():
+    response = Response()
+    set_next_cursor(response, None)
+    assert NEXT_CURSOR_HEADER not in response.headers
+    set_next_cursor(response, "abc")
+    set_total_count(response, 120, estimated=True)
+    assert response.headers[NEXT_CURSOR_HEADER] == "abc"
+    assert response.headers[TOTAL_COUNT_HEADER] == "120"
+    assert response.headers[TOTAL_ESTIMATED_HEADER] == "true"
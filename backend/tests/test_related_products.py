@@ -0,0 +1,39 @@
+from app.services.related_products import _blocks, _Features, _price_band, _resolve_codes, _same_brand, _window
+
+
+def _f(pid, price, brand="rayban", category="sunglasses", live=True):
+    return _Features(id=pid, brand=brand, category=category, audience="", price=price, band=_price_band(price), live=live)
+
+
+def test_price_band_is_geometric_and_handles_free_products():
+    assert _price_band(0) is None
+    assert _price_band(-5) is None
+    assert _price_band(100) == _price_band(110)
+    assert _price_band(100) != _price_band(200)
+
+
+def test_blocks_skip_offline_products_and_sort_by_price():
+    features = {1: _f(1, 50), 2: _f(2, 10), 3: _f(3, 30, live=False), 4: _f(4, 20, brand="")}
+    blocks = _blocks(features, "brand")
+    assert blocks == {"rayban": [(10, 2), (50, 1)]}
+
+
+def test_window_is_neighbours_by_price_excluding_self():
+    features = {i: _f(i, i * 10) for i in range(1, 11)}
+    block = _blocks(features, "category")["sunglasses"]
+    assert sorted(_window(block, features[5], 2)) == [3, 4, 6, 7]
+    assert sorted(_window(block, features[1], 2)) == [2, 3]
+    assert _window(None, features[1], 2) == []
+
+
+def test_same_brand_is_nearest_in_price():
+    features = {1: _f(1, 100), 2: _f(2, 300), 3: _f(3, 110), 4: _f(4, 90), 5: _f(5, 95)}
+    by_brand = _blocks(features, "brand")
+    # Equal distance breaks on id.
+    assert _same_brand(features[1], features, by_brand) == [5, 3, 4, 2]
+
+
+def test_resolve_codes():
+    codes = {"RB2140": 1, "ray-ban": 1, "OAK1": 2}
+    assert _resolve_codes("RB2140, OAK1,unknown,,", codes) == {1, 2}
+    assert _resolve_codes("", codes) == set()
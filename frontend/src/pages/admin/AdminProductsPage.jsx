@@ -489,8 +489,6 @@ export default function AdminProductsPage() {
 
         attributes: {},
 
-        version: 1,
-
       };
 
 